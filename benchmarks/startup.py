@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Measure how long it takes to get from launch to the first main menu frame.
+
+Every run starts a fresh interpreter so nothing is already imported.  The
+window itself isn't opened, so this works headless: the first frame is the
+main menu rendered to an off-screen console of the same size.
+
+    python benchmarks/startup.py [runs]
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+STAGES = ("import tcod", "import main", "load tileset", "first frame", "preload")
+
+
+def measure() -> None:
+    """Run one cold start in this process and print the timings as JSON."""
+    import time
+
+    start = time.perf_counter()
+    times = {}
+
+    import tcod
+
+    times["import tcod"] = time.perf_counter() - start
+
+    import main
+
+    times["import main"] = time.perf_counter() - start
+
+    main.setup_game.preload_game_modules()
+    tileset = main.TilesetManager().current()
+    times["load tileset"] = time.perf_counter() - start
+
+    console = tcod.console.Console(100, 50, order="F")
+    main.setup_game.MainMenu().on_render(console)
+    times["first frame"] = time.perf_counter() - start
+
+    # Everything needed to start a game has been imported.
+    main.setup_game.wait_for_game_modules()
+    times["preload"] = time.perf_counter() - start
+
+    assert tileset is not None
+    print(json.dumps(times))
+
+
+def main() -> None:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    results = {stage: [] for stage in STAGES}
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, __file__, "--measure"],
+            cwd=ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        for stage, seconds in json.loads(output.splitlines()[-1]).items():
+            results[stage].append(seconds * 1000)
+
+    print(f"{'stage':<14}{'median ms':>12}{'min ms':>10}   (since launch)")
+    for stage in STAGES:
+        times = results[stage]
+        print(f"{stage:<14}{statistics.median(times):>12.1f}{min(times):>10.1f}")
+
+
+if __name__ == "__main__":
+    if "--measure" in sys.argv:
+        sys.path.insert(0, str(ROOT))
+        measure()
+    else:
+        main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Compare decoding each font sheet with loading it through TilesetManager.
+
+    python benchmarks/tilesets.py
+
+"load" uses the cached atlas for sheets big enough to have one, and "memory"
+is switching back to a font that has already been loaded.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import tcod  # noqa: E402
+
+from game.render.tilesets import FONTS, FONTS_FOLDER, TilesetManager  # noqa: E402
+
+
+def timed(function) -> float:
+    start = time.perf_counter()
+    function()
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    manager = TilesetManager(folder=ROOT / FONTS_FOLDER)
+    print(f"{'font':<28}{'decode ms':>11}{'load ms':>10}{'memory ms':>11}")
+    for font in FONTS:
+        path = manager.folder / font.filename
+        decode = timed(
+            lambda: tcod.tileset.load_tilesheet(
+                path, font.columns, font.rows, font.charmap
+            )
+        )
+        manager.get(font)  # Make sure the atlas exists.
+        load = timed(lambda: manager.load(font))
+        memory = timed(lambda: manager.get(font))
+        print(f"{font.filename:<28}{decode:>11.2f}{load:>10.2f}{memory:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
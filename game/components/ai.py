@@ -2,8 +2,6 @@ from __future__ import annotations
 
 from typing import Optional, List, Tuple, TYPE_CHECKING
 
-import numpy as np  # type: ignore
-import tcod
 import random
 
 from game.input.actions import (
@@ -11,6 +9,7 @@ from game.input.actions import (
     BumpAction,
     MeleeAction,
     MovementAction,
+    TakeStairsAction,
     WaitAction,
 )
 
@@ -19,40 +18,24 @@ if TYPE_CHECKING:
 
 
 class BaseAI(Action):
+    profile_category = "ai"
+
     def perform(self) -> None:
         raise NotImplementedError()
 
-    def get_path_to(self, dest_x: int, dest_y: int) -> List[Tuple[int, int]]:
+    def get_path_to(
+        self, dest_x: int, dest_y: int, use_cache: bool = True
+    ) -> List[Tuple[int, int]]:
         """Compute and return a path to the target position.
 
         If there is no valid path then returns an empty list.
         """
-        # DIAGONAL =3
-        DIAGONAL = 0
-
-        # Copy the walkable array.
-        cost = np.array(self.entity.gamemap.tiles["walkable"], dtype=np.int8)
-
-        for entity in self.entity.gamemap.entities:
-            # Check that an enitiy blocks movement and the cost isn't zero (blocking.)
-            if entity.blocks_movement and cost[entity.x, entity.y]:
-                # Add to the cost of a blocked position.
-                # A lower number means more enemies will crowd behind each other in
-                # hallways.  A higher number means enemies will take longer paths in
-                # order to surround the player.
-                cost[entity.x, entity.y] += 10
-
-        # Create a graph from the cost array and pass that graph to a new pathfinder.
-        graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=DIAGONAL)
-        pathfinder = tcod.path.Pathfinder(graph)
-
-        pathfinder.add_root((self.entity.x, self.entity.y))  # Start position.
-
-        # Compute the path to the destination and remove the starting point.
-        path: List[List[int]] = pathfinder.path_to((dest_x, dest_y))[1:].tolist()
-
-        # Convert from List[List[int]] to List[Tuple[int, int]].
-        return [(index[0], index[1]) for index in path]
+        return self.entity.gamemap.pathing.path_to(
+            self.entity.level,
+            (self.entity.x, self.entity.y),
+            (dest_x, dest_y),
+            use_cache,
+        )
 
 
 class PassiveNPC(BaseAI):
@@ -77,6 +60,11 @@ class HostileEnemy(BaseAI):
     def __init__(self, entity: Actor):
         super().__init__(entity)
         self.path: List[Tuple[int, int]] = []
+        # Where self.path leads, and the tile version it was found for.
+        self.path_goal: Optional[Tuple[int, int]] = None
+        self.path_version = -1
+        # Waypoints, as (level, x, y), when following the target to another level.
+        self.route: List[Tuple[int, int, int]] = []
 
     def perform(self) -> None:
         target = self.engine.player
@@ -84,11 +72,27 @@ class HostileEnemy(BaseAI):
         dy = target.y - self.entity.y
         distance = max(abs(dx), abs(dy))  # Chebyshev distance.
 
-        if self.engine.game_map.visible[self.entity.x, self.entity.y]:
+        level = self.entity.level
+        game_map = self.engine.game_map
+        if (
+            target.level == level
+            and game_map.visible[level][self.entity.x, self.entity.y]
+        ):
+            self.route = []
             if distance <= 1:
                 return MeleeAction(self.entity, dx, dy).perform()
 
-            self.path = self.get_path_to(target.x, target.y)
+            self.update_path(target.x, target.y)
+
+        elif self.path_goal is not None and (self.route or target.level != level):
+            # The target left for another level while we were chasing it.
+            if not self.route or self.route[-1][0] != target.level:
+                self.route = game_map.navigation.route(
+                    (level, self.entity.x, self.entity.y),
+                    (target.level, target.x, target.y),
+                )
+            if self.follow_route():
+                return TakeStairsAction(self.entity).perform()
 
         if self.path:
             dest_x, dest_y = self.path.pop(0)
@@ -100,6 +104,57 @@ class HostileEnemy(BaseAI):
 
         return WaitAction(self.entity).perform()
 
+    def update_path(self, goal_x: int, goal_y: int) -> None:
+        """Search for a path to (goal_x, goal_y) again, if self.path is stale."""
+        blocked = self.next_step_blocked()
+        if blocked or self.path_is_stale(goal_x, goal_y):
+            self.path = self.get_path_to(goal_x, goal_y, not blocked)
+            self.path_goal = goal_x, goal_y
+            self.path_version = self.entity.gamemap.pathing.version(self.entity.level)
+
+    def follow_route(self) -> bool:
+        """Head for the next waypoint of self.route.
+
+        Returns True if the next waypoint is up or down the stairs we are on.
+        """
+        here = (self.entity.level, self.entity.x, self.entity.y)
+        while self.route and self.route[0] == here:
+            self.route.pop(0)
+        if not self.route:
+            return False
+        level, x, y = self.route[0]
+        if level != self.entity.level:
+            return True
+        self.update_path(x, y)
+        if not self.path:
+            self.route = []  # Lost the way, so plan again from here next turn.
+        return False
+
+    def path_is_stale(self, goal_x: int, goal_y: int) -> bool:
+        """Return True if self.path no longer leads next to (goal_x, goal_y)."""
+        if not self.path or self.path_goal is None:
+            return True
+        game_map = self.entity.gamemap
+        if self.path_version != game_map.pathing.version(self.entity.level):
+            return True
+        # A path to the tile next to the goal still gets us in reach.
+        end_x, end_y = self.path_goal
+        if max(abs(end_x - goal_x), abs(end_y - goal_y)) > 1:
+            return True
+        next_x, next_y = self.path[0]
+        # True if we have been moved off the path.
+        return abs(next_x - self.entity.x) + abs(next_y - self.entity.y) != 1
+
+    def next_step_blocked(self) -> bool:
+        """Return True if something has moved onto the next step of self.path."""
+        if not self.path:
+            return False
+        next_x, next_y = self.path[0]
+        blocker = self.entity.gamemap.get_blocking_entity_at_location(
+            next_x, next_y, self.entity.level
+        )
+        return blocker is not None
+
 
 class ConfusedEnemy(BaseAI):
     """
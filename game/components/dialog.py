@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-import json
 import random
-from typing import Optional, TYPE_CHECKING
+import textwrap
+from typing import List, Optional, Tuple, TYPE_CHECKING, Union
 
 import game.render.color as color
 from game.components.base_component import BaseComponent
+from game.components.dialog_graph import DialogGraph, compile_dialog, load_dialog_file
 from game.utils.utility import change_text_color
 
 # if TYPE_CHECKING:
@@ -14,29 +15,39 @@ from game.utils.utility import change_text_color
 
 class Dialog(BaseComponent):
     def __init__(
-        self, dialog_data: Optional[dict] = None, start_node="greeting", context=None
+        self,
+        dialog_data: Optional[Union[dict, DialogGraph]] = None,
+        start_node: Optional[str] = None,
+        context=None,
     ):
         self.message_log = []
-        self.nodes = dialog_data or {}
+        # Colored log and wrapped layout are built once per message, not per frame.
+        self._rendered_log: List[str] = []
+        self._rendered_text = ""
+        self._wrap_width = 0
+        self._wrapped_lines: List[str] = []
+        self._layout_key: Tuple[int, Optional[int]] = (0, None)
+        self._layout = ""
+        # The graph is shared and read-only; only the cursor and context are per NPC.
+        self.graph = compile_dialog(dialog_data or {})
         self.context = context or {}
-        self.current_node = start_node
+        self.current_node = start_node or self.graph.start
         self.active_text = ""
         self.active_choices = []
         self._prepare_node(self.current_node)
 
     def _prepare_node(self, node_name: str):
         """Pick a random NPC line and randomize choices for this node."""
-        node = self.nodes[node_name]
-        self.active_text = self._format(random.choice(node["text"]))
+        node = self.graph[node_name]
+        self.active_text = random.choice(node.texts).render(self.context)
         self.active_choices = []
         self.add_to_log("NPC", self.active_text)
-        for choice in node["choices"]:
-            selected_text = self._format(random.choice(choice["text"]))
+        for choice in node.choices:
             self.active_choices.append(
                 {
-                    "text": selected_text,
-                    "next": choice.get("next"),
-                    "action": choice.get("action"),
+                    "text": random.choice(choice.texts).render(self.context),
+                    "next": choice.next,
+                    "action": choice.action,
                 }
             )
 
@@ -59,32 +70,60 @@ class Dialog(BaseComponent):
 
     def add_to_log(self, sender, message):
         self.message_log.append((sender, message))
+        self._rendered_log.append(
+            change_text_color(f"{sender}: {message}\n", self._sender_color(sender))
+        )
+        self._rendered_text = ""
+        if self._wrap_width:
+            self._wrapped_lines.extend(self._wrap_entry(sender, message))
+        self._layout_key = (0, None)
 
     def display_log(self):
-        log = ""
-
-        for sender, message in self.message_log:
-            msg = f"{sender}: {message}\n"
-            if sender == "Player":
-                log += change_text_color(msg, color.dialog_player)
-            else:
-                log += change_text_color(msg, color.dialog_npc)
-        return log
-        # return "".join(
-        #     f"{sender}: {message.ljust(10)}\n" for sender, message in self.message_log
-        # )
+        """Return the whole conversation as a single colored string."""
+        if not self._rendered_text:
+            self._rendered_text = "".join(self._rendered_log)
+        return self._rendered_text
+
+    def wrapped_log(self, width: int, height: Optional[int] = None) -> str:
+        """Return the conversation pre-wrapped to `width` for `print_box`.
+
+        If `height` is given only the most recent lines that fit are returned.
+        The result is cached until the log or the requested size changes.
+        """
+        if width != self._wrap_width:
+            self._wrap_width = width
+            self._wrapped_lines = [
+                line
+                for sender, message in self.message_log
+                for line in self._wrap_entry(sender, message)
+            ]
+            self._layout_key = (0, None)
+
+        if self._layout_key != (width, height):
+            lines = self._wrapped_lines
+            if height is not None:
+                lines = lines[-height:] if height > 0 else []
+            self._layout = "".join(lines)
+            self._layout_key = (width, height)
+        return self._layout
+
+    @staticmethod
+    def _sender_color(sender):
+        return color.dialog_player if sender == "Player" else color.dialog_npc
+
+    def _wrap_entry(self, sender, message) -> List[str]:
+        fg = self._sender_color(sender)
+        lines = [
+            line
+            for paragraph in f"{sender}: {message}".splitlines()
+            for line in textwrap.wrap(paragraph, self._wrap_width) or [""]
+        ]
+        return [change_text_color(f"{line}\n", fg) for line in lines]
 
     def set_context(self, context: dict):
         """Update or replace context dynamically (e.g., after quest updates)."""
         self.context.update(context)
 
-    def _format(self, text: str) -> str:
-        try:
-            return text.format(**self.context)
-        except KeyError:
-            return text  # If a placeholder is missing, leave it as-is
-
     @classmethod
     def from_file(cls, dialog_file: str):
-        with open(dialog_file, "r") as f:
-            return cls(json.load(f))
+        return cls(load_dialog_file(dialog_file))
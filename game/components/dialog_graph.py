@@ -0,0 +1,159 @@
+"""Compile dialog data into immutable graphs that NPCs can share."""
+
+from __future__ import annotations
+
+import functools
+import json
+import string
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, NamedTuple, Optional, Tuple, Union
+
+_FORMATTER = string.Formatter()
+
+# (literal_text, field_name, format_spec, conversion) as given by Formatter.parse.
+TemplatePart = Tuple[str, Optional[str], Optional[str], Optional[str]]
+
+
+class DialogTemplate(NamedTuple):
+    """A line of dialog with its placeholders parsed ahead of time."""
+
+    text: str
+    parts: Tuple[TemplatePart, ...]
+    # The finished text when there are no placeholders to fill in.
+    static_text: Optional[str]
+
+    @classmethod
+    def parse(cls, text: str) -> DialogTemplate:
+        parts = tuple(_FORMATTER.parse(text))
+        static_text = None
+        if all(field is None for _, field, _, _ in parts):
+            static_text = "".join(literal for literal, _, _, _ in parts)
+        return cls(text, parts, static_text)
+
+    def render(self, context: Mapping) -> str:
+        """Fill in the placeholders from `context`.
+
+        Placeholders missing from the context are left as-is.
+        """
+        if self.static_text is not None:
+            return self.static_text
+
+        pieces = []
+        for literal, field, spec, conversion in self.parts:
+            pieces.append(literal)
+            if field is None:
+                continue
+            try:
+                value, _ = _FORMATTER.get_field(field, (), context)
+            except (KeyError, IndexError, AttributeError):
+                pieces.append(_placeholder(field, spec, conversion))
+                continue
+            value = _FORMATTER.convert_field(value, conversion)
+            pieces.append(format(value, spec or ""))
+        return "".join(pieces)
+
+
+class DialogChoice(NamedTuple):
+    texts: Tuple[DialogTemplate, ...]
+    next: Optional[str]
+    action: Optional[str]
+
+
+class DialogNode(NamedTuple):
+    name: str
+    texts: Tuple[DialogTemplate, ...]
+    choices: Tuple[DialogChoice, ...]
+
+
+class DialogGraph:
+    """A validated, read-only dialog tree.
+
+    Graphs are shared between every Dialog that uses them, so copying one
+    (e.g. when an entity is spawned) returns the same graph.
+    """
+
+    def __init__(self, nodes: Dict[str, DialogNode], start: Optional[str]):
+        self._nodes = nodes
+        self.start = start
+
+    def __getitem__(self, name: str) -> DialogNode:
+        return self._nodes[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._nodes
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._nodes)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __copy__(self) -> DialogGraph:
+        return self
+
+    def __deepcopy__(self, memo: dict) -> DialogGraph:
+        return self
+
+
+def compile_dialog(dialog_data: Union[dict, DialogGraph]) -> DialogGraph:
+    """Return the graph for `dialog_data`, which is returned as is if compiled.
+
+    Dicts are compiled on every call, so dialog that many NPCs use should be
+    compiled once and the graph passed around instead.
+    """
+    if isinstance(dialog_data, DialogGraph):
+        return dialog_data
+    return _compile(dialog_data)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_dialog_file(path: str) -> DialogGraph:
+    with open(path, "r") as f:
+        return _compile(json.load(f))
+
+
+def load_dialog_file(dialog_file: Union[str, Path]) -> DialogGraph:
+    """Load and compile a JSON dialog file, reusing earlier loads of the same file."""
+    return _load_dialog_file(str(Path(dialog_file).resolve()))
+
+
+def _compile(dialog_data: dict) -> DialogGraph:
+    nodes = {}
+    for name, node in dialog_data.items():
+        choices = tuple(
+            DialogChoice(
+                texts=_templates(choice["text"], name),
+                next=choice.get("next"),
+                action=choice.get("action"),
+            )
+            for choice in node.get("choices", [])
+        )
+        nodes[name] = DialogNode(name, _templates(node["text"], name), choices)
+
+    for node in nodes.values():
+        for choice in node.choices:
+            if choice.next is not None and choice.next not in nodes:
+                raise ValueError(
+                    f"Dialog node {node.name!r} links to unknown node {choice.next!r}"
+                )
+
+    return DialogGraph(nodes, start=next(iter(nodes), None))
+
+
+def _templates(
+    text: Union[str, List[str]], node_name: str
+) -> Tuple[DialogTemplate, ...]:
+    # A single line may be written as a plain string instead of a list.
+    lines = [text] if isinstance(text, str) else list(text)
+    if not lines:
+        raise ValueError(f"Dialog node {node_name!r} has no text to choose from")
+    return tuple(DialogTemplate.parse(line) for line in lines)
+
+
+def _placeholder(field: str, spec: Optional[str], conversion: Optional[str]) -> str:
+    text = field
+    if conversion:
+        text += f"!{conversion}"
+    if spec:
+        text += f":{spec}"
+    return f"{{{text}}}"
@@ -0,0 +1,93 @@
+"""Compile tile_definitions into the packed tile table loaded by tile_types.
+
+    python -m game.entities.build_tile_table
+
+writes the table to TILE_TABLE_FOLDER and regenerates tile_ids.py.  The
+table's file name includes a digest of the source files of the definitions,
+which tile_types checks against both tile_ids.py and the table it loads, so a
+table or ids built from different definitions are never used by mistake.
+"""
+
+from pathlib import Path
+
+import numpy as np  # type: ignore
+
+from game.entities.tile_definitions import TILE_DEFINITIONS
+from game.entities.tile_format import definitions_digest, tile_dt
+from game.world.storage import TILE_TABLE_FOLDER
+
+TILE_IDS_PATH = Path(__file__).with_name("tile_ids.py")
+
+
+def table_path(digest: str) -> Path:
+    return TILE_TABLE_FOLDER / f"tile_table-{digest}.npy"
+
+
+def compile_table() -> np.ndarray:
+    """Return every tile definition packed into one array, indexed by id."""
+    return np.array(
+        [
+            (
+                tile.walkable,
+                tile.transparent,
+                tile.dark,
+                tile.light,
+                tile.name,
+                tile_id,
+                tile.flags,
+            )
+            for tile_id, tile in enumerate(TILE_DEFINITIONS)
+        ],
+        dtype=tile_dt,
+    )
+
+
+def save_table(table: np.ndarray, digest: str) -> Path:
+    path = table_path(digest)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.save(path, table)
+    return path
+
+
+def build_in_memory(digest: str) -> np.ndarray:
+    """Compile the table when no built one is found, saving it if possible."""
+    table = compile_table()
+    try:
+        save_table(table, digest)
+    except OSError:
+        pass  # Read-only installs just compile the table every time.
+    return table
+
+
+def ids_module_source(digest: str) -> str:
+    lines = [
+        '"""Tile ids, generated by build_tile_table from tile_definitions.',
+        "",
+        "Do not edit by hand.",
+        '"""',
+        "",
+        f'TABLE_DIGEST = "{digest}"',
+        f"TILE_COUNT = {len(TILE_DEFINITIONS)}",
+        "",
+    ]
+    lines += [
+        f"{tile.key.upper()} = {tile_id}"
+        for tile_id, tile in enumerate(TILE_DEFINITIONS)
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    keys = [tile.key for tile in TILE_DEFINITIONS]
+    duplicates = sorted({key for key in keys if keys.count(key) > 1})
+    if duplicates:
+        raise ValueError(f"Tile keys must be unique: {', '.join(duplicates)}")
+
+    digest = definitions_digest()
+    path = save_table(compile_table(), digest)
+    TILE_IDS_PATH.write_text(ids_module_source(digest), encoding="utf-8")
+    print(f"Wrote {len(keys)} tiles to {path} and {TILE_IDS_PATH.name}")
+
+
+if __name__ == "__main__":
+    main()
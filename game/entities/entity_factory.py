@@ -8,17 +8,21 @@ from game.components.fighter import Fighter
 from game.components.inventory import Inventory
 from game.components.experience import Experience
 from game.components.dialog import Dialog
+from game.components.dialog_graph import compile_dialog
 from game.components.information import Information
 
 from game.data.dialog_data.dialog_data import DEFAULT_NPC_DIALOG
 
+# Compiled once, and shared by every NPC spawned from these prototypes.
+DEFAULT_NPC_GRAPH = compile_dialog(DEFAULT_NPC_DIALOG)
+
 player = Actor(
     char="σ",
     color=(127, 255, 127),
     name="Player",
     ai_cls=ai.HostileEnemy,
     equipment=Equipment(),
-    dialog=Dialog(DEFAULT_NPC_DIALOG),
+    dialog=Dialog(DEFAULT_NPC_GRAPH),
     fighter=Fighter(hp=30, base_defense=2, base_power=5),
     inventory=Inventory(capacity=26),
     experience=Experience(level_up_base=200),
@@ -41,7 +45,7 @@ npc = Actor(
     name="NPC",
     ai_cls=ai.WandererAI,
     equipment=Equipment(),
-    dialog=Dialog(DEFAULT_NPC_DIALOG),
+    dialog=Dialog(DEFAULT_NPC_GRAPH),
     fighter=Fighter(hp=30, base_defense=5, base_power=5),
     inventory=Inventory(capacity=5),
     experience=Experience(xp_given=0),
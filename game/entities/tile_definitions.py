@@ -0,0 +1,427 @@
+"""The definition of every tile type.
+
+This is the source for the compiled tile table.  After changing it, run
+
+    python -m game.entities.build_tile_table
+
+to rebuild game/entities/tile_ids.py and the table that `tile_types` loads.
+Each tile's id is its position in TILE_DEFINITIONS.
+"""
+
+from typing import NamedTuple, Tuple
+
+import game.render.color as color
+from game.entities.tile_format import (
+    EMPTY,
+    FLAT_WALL,
+    JOINS_WALLS,
+    RESERVED,
+    ROAD,
+    TREE,
+    WALL,
+)
+
+
+class TileDefinition(NamedTuple):
+    """A tile type, named `key` in tile_types."""
+
+    key: str
+    walkable: bool  # True if this tile can be walked over.
+    transparent: bool  # True if this tile doesn't block FOV.
+    dark: Tuple[int, Tuple[int, int, int], Tuple[int, int, int]]  # Out of FOV.
+    light: Tuple[int, Tuple[int, int, int], Tuple[int, int, int]]  # In FOV.
+    name: str
+    flags: int = 0
+
+
+TILE_DEFINITIONS = [
+    TileDefinition(
+        "sink",
+        walkable=False,
+        transparent=True,
+        dark=(ord("Θ"), color.white, color.dark_floor),
+        light=(ord("Θ"), color.white, color.floor),
+        name="sink",
+    ),
+    TileDefinition(
+        "toilet",
+        walkable=True,
+        transparent=True,
+        dark=(ord("Ω"), color.white, color.dark_floor),
+        light=(ord("Ω"), color.white, color.floor),
+        name="sink",
+    ),
+    TileDefinition(
+        "underground",
+        walkable=False,
+        transparent=False,
+        dark=(ord(" "), color.black, color.black),
+        light=(ord(" "), color.black, color.black),
+        name="underground",
+    ),
+    TileDefinition(
+        "sky",
+        walkable=False,
+        transparent=True,
+        dark=(ord(" "), color.white, color.white),
+        light=(ord(" "), color.white, color.white),
+        name="sky",
+    ),
+    TileDefinition(
+        "tree",
+        walkable=False,
+        transparent=True,
+        dark=(ord("↨"), (0, 65, 0), color.dark_soil),
+        light=(ord("↨"), (0, 205, 0), color.soil),
+        name="trees",
+        flags=TREE,
+    ),
+    TileDefinition(
+        "tree_2",
+        walkable=False,
+        transparent=True,
+        dark=(ord("▬"), (0, 65, 0), color.dark_soil),
+        light=(ord("▬"), (0, 205, 0), color.soil),
+        name="trees",
+        flags=TREE,
+    ),
+    TileDefinition(
+        "green_tree",
+        walkable=False,
+        transparent=True,
+        dark=(ord("↨"), (0, 65, 0), color.dark_soil),
+        light=(ord("↨"), (0, 155, 0), color.soil),
+        name="trees",
+        flags=TREE,
+    ),
+    TileDefinition(
+        "green_tree_2",
+        walkable=False,
+        transparent=True,
+        dark=(ord("▬"), (0, 65, 0), color.dark_soil),
+        light=(ord("▬"), (0, 155, 0), color.soil),
+        name="trees",
+        flags=TREE,
+    ),
+    TileDefinition(
+        "dark_green_tree",
+        walkable=False,
+        transparent=True,
+        dark=(ord("↨"), (0, 65, 0), color.dark_soil),
+        light=(ord("↨"), (0, 105, 0), color.soil),
+        name="trees",
+        flags=TREE,
+    ),
+    TileDefinition(
+        "dark_green_tree_2",
+        walkable=False,
+        transparent=True,
+        dark=(ord("▬"), (0, 65, 0), color.dark_soil),
+        light=(ord("▬"), (0, 105, 0), color.soil),
+        name="trees",
+        flags=TREE,
+    ),
+    TileDefinition(
+        "grass",
+        walkable=True,
+        transparent=True,
+        dark=(ord(" "), (0, 135, 0), (0, 135, 0)),
+        light=(ord(" "), (0, 165, 0), (0, 165, 0)),
+        name="grass",
+    ),
+    TileDefinition(
+        "green_grass",
+        walkable=True,
+        transparent=True,
+        dark=(ord(" "), (0, 125, 0), (0, 125, 0)),
+        light=(ord(" "), (0, 155, 0), (0, 155, 0)),
+        name="grass",
+    ),
+    TileDefinition(
+        "dark_green_grass",
+        walkable=True,
+        transparent=True,
+        dark=(ord(" "), (0, 115, 0), (0, 115, 0)),
+        light=(ord(" "), (0, 145, 0), (0, 145, 0)),
+        name="grass",
+    ),
+    TileDefinition(
+        "chair_horiz",
+        walkable=True,
+        transparent=True,
+        dark=(ord("¥"), (225, 225, 225), color.dark_floor),
+        light=(ord("¥"), (255, 255, 255), color.floor),
+        name="chair",
+    ),
+    TileDefinition(
+        "table",
+        walkable=False,
+        transparent=True,
+        dark=(ord("₧"), (87, 66, 66), color.dark_floor),
+        light=(ord("₧"), (117, 96, 96), color.floor),
+        name="table",
+    ),
+    TileDefinition(
+        "up_stairs",
+        walkable=True,
+        transparent=True,
+        dark=(ord("τ"), (255, 255, 255), color.dark_floor),
+        light=(ord("τ"), (255, 255, 255), color.floor),
+        name="stairs",
+    ),
+    TileDefinition(
+        "down_stairs",
+        walkable=True,
+        transparent=True,
+        dark=(ord("Φ"), (255, 255, 255), color.dark_floor),
+        light=(ord("Φ"), (255, 255, 255), color.floor),
+        name="stairs",
+    ),
+    TileDefinition(
+        "floor_num_1",
+        walkable=True,
+        transparent=True,
+        dark=(ord("1"), (255, 255, 255), color.dark_floor),
+        light=(ord("1"), (255, 255, 255), color.floor),
+        name="number 1",
+    ),
+    TileDefinition(
+        "road",
+        walkable=True,
+        transparent=True,
+        dark=(ord(" "), (225, 225, 255), color.dark_asphalt),
+        light=(ord(" "), (255, 255, 255), (70, 70, 70)),
+        name="road",
+        flags=ROAD,
+    ),
+    TileDefinition(
+        "road_divider_horiz",
+        walkable=True,
+        transparent=True,
+        dark=(ord("═"), (225, 225, 0), color.dark_asphalt),
+        light=(ord("═"), (255, 255, 0), color.asphalt),
+        name="road",
+        flags=ROAD,
+    ),
+    TileDefinition(
+        "road_divider_vert",
+        walkable=True,
+        transparent=True,
+        dark=(ord("║"), (225, 225, 0), color.dark_asphalt),
+        light=(ord("║"), (255, 255, 0), color.asphalt),
+        name="road",
+        flags=ROAD,
+    ),
+    TileDefinition(
+        "road_divider_intersection",
+        walkable=True,
+        transparent=True,
+        dark=(ord("╬"), (225, 225, 0), color.dark_asphalt),
+        light=(ord("╬"), (255, 255, 0), color.asphalt),
+        name="road",
+        flags=ROAD,
+    ),
+    TileDefinition(
+        "stop_line_vert",
+        walkable=True,
+        transparent=True,
+        dark=(ord("▐"), (225, 225, 225), color.dark_asphalt),
+        light=(ord("▐"), (255, 255, 255), color.asphalt),
+        name="road",
+    ),
+    TileDefinition(
+        "stop_line_horiz",
+        walkable=True,
+        transparent=True,
+        dark=(ord("_"), (255, 255, 255), color.dark_asphalt),
+        light=(ord("_"), (255, 255, 255), color.asphalt),
+        name="road",
+    ),
+    TileDefinition(
+        "cement",
+        walkable=True,
+        transparent=True,
+        dark=(ord(" "), (225, 225, 225), color.dark_cement),
+        light=(ord(" "), (255, 255, 255), color.cement),
+        name="cement",
+        flags=EMPTY,
+    ),
+    TileDefinition(
+        "floor",
+        walkable=True,
+        transparent=True,
+        dark=(ord(" "), (225, 225, 225), color.dark_floor),
+        light=(ord(" "), (255, 255, 255), color.floor),
+        name="floor",
+        flags=EMPTY,
+    ),
+    TileDefinition(
+        "reserved_floor",
+        walkable=True,
+        transparent=True,
+        dark=(ord(" "), (225, 225, 225), (100, 99, 100)),
+        light=(ord(" "), (255, 255, 255), color.floor),
+        name="floor",
+        flags=RESERVED,
+    ),
+    TileDefinition(
+        "reserved_cement",
+        walkable=True,
+        transparent=True,
+        dark=(ord(" "), (225, 225, 225), (70, 69, 70)),
+        light=(ord(" "), (255, 255, 255), color.cement),
+        name="floor",
+        flags=RESERVED,
+    ),
+    TileDefinition(
+        "wall",
+        walkable=False,
+        transparent=False,
+        dark=(ord("█"), (225, 225, 225), (30, 30, 30)),
+        light=(ord("█"), (255, 255, 255), (50, 50, 150)),
+        name="wall",
+        flags=WALL | JOINS_WALLS,
+    ),
+    TileDefinition(
+        "vertical_wall",
+        walkable=False,
+        transparent=False,
+        dark=(ord("║"), color.dark_wall, (70, 70, 70)),
+        light=(ord("║"), color.wall, (100, 100, 100)),
+        name="wall",
+        flags=WALL | FLAT_WALL | JOINS_WALLS,
+    ),
+    TileDefinition(
+        "vertical_window",
+        walkable=False,
+        transparent=True,
+        dark=(ord("│"), color.dark_wall, (70, 70, 70)),
+        light=(ord("│"), color.wall, (100, 100, 100)),
+        name="window",
+        flags=JOINS_WALLS,
+    ),
+    TileDefinition(
+        "horizontal_wall",
+        walkable=False,
+        transparent=False,
+        dark=(ord("═"), color.dark_wall, (70, 70, 70)),
+        light=(ord("═"), color.wall, (100, 100, 100)),
+        name="wall",
+        flags=WALL | FLAT_WALL | JOINS_WALLS,
+    ),
+    TileDefinition(
+        "horizontal_window",
+        walkable=False,
+        transparent=True,
+        dark=(ord("─"), color.dark_wall, (70, 70, 70)),
+        light=(ord("─"), color.wall, (100, 100, 100)),
+        name="window",
+        flags=JOINS_WALLS,
+    ),
+    TileDefinition(
+        "cross_wall",
+        walkable=False,
+        transparent=False,
+        dark=(ord("╬"), color.dark_wall, (70, 70, 70)),
+        light=(ord("╬"), color.wall, (100, 100, 100)),
+        name="wall",
+        flags=WALL | JOINS_WALLS,
+    ),
+    TileDefinition(
+        "left_t_wall",
+        walkable=False,
+        transparent=False,
+        dark=(ord("╣"), color.dark_wall, (70, 70, 70)),
+        light=(ord("╣"), color.wall, (100, 100, 100)),
+        name="wall",
+        flags=WALL | JOINS_WALLS,
+    ),
+    TileDefinition(
+        "right_t_wall",
+        walkable=False,
+        transparent=False,
+        dark=(ord("╠"), color.dark_wall, (70, 70, 70)),
+        light=(ord("╠"), color.wall, (100, 100, 100)),
+        name="wall",
+        flags=WALL | JOINS_WALLS,
+    ),
+    TileDefinition(
+        "up_t_wall",
+        walkable=False,
+        transparent=False,
+        dark=(ord("╩"), color.dark_wall, (70, 70, 70)),
+        light=(ord("╩"), color.wall, (100, 100, 100)),
+        name="wall",
+        flags=WALL | JOINS_WALLS,
+    ),
+    TileDefinition(
+        "down_t_wall",
+        walkable=False,
+        transparent=False,
+        dark=(ord("╦"), color.dark_wall, (70, 70, 70)),
+        light=(ord("╦"), color.wall, (100, 100, 100)),
+        name="wall",
+        flags=WALL | JOINS_WALLS,
+    ),
+    TileDefinition(
+        "top_left_corner_wall",
+        walkable=False,
+        transparent=False,
+        dark=(ord("╔"), color.dark_wall, (70, 70, 70)),
+        light=(ord("╔"), color.wall, (100, 100, 100)),
+        name="wall",
+        flags=WALL | JOINS_WALLS,
+    ),
+    TileDefinition(
+        "bottom_left_corner_wall",
+        walkable=False,
+        transparent=False,
+        dark=(ord("╚"), color.dark_wall, (70, 70, 70)),
+        light=(ord("╚"), color.wall, (100, 100, 100)),
+        name="wall",
+        flags=WALL | JOINS_WALLS,
+    ),
+    TileDefinition(
+        "top_right_corner_wall",
+        walkable=False,
+        transparent=False,
+        dark=(ord("╗"), color.dark_wall, (70, 70, 70)),
+        light=(ord("╗"), color.wall, (100, 100, 100)),
+        name="wall",
+        flags=WALL | JOINS_WALLS,
+    ),
+    TileDefinition(
+        "bottom_right_corner_wall",
+        walkable=False,
+        transparent=False,
+        dark=(ord("╝"), color.dark_wall, (70, 70, 70)),
+        light=(ord("╝"), color.wall, (100, 100, 100)),
+        name="wall",
+        flags=WALL | JOINS_WALLS,
+    ),
+    TileDefinition(
+        "door",
+        walkable=True,
+        transparent=False,
+        dark=(ord("+"), color.dark_wall, (70, 70, 70)),
+        light=(ord("+"), color.wall, (100, 100, 100)),
+        name="door",
+        flags=JOINS_WALLS,
+    ),
+    TileDefinition(
+        "bookcase_full",
+        walkable=False,
+        transparent=False,
+        dark=(ord("π"), color.wall, (70, 70, 70)),
+        light=(ord("π"), (139, 115, 85), (100, 100, 100)),
+        name="bookcase",
+    ),
+    TileDefinition(
+        "bookcase_empty",
+        walkable=False,
+        transparent=False,
+        dark=(ord("Σ"), color.wall, (70, 70, 70)),
+        light=(ord("Σ"), (139, 115, 85), (100, 100, 100)),
+        name="bookcase",
+    ),
+]
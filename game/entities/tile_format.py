@@ -0,0 +1,57 @@
+"""The layout of a tile, shared by the tile definitions and the compiled table.
+
+Kept apart from tile_definitions so that loading the compiled table doesn't
+need the definitions themselves.
+"""
+
+import hashlib
+from pathlib import Path
+
+import numpy as np  # type: ignore
+
+# Tile graphics structured type compatible with Console.tiles_rgb.
+graphic_dt = np.dtype(
+    [
+        ("ch", np.int32),  # Unicode codepoint.
+        ("fg", "3B"),  # 3 unsigned bytes, for RGB colors.
+        ("bg", "3B"),
+    ]
+)
+
+# Tile struct used for statically defined tile data.
+tile_dt = np.dtype(
+    [
+        ("walkable", np.bool_),  # True if this tile can be walked over.
+        ("transparent", np.bool_),  # True if this tile doesn't block FOV.
+        ("dark", graphic_dt),  # Graphics for when this tile is not in FOV.
+        ("light", graphic_dt),  # Graphics for when this tile is in FOV.
+        ("name", "U20"),  # Name shown when looking at this tile.
+        ("id", np.uint16),  # Position in TILE_DEFINITIONS, see tile_ids.
+        ("flags", np.uint16),  # Category flags.
+    ]
+)
+
+# Category flags, tested with a bitwise and on a tile's "flags" field.
+WALL = 1 << 0  # Any wall glyph.
+FLAT_WALL = 1 << 1  # Straight walls that a window or door can replace.
+JOINS_WALLS = 1 << 2  # Walls autotile to connect to these.
+EMPTY = 1 << 3  # Open ground that structures and entities can be placed on.
+RESERVED = 1 << 4  # Kept clear, such as the floor just outside a door.
+ROAD = 1 << 5
+TREE = 1 << 6
+
+# The files the tile table is compiled from.
+SOURCE_FILES = ("tile_definitions.py", "tile_format.py")
+
+
+def definitions_digest() -> str:
+    """Hash the files the tile table is compiled from, without importing them.
+
+    Any edit to them, even one that doesn't change a tile, makes a new digest.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    for name in SOURCE_FILES:
+        source = Path(__file__).with_name(name).read_bytes()
+        # Checkouts with Windows line endings get the same digest.
+        digest.update(source.replace(b"\r\n", b"\n"))
+    return digest.hexdigest()
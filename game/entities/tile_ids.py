@@ -0,0 +1,53 @@
+"""Tile ids, generated by build_tile_table from tile_definitions.
+
+Do not edit by hand.
+"""
+
+TABLE_DIGEST = "9806922873942231"
+TILE_COUNT = 45
+
+SINK = 0
+TOILET = 1
+UNDERGROUND = 2
+SKY = 3
+TREE = 4
+TREE_2 = 5
+GREEN_TREE = 6
+GREEN_TREE_2 = 7
+DARK_GREEN_TREE = 8
+DARK_GREEN_TREE_2 = 9
+GRASS = 10
+GREEN_GRASS = 11
+DARK_GREEN_GRASS = 12
+CHAIR_HORIZ = 13
+TABLE = 14
+UP_STAIRS = 15
+DOWN_STAIRS = 16
+FLOOR_NUM_1 = 17
+ROAD = 18
+ROAD_DIVIDER_HORIZ = 19
+ROAD_DIVIDER_VERT = 20
+ROAD_DIVIDER_INTERSECTION = 21
+STOP_LINE_VERT = 22
+STOP_LINE_HORIZ = 23
+CEMENT = 24
+FLOOR = 25
+RESERVED_FLOOR = 26
+RESERVED_CEMENT = 27
+WALL = 28
+VERTICAL_WALL = 29
+VERTICAL_WINDOW = 30
+HORIZONTAL_WALL = 31
+HORIZONTAL_WINDOW = 32
+CROSS_WALL = 33
+LEFT_T_WALL = 34
+RIGHT_T_WALL = 35
+UP_T_WALL = 36
+DOWN_T_WALL = 37
+TOP_LEFT_CORNER_WALL = 38
+BOTTOM_LEFT_CORNER_WALL = 39
+TOP_RIGHT_CORNER_WALL = 40
+BOTTOM_RIGHT_CORNER_WALL = 41
+DOOR = 42
+BOOKCASE_FULL = 43
+BOOKCASE_EMPTY = 44
@@ -1,377 +1,103 @@
-from typing import Tuple
+"""Every tile type, loaded from the compiled tile table.
+
+Tiles are defined in tile_definitions and compiled into one packed table by
+build_tile_table, which is memory-mapped here.  Each tile carries its id (see
+tile_ids) and category flags, so checking which tiles of a map are in a
+category is a bitwise test with `in_category` instead of comparing against
+every tile in a list.
+"""
 
-import game.render.color as color
 import numpy as np  # type: ignore
 
-# Tile graphics structured type compatible with Console.tiles_rgb.
-graphic_dt = np.dtype(
-    [
-        ("ch", np.int32),  # Unicode codepoint.
-        ("fg", "3B"),  # 3 unsigned bytes, for RGB colors.
-        ("bg", "3B"),
-    ]
+from game.entities import tile_ids
+from game.entities.tile_format import (  # noqa: F401
+    EMPTY,
+    FLAT_WALL,
+    JOINS_WALLS,
+    RESERVED,
+    ROAD,
+    TREE,
+    WALL,
+    definitions_digest,
+    graphic_dt,
+    tile_dt,
 )
+from game.world.storage import TILE_TABLE_FOLDER
 
-# Tile struct used for statically defined tile data.
-tile_dt = np.dtype(
-    [
-        ("walkable", np.bool_),  # True if this tile can be walked over.
-        ("transparent", np.bool_),  # True if this tile doesn't block FOV.
-        ("dark", graphic_dt),  # Graphics for when this tile is not in FOV.
-        ("light", graphic_dt),  # Graphics for when this tile is in FOV.
-        ("name", "U20"),  # Graphics for when this tile is in FOV.
-    ]
-)
 
+def _load_table() -> np.ndarray:
+    """Load the table built from the current definitions, building it if needed."""
+    digest = definitions_digest()
+    if digest != tile_ids.TABLE_DIGEST:
+        raise RuntimeError(
+            "tile_ids.py is out of date with tile_definitions.py, "
+            "run `python -m game.entities.build_tile_table`."
+        )
+    try:
+        return np.load(TILE_TABLE_FOLDER / f"tile_table-{digest}.npy", mmap_mode="r")
+    except (OSError, ValueError):
+        from game.entities.build_tile_table import build_in_memory
 
-def new_tile(
-    *,  # Enforce the use of keywords, so that parameter order doesn't matter.
-    walkable: int,
-    transparent: int,
-    dark: Tuple[int, Tuple[int, int, int], Tuple[int, int, int]],
-    light: Tuple[int, Tuple[int, int, int], Tuple[int, int, int]],
-    name: str,
-) -> np.ndarray:
-    """Helper function for defining individual tile types"""
-    return np.array((walkable, transparent, dark, light, name), dtype=tile_dt)
+        return build_in_memory(digest)
 
 
-SHROUD = np.array((ord(" "), (255, 255, 255), (20, 20, 20)), dtype=graphic_dt)
+# Every tile, indexed by id.
+TILES = _load_table()
 
 
-sink = new_tile(
-    walkable=False,
-    transparent=True,
-    dark=(ord("Θ"), color.white, color.dark_floor),
-    light=(ord("Θ"), color.white, color.floor),
-    name="sink",
-)
-toilet = new_tile(
-    walkable=True,
-    transparent=True,
-    dark=(ord("Ω"), color.white, color.dark_floor),
-    light=(ord("Ω"), color.white, color.floor),
-    name="sink",
-)
-underground = new_tile(
-    walkable=False,
-    transparent=False,
-    dark=(ord(" "), color.black, color.black),
-    light=(ord(" "), color.black, color.black),
-    name="underground",
-)
-underground = new_tile(
-    walkable=False,
-    transparent=False,
-    dark=(ord(" "), color.black, color.black),
-    light=(ord(" "), color.black, color.black),
-    name="underground",
-)
-sky = new_tile(
-    walkable=False,
-    transparent=True,
-    dark=(ord(" "), color.white, color.white),
-    light=(ord(" "), color.white, color.white),
-    name="sky",
-)
-tree = new_tile(
-    walkable=False,
-    transparent=True,
-    dark=(ord("↨"), (0, 65, 0), color.dark_soil),
-    light=(ord("↨"), (0, 205, 0), color.soil),
-    name="trees",
-)
-tree_2 = new_tile(
-    walkable=False,
-    transparent=True,
-    dark=(ord("▬"), (0, 65, 0), color.dark_soil),
-    light=(ord("▬"), (0, 205, 0), color.soil),
-    name="trees",
-)
-green_tree = new_tile(
-    walkable=False,
-    transparent=True,
-    dark=(ord("↨"), (0, 65, 0), color.dark_soil),
-    light=(ord("↨"), (0, 155, 0), color.soil),
-    name="trees",
-)
-green_tree_2 = new_tile(
-    walkable=False,
-    transparent=True,
-    dark=(ord("▬"), (0, 65, 0), color.dark_soil),
-    light=(ord("▬"), (0, 155, 0), color.soil),
-    name="trees",
-)
-dark_green_tree = new_tile(
-    walkable=False,
-    transparent=True,
-    dark=(ord("↨"), (0, 65, 0), color.dark_soil),
-    light=(ord("↨"), (0, 105, 0), color.soil),
-    name="trees",
-)
-dark_green_tree_2 = new_tile(
-    walkable=False,
-    transparent=True,
-    dark=(ord("▬"), (0, 65, 0), color.dark_soil),
-    light=(ord("▬"), (0, 105, 0), color.soil),
-    name="trees",
-)
-grass = new_tile(
-    walkable=True,
-    transparent=True,
-    dark=(ord(" "), (0, 135, 0), (0, 135, 0)),
-    light=(ord(" "), (0, 165, 0), (0, 165, 0)),
-    name="grass",
-)
-green_grass = new_tile(
-    walkable=True,
-    transparent=True,
-    dark=(ord(" "), (0, 125, 0), (0, 125, 0)),
-    light=(ord(" "), (0, 155, 0), (0, 155, 0)),
-    name="grass",
-)
-dark_green_grass = new_tile(
-    walkable=True,
-    transparent=True,
-    dark=(ord(" "), (0, 115, 0), (0, 115, 0)),
-    light=(ord(" "), (0, 145, 0), (0, 145, 0)),
-    name="grass",
-)
-
-
-chair_horiz = new_tile(
-    walkable=True,
-    transparent=True,
-    dark=(ord("¥"), (225, 225, 225), color.dark_floor),
-    light=(ord("¥"), (255, 255, 255), color.floor),
-    name="chair",
-)
-table = new_tile(
-    walkable=False,
-    transparent=True,
-    dark=(ord("₧"), (87, 66, 66), color.dark_floor),
-    light=(ord("₧"), (117, 96, 96), color.floor),
-    name="table",
-)
-
-up_stairs = new_tile(
-    walkable=True,
-    transparent=True,
-    dark=(ord("τ"), (255, 255, 255), color.dark_floor),
-    light=(ord("τ"), (255, 255, 255), color.floor),
-    name="stairs",
-)
-down_stairs = new_tile(
-    walkable=True,
-    transparent=True,
-    dark=(ord("Φ"), (255, 255, 255), color.dark_floor),
-    light=(ord("Φ"), (255, 255, 255), color.floor),
-    name="stairs",
-)
-floor_num_1 = new_tile(
-    walkable=True,
-    transparent=True,
-    dark=(ord("1"), (255, 255, 255), color.dark_floor),
-    light=(ord("1"), (255, 255, 255), color.floor),
-    name="number 1",
-)
+def in_category(tiles, category: int):
+    """Return whether each of `tiles` has any of the `category` flags."""
+    return (tiles["flags"] & category) != 0
 
 
-road = new_tile(
-    walkable=True,
-    transparent=True,
-    dark=(ord(" "), (225, 225, 255), color.dark_asphalt),
-    light=(ord(" "), (255, 255, 255), (70, 70, 70)),
-    name="road",
-)
-
-road_divider_horiz = new_tile(
-    walkable=True,
-    transparent=True,
-    dark=(ord("═"), (225, 225, 0), color.dark_asphalt),
-    light=(ord("═"), (255, 255, 0), color.asphalt),
-    name="road",
-)
-road_divider_vert = new_tile(
-    walkable=True,
-    transparent=True,
-    dark=(ord("║"), (225, 225, 0), color.dark_asphalt),
-    light=(ord("║"), (255, 255, 0), color.asphalt),
-    name="road",
-)
-road_divider_intersection = new_tile(
-    walkable=True,
-    transparent=True,
-    dark=(ord("╬"), (225, 225, 0), color.dark_asphalt),
-    light=(ord("╬"), (255, 255, 0), color.asphalt),
-    name="road",
-)
-stop_line_vert = new_tile(
-    walkable=True,
-    transparent=True,
-    dark=(ord("▐"), (225, 225, 225), color.dark_asphalt),
-    light=(ord("▐"), (255, 255, 255), color.asphalt),
-    name="road",
-)
-stop_line_horiz = new_tile(
-    walkable=True,
-    transparent=True,
-    dark=(ord("_"), (255, 255, 255), color.dark_asphalt),
-    light=(ord("_"), (255, 255, 255), color.asphalt),
-    name="road",
-)
-cement = new_tile(
-    walkable=True,
-    transparent=True,
-    dark=(ord(" "), (225, 225, 225), color.dark_cement),
-    light=(ord(" "), (255, 255, 255), color.cement),
-    name="cement",
-)
-floor = new_tile(
-    walkable=True,
-    transparent=True,
-    dark=(ord(" "), (225, 225, 225), color.dark_floor),
-    light=(ord(" "), (255, 255, 255), color.floor),
-    name="floor",
-)
-reserved_floor = new_tile(
-    walkable=True,
-    transparent=True,
-    dark=(ord(" "), (225, 225, 225), (100, 99, 100)),
-    light=(ord(" "), (255, 255, 255), color.floor),
-    name="floor",
-)
-reserved_cement = new_tile(
-    walkable=True,
-    transparent=True,
-    dark=(ord(" "), (225, 225, 225), (70, 69, 70)),
-    light=(ord(" "), (255, 255, 255), color.cement),
-    name="floor",
-)
-wall = new_tile(
-    walkable=False,
-    transparent=False,
-    dark=(ord("█"), (225, 225, 225), (30, 30, 30)),
-    light=(ord("█"), (255, 255, 255), (50, 50, 150)),
-    name="wall",
-)
-vertical_wall = new_tile(
-    walkable=False,
-    transparent=False,
-    dark=(ord("║"), color.dark_wall, (70, 70, 70)),
-    light=(ord("║"), color.wall, (100, 100, 100)),
-    name="wall",
-)
-vertical_window = new_tile(
-    walkable=False,
-    transparent=True,
-    dark=(ord("│"), color.dark_wall, (70, 70, 70)),
-    light=(ord("│"), color.wall, (100, 100, 100)),
-    name="window",
-)
-
-horizontal_wall = new_tile(
-    walkable=False,
-    transparent=False,
-    dark=(ord("═"), color.dark_wall, (70, 70, 70)),
-    light=(ord("═"), color.wall, (100, 100, 100)),
-    name="wall",
-)
-horizontal_window = new_tile(
-    walkable=False,
-    transparent=True,
-    dark=(ord("─"), color.dark_wall, (70, 70, 70)),
-    light=(ord("─"), color.wall, (100, 100, 100)),
-    name="window",
-)
-
-cross_wall = new_tile(
-    walkable=False,
-    transparent=False,
-    dark=(ord("╬"), color.dark_wall, (70, 70, 70)),
-    light=(ord("╬"), color.wall, (100, 100, 100)),
-    name="wall",
-)
-left_t_wall = new_tile(
-    walkable=False,
-    transparent=False,
-    dark=(ord("╣"), color.dark_wall, (70, 70, 70)),
-    light=(ord("╣"), color.wall, (100, 100, 100)),
-    name="wall",
-)
-right_t_wall = new_tile(
-    walkable=False,
-    transparent=False,
-    dark=(ord("╠"), color.dark_wall, (70, 70, 70)),
-    light=(ord("╠"), color.wall, (100, 100, 100)),
-    name="wall",
-)
-up_t_wall = new_tile(
-    walkable=False,
-    transparent=False,
-    dark=(ord("╩"), color.dark_wall, (70, 70, 70)),
-    light=(ord("╩"), color.wall, (100, 100, 100)),
-    name="wall",
-)
-down_t_wall = new_tile(
-    walkable=False,
-    transparent=False,
-    dark=(ord("╦"), color.dark_wall, (70, 70, 70)),
-    light=(ord("╦"), color.wall, (100, 100, 100)),
-    name="wall",
-)
-top_left_corner_wall = new_tile(
-    walkable=False,
-    transparent=False,
-    dark=(ord("╔"), color.dark_wall, (70, 70, 70)),
-    light=(ord("╔"), color.wall, (100, 100, 100)),
-    name="wall",
-)
-bottom_left_corner_wall = new_tile(
-    walkable=False,
-    transparent=False,
-    dark=(ord("╚"), color.dark_wall, (70, 70, 70)),
-    light=(ord("╚"), color.wall, (100, 100, 100)),
-    name="wall",
-)
-top_right_corner_wall = new_tile(
-    walkable=False,
-    transparent=False,
-    dark=(ord("╗"), color.dark_wall, (70, 70, 70)),
-    light=(ord("╗"), color.wall, (100, 100, 100)),
-    name="wall",
-)
-bottom_right_corner_wall = new_tile(
-    walkable=False,
-    transparent=False,
-    dark=(ord("╝"), color.dark_wall, (70, 70, 70)),
-    light=(ord("╝"), color.wall, (100, 100, 100)),
-    name="wall",
-)
-
+SHROUD = np.array((ord(" "), (255, 255, 255), (20, 20, 20)), dtype=graphic_dt)
 
-door = new_tile(
-    walkable=True,
-    transparent=False,
-    dark=(ord("+"), color.dark_wall, (70, 70, 70)),
-    light=(ord("+"), color.wall, (100, 100, 100)),
-    name="door",
-)
 
-bookcase_full = new_tile(
-    walkable=False,
-    transparent=False,
-    dark=(ord("π"), color.wall, (70, 70, 70)),
-    light=(ord("π"), (139, 115, 85), (100, 100, 100)),
-    name="bookcase",
-)
-bookcase_empty = new_tile(
-    walkable=False,
-    transparent=False,
-    dark=(ord("Σ"), color.wall, (70, 70, 70)),
-    light=(ord("Σ"), (139, 115, 85), (100, 100, 100)),
-    name="bookcase",
-)
+sink = TILES[tile_ids.SINK]
+toilet = TILES[tile_ids.TOILET]
+underground = TILES[tile_ids.UNDERGROUND]
+sky = TILES[tile_ids.SKY]
+tree = TILES[tile_ids.TREE]
+tree_2 = TILES[tile_ids.TREE_2]
+green_tree = TILES[tile_ids.GREEN_TREE]
+green_tree_2 = TILES[tile_ids.GREEN_TREE_2]
+dark_green_tree = TILES[tile_ids.DARK_GREEN_TREE]
+dark_green_tree_2 = TILES[tile_ids.DARK_GREEN_TREE_2]
+grass = TILES[tile_ids.GRASS]
+green_grass = TILES[tile_ids.GREEN_GRASS]
+dark_green_grass = TILES[tile_ids.DARK_GREEN_GRASS]
+chair_horiz = TILES[tile_ids.CHAIR_HORIZ]
+table = TILES[tile_ids.TABLE]
+up_stairs = TILES[tile_ids.UP_STAIRS]
+down_stairs = TILES[tile_ids.DOWN_STAIRS]
+floor_num_1 = TILES[tile_ids.FLOOR_NUM_1]
+road = TILES[tile_ids.ROAD]
+road_divider_horiz = TILES[tile_ids.ROAD_DIVIDER_HORIZ]
+road_divider_vert = TILES[tile_ids.ROAD_DIVIDER_VERT]
+road_divider_intersection = TILES[tile_ids.ROAD_DIVIDER_INTERSECTION]
+stop_line_vert = TILES[tile_ids.STOP_LINE_VERT]
+stop_line_horiz = TILES[tile_ids.STOP_LINE_HORIZ]
+cement = TILES[tile_ids.CEMENT]
+floor = TILES[tile_ids.FLOOR]
+reserved_floor = TILES[tile_ids.RESERVED_FLOOR]
+reserved_cement = TILES[tile_ids.RESERVED_CEMENT]
+wall = TILES[tile_ids.WALL]
+vertical_wall = TILES[tile_ids.VERTICAL_WALL]
+vertical_window = TILES[tile_ids.VERTICAL_WINDOW]
+horizontal_wall = TILES[tile_ids.HORIZONTAL_WALL]
+horizontal_window = TILES[tile_ids.HORIZONTAL_WINDOW]
+cross_wall = TILES[tile_ids.CROSS_WALL]
+left_t_wall = TILES[tile_ids.LEFT_T_WALL]
+right_t_wall = TILES[tile_ids.RIGHT_T_WALL]
+up_t_wall = TILES[tile_ids.UP_T_WALL]
+down_t_wall = TILES[tile_ids.DOWN_T_WALL]
+top_left_corner_wall = TILES[tile_ids.TOP_LEFT_CORNER_WALL]
+bottom_left_corner_wall = TILES[tile_ids.BOTTOM_LEFT_CORNER_WALL]
+top_right_corner_wall = TILES[tile_ids.TOP_RIGHT_CORNER_WALL]
+bottom_right_corner_wall = TILES[tile_ids.BOTTOM_RIGHT_CORNER_WALL]
+door = TILES[tile_ids.DOOR]
+bookcase_full = TILES[tile_ids.BOOKCASE_FULL]
+bookcase_empty = TILES[tile_ids.BOOKCASE_EMPTY]
 
 BOOKCASE_TILES = [bookcase_empty, bookcase_full]
 
@@ -392,7 +118,7 @@ GRASS_TILES = [
 
 EMPTY_TILES = [cement, floor, None]
 
-RESERVED_TILES = [reserved_cement, reserved_cement]
+RESERVED_TILES = [reserved_floor, reserved_cement]
 
 ROAD_TILES = [road, road_divider_intersection, road_divider_horiz, road_divider_vert]
 
@@ -414,3 +140,26 @@ FLAT_WALL_TILES = [
 ]
 
 WALL_TILES = INTERSECTION_WALL_TILES + FLAT_WALL_TILES
+
+# Wall glyph for each neighbour mask, where a wall adds 1 if it continues north,
+# 2 if east, 4 if south and 8 if west.
+WALL_AUTOTILE = TILES[
+    [
+        tile_ids.WALL,  # isolated
+        tile_ids.VERTICAL_WALL,  # N
+        tile_ids.HORIZONTAL_WALL,  # E
+        tile_ids.BOTTOM_LEFT_CORNER_WALL,  # N E
+        tile_ids.VERTICAL_WALL,  # S
+        tile_ids.VERTICAL_WALL,  # N S
+        tile_ids.TOP_LEFT_CORNER_WALL,  # E S
+        tile_ids.RIGHT_T_WALL,  # N E S
+        tile_ids.HORIZONTAL_WALL,  # W
+        tile_ids.BOTTOM_RIGHT_CORNER_WALL,  # N W
+        tile_ids.HORIZONTAL_WALL,  # E W
+        tile_ids.UP_T_WALL,  # N E W
+        tile_ids.TOP_RIGHT_CORNER_WALL,  # S W
+        tile_ids.LEFT_T_WALL,  # N S W
+        tile_ids.DOWN_T_WALL,  # E S W
+        tile_ids.CROSS_WALL,  # N E S W
+    ]
+]
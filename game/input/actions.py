@@ -3,6 +3,7 @@ from __future__ import annotations
 # import dialog_data.dialog_data as dialog_data
 import game.render.color as color
 import game.utils.exceptions as exceptions
+from game.utils.profiling import profiled_perform
 
 from typing import Optional, Tuple, TYPE_CHECKING
 
@@ -13,6 +14,14 @@ if TYPE_CHECKING:
 
 
 class Action:
+    # Timings of each subclass's perform are grouped under this category.
+    profile_category = "action"
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        if "perform" in cls.__dict__:
+            cls.perform = profiled_perform(cls.perform)
+
     def __init__(self, entity: Actor) -> None:
         super().__init__()
         self.entity = entity
@@ -75,28 +84,23 @@ class TakeStairsAction(Action):
         """
         Take stairs up or down, if any possible at the entity's location.
         """
-        if (
-            self.engine.game_map.current_level,
-            (self.entity.x, self.entity.y),
-        ) in self.engine.game_map.stair_locations["UP"]:
-            self.engine.game_map.current_level += 1
+        game_map = self.engine.game_map
+        location = (self.entity.level, (self.entity.x, self.entity.y))
+        if location in game_map.stair_locations["UP"]:
             self.entity.level += 1
-        elif (
-            self.engine.game_map.current_level,
-            (self.entity.x, self.entity.y),
-        ) in self.engine.game_map.stair_locations["DOWN"]:
-            self.engine.game_map.current_level -= 1
+        elif location in game_map.stair_locations["DOWN"]:
             self.entity.level -= 1
 
         else:
             raise exceptions.Impossible("There are no stairs here.")
 
-        if (
-            self.engine.game_map.current_level < 0
-            or self.engine.game_map.current_level > self.engine.game_map.max_levels
-        ):
-            self.engine.game_map.current_level = 1
+        out_of_bounds = not 0 <= self.entity.level < game_map.max_levels
+        if out_of_bounds:
             self.entity.level = 1
+        # Only the player's stairs change the level being shown.
+        if self.entity is self.engine.player:
+            game_map.current_level = self.entity.level
+        if out_of_bounds:
             raise exceptions.Impossible("You've gone out of bounds")
 
 
@@ -203,7 +207,7 @@ class ActionWithDirection(Action):
 class MovementAction(ActionWithDirection):
     def perform(self) -> None:
         dest_x, dest_y = self.dest_xy
-        floor = self.engine.game_map.current_level
+        floor = self.level
 
         if not self.engine.game_map.in_bounds(dest_x, dest_y):
             if (
@@ -213,7 +217,7 @@ class MovementAction(ActionWithDirection):
                 # Destination is out of bounds.
                 raise exceptions.Impossible("That way is blocked.")
             return LeaveMapAction(self.entity).perform()
-        if not self.engine.game_map.tiles[floor]["walkable"][dest_x, dest_y]:
+        if not self.engine.game_map.tiles[floor][dest_x, dest_y]["walkable"]:
             # Destination is blocked by a tile.
             raise exceptions.Impossible("That way is blocked.")
         if self.engine.game_map.get_blocking_entity_at_location(dest_x, dest_y, floor):
@@ -0,0 +1,30 @@
+"""The event handler every screen builds on.
+
+It lives apart from input_handlers, so the main menu can be shown without
+importing the actions and the rest of the game's screens.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, TYPE_CHECKING
+
+import tcod.event
+
+if TYPE_CHECKING:
+    from game.input.input_handlers import ActionOrHandler
+
+
+class BaseEventHandler(tcod.event.EventDispatch["ActionOrHandler"]):
+    def handle_events(self, event: tcod.event.Event) -> BaseEventHandler:
+        """Handle an event and return the next active event handler."""
+        state = self.dispatch(event)
+        if isinstance(state, BaseEventHandler):
+            return state
+        assert state is None, f"{self!r} can not handle actions."
+        return self
+
+    def on_render(self, console: tcod.Console) -> None:
+        raise NotImplementedError()
+
+    def ev_quit(self, event: tcod.event.Quit) -> Optional[ActionOrHandler]:
+        raise SystemExit()
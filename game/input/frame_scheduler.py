@@ -0,0 +1,96 @@
+"""Decide when the main loop handles input and when it draws a frame.
+
+Events are taken from the queue in batches.  Within a batch, runs of mouse
+motion are collapsed into their last event, and only a few auto-repeated key
+presses are kept, so a held key can't queue up turns faster than they are
+played.  A frame is only drawn when something may have changed, and no more
+often than `max_fps`.  While `animating()` is true, such as when something
+on screen changes with time, frames keep being drawn at `max_fps` without
+waiting for input.
+"""
+
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import tcod.event
+
+
+class FrameScheduler:
+    def __init__(
+        self,
+        convert_event: Optional[Callable[[tcod.event.Event], object]] = None,
+        max_fps: float = 60.0,
+        max_key_repeats: int = 2,
+        clock: Callable[[], float] = time.perf_counter,
+        animating: Callable[[], bool] = lambda: False,
+    ):
+        self.convert_event = convert_event
+        self.frame_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.max_key_repeats = max_key_repeats
+        self.clock = clock
+        self.animating = animating
+        self.dirty = True
+        self.last_frame = float("-inf")
+        self.mouse_tile: Optional[Tuple[int, int]] = None
+        # Counters, for profiling.
+        self.frames_drawn = 0
+        self.events_handled = 0
+        self.events_dropped = 0
+
+    def should_render(self) -> bool:
+        if not (self.dirty or self.animating()):
+            return False
+        return self.clock() - self.last_frame >= self.frame_interval
+
+    def frame_rendered(self) -> None:
+        self.dirty = False
+        self.last_frame = self.clock()
+        self.frames_drawn += 1
+
+    def mark_dirty(self) -> None:
+        self.dirty = True
+
+    def timeout(self) -> Optional[float]:
+        """How long to wait for events before the next frame is due, if any."""
+        if not (self.dirty or self.animating()):
+            return None
+        return max(0.0, self.last_frame + self.frame_interval - self.clock())
+
+    def next_events(self) -> List[tcod.event.Event]:
+        """Wait for the next batch of events, or until a frame is due."""
+        return self.coalesce(tcod.event.wait(self.timeout()))
+
+    def coalesce(self, events: Iterable[tcod.event.Event]) -> List[tcod.event.Event]:
+        """Thin out a batch of events, and mark a frame as needed if they matter.
+
+        Events are converted with `convert_event` first, so mouse events have
+        their tile positions.
+        """
+        batch: List[tcod.event.Event] = []
+        repeats: Dict[int, int] = {}
+        for event in events:
+            if isinstance(event, tcod.event.KeyDown) and event.repeat:
+                repeats[event.sym] = repeats.get(event.sym, 0) + 1
+                if repeats[event.sym] > self.max_key_repeats:
+                    self.events_dropped += 1
+                    continue
+            if isinstance(event, tcod.event.MouseMotion) and batch:
+                if isinstance(batch[-1], tcod.event.MouseMotion):
+                    batch.pop()
+                    self.events_dropped += 1
+            batch.append(event)
+
+        for event in batch:
+            # Converting also sets the tile of the original event.
+            tile_event = event
+            if self.convert_event is not None:
+                tile_event = self.convert_event(event)
+            if isinstance(tile_event, tcod.event.MouseMotion):
+                # Motion within the same tile changes nothing on screen.
+                tile = int(tile_event.position.x), int(tile_event.position.y)
+                if tile == self.mouse_tile:
+                    continue
+                self.mouse_tile = tile
+            self.dirty = True
+        self.events_handled += len(batch)
+        return batch
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from typing import Callable, Tuple, Optional, TYPE_CHECKING, Union
 
+import functools
 import os
 import tcod.event
 from tcod import libtcodpy
@@ -11,6 +12,9 @@ from game.utils.utility import change_text_color
 
 import game.render.color as color
 import game.utils.exceptions as exceptions
+from game.input.base_handler import BaseEventHandler
+from game.render.layers import LAYERS
+from game.utils.profiling import PROFILER, profiled
 
 if TYPE_CHECKING:
     from game.world.engine import Engine
@@ -26,24 +30,6 @@ MainGameEventHandler will become the active handler.
 """
 
 
-class BaseEventHandler(tcod.event.EventDispatch[ActionOrHandler]):
-    def handle_events(self, event: tcod.event.Event) -> BaseEventHandler:
-        """Handle an event and return the next active event handler."""
-        state = self.dispatch(event)
-        if isinstance(state, BaseEventHandler):
-            return state
-        assert not isinstance(
-            state, actions.Action
-        ), f"{self!r} can not handle actions."
-        return self
-
-    def on_render(self, console: tcod.Console) -> None:
-        raise NotImplementedError()
-
-    def ev_quit(self, event: tcod.event.Quit) -> Optional[ActionOrHandler]:
-        raise SystemExit()
-
-
 class PopupMessage(BaseEventHandler):
     """Display a popup text window."""
 
@@ -52,6 +38,18 @@ class PopupMessage(BaseEventHandler):
         self.text = text
 
     def on_render(self, console: tcod.Console, fade: int = 8, align="center") -> None:
+        """Draw the popup, painted once for as long as the console keeps its size."""
+        LAYERS.draw(
+            "popup",
+            console,
+            self,
+            (fade, align),
+            functools.partial(self.render_popup, fade=fade, align=align),
+        )
+
+    def render_popup(
+        self, console: tcod.Console, fade: int = 8, align="center"
+    ) -> None:
         """Render the parent and dim the result, then print the message on top."""
         self.parent.on_render(console)
         console.rgb["fg"] //= fade
@@ -135,6 +133,7 @@ class EventHandler(BaseEventHandler):
             return MainGameEventHandler(self.engine)  # Return to the main handler.
         return self
 
+    @profiled("turn", "handle_action")
     def handle_action(self, action: Optional[actions.Action]) -> bool:
         """Handle actions returned from event methods.
 
@@ -147,6 +146,7 @@ class EventHandler(BaseEventHandler):
             result = action.perform()
 
         except exceptions.Impossible as exc:
+            PROFILER.count("impossible", type(action).__name__)
             self.engine.message_log.add_message(exc.args[0], color.impossible)
             return False  # Skip enemy turn on exceptions.
 
@@ -195,10 +195,15 @@ class DialogHandler(AskUserEventHandler):
     def on_render(self, console):
         super().on_render(console)
 
-        message = self.npc.dialog.display_log()
+        choices = self.npc.dialog.get_choices()
+        box_width = console.width - ((self.spacing + 1) * 2)
+        box_height = console.height - (self.spacing * 2)
+
+        # Keep the most recent lines on screen, leaving room for the choices.
+        message = self.npc.dialog.wrapped_log(box_width, box_height - len(choices) - 7)
 
         message += "\n\n\n\n\n\n\n"
-        for i, choice in enumerate(self.npc.dialog.get_choices()):
+        for i, choice in enumerate(choices):
             if i == self.cursor:
                 message += change_text_color(f"> {choice['text']}\n", color.blue)
             else:
@@ -217,8 +222,8 @@ class DialogHandler(AskUserEventHandler):
         console.print_box(
             x=self.spacing + 1,
             y=self.spacing + 1,
-            width=console.width - ((self.spacing + 1) * 2),
-            height=console.height - (self.spacing * 2),
+            width=box_width,
+            height=box_height,
             string=message,
             bg=color.black,
         )
@@ -713,10 +718,24 @@ class HistoryViewer(EventHandler):
         self.cursor = self.log_length - 1
 
     def on_render(self, console: tcod.Console) -> None:
-        super().on_render(console)  # Draw the main state as the background.
-
-        log_console = tcod.console.Console(console.width - 6, console.height - 6)
+        # Nothing but the mouse changes the main state while the history is up,
+        # so it's drawn once as the background.
+        LAYERS.draw(
+            "background", console, self, self.engine.mouse_location, super().on_render
+        )
+        LAYERS.draw(
+            "history",
+            console,
+            self,
+            (self.cursor, len(self.engine.message_log.messages)),
+            self.render_history,
+            x=3,
+            y=3,
+            width=console.width - 6,
+            height=console.height - 6,
+        )
 
+    def render_history(self, log_console: tcod.Console) -> None:
         # Draw a frame with a custom banner title.
         log_console.draw_frame(0, 0, log_console.width, log_console.height)
         log_console.print_box(
@@ -730,9 +749,9 @@ class HistoryViewer(EventHandler):
             1,
             log_console.width - 2,
             log_console.height - 2,
-            self.engine.message_log.messages[: self.cursor + 1],
+            self.engine.message_log.messages,
+            end=self.cursor + 1,
         )
-        log_console.blit(console, 3, 3)
 
     def ev_keydown(self, event: tcod.event.KeyDown) -> Optional[MainGameEventHandler]:
         # Fancy conditional movement to make it feel right.
@@ -42,6 +42,11 @@ MODIFIER_KEYS = {
     tcod.event.KeySym.RALT,
 }
 
+# Cycles through the fonts from anywhere in the game.
+NEXT_FONT_KEY = tcod.event.KeySym.F10
+# Shows timings in place of the HUD, see game/utils/profiling.py.
+PROFILER_KEY = tcod.event.KeySym.F3
+
 CONFIRM_KEYS = {
     tcod.event.KeySym.RETURN,
     tcod.event.KeySym.KP_ENTER,
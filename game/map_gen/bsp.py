@@ -0,0 +1,116 @@
+"""Iterative binary space partitioning for city blocks and building rooms.
+
+`partition` keeps splitting rectangles with a split policy until the policy
+says stop.  It uses an explicit stack (or queue) instead of recursion, so deep
+or very large subdivisions never hit the recursion limit.
+"""
+
+from collections import deque
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+import numpy as np  # type: ignore
+
+# One row per rectangle.  `parent` is -1 for the root, and `door` is the
+# (x, y) of the door in the wall shared with its sibling, or (-1, -1).
+PARTITION_DT = np.dtype(
+    [
+        ("x", np.int32),
+        ("y", np.int32),
+        ("w", np.int32),
+        ("h", np.int32),
+        ("parent", np.int32),
+        ("door", np.int32, (2,)),
+        ("leaf", np.bool_),
+    ]
+)
+
+NO_DOOR = (-1, -1)
+
+
+class Split(NamedTuple):
+    """How a policy wants a rectangle split.
+
+    `at` is the size of the first part (the left or top one), and `gap` is the
+    number of cells left between the two parts, such as a road.
+    """
+
+    vertical: bool
+    at: int
+    gap: int = 0
+    door: Tuple[int, int] = NO_DOOR
+
+
+# Called with (x, y, w, h, depth); returns None to keep the rectangle whole.
+SplitPolicy = Callable[[int, int, int, int, int], Optional[Split]]
+
+
+def partition(
+    x: int,
+    y: int,
+    w: int,
+    h: int,
+    policy: SplitPolicy,
+    breadth_first: bool = False,
+    max_depth: Optional[int] = None,
+) -> np.recarray:
+    """Split (x, y, w, h) with `policy` and return every rectangle made.
+
+    The two halves of a split are always stored next to each other, first
+    half first, so row 0 is the root and rows (1, 2), (3, 4)... are siblings.
+    Rectangles are split depth first, first half before second, unless
+    `breadth_first` is set.
+    """
+    rows: List[tuple] = [(x, y, w, h, -1, NO_DOOR, True)]
+    pending = deque([(0, 0)])
+    take = pending.popleft if breadth_first else pending.pop
+
+    while pending:
+        index, depth = take()
+        if max_depth is not None and depth >= max_depth:
+            continue
+        x, y, w, h = rows[index][:4]
+        split = policy(x, y, w, h, depth)
+        if split is None:
+            continue
+
+        rows[index] = rows[index][:6] + (False,)
+        first = len(rows)
+        if split.vertical:
+            rest = w - split.at - split.gap
+            rows.append((x, y, split.at, h, index, split.door, True))
+            rows.append((x + split.at + split.gap, y, rest, h, index, split.door, True))
+        else:
+            rest = h - split.at - split.gap
+            rows.append((x, y, w, split.at, index, split.door, True))
+            rows.append((x, y + split.at + split.gap, w, rest, index, split.door, True))
+
+        children = [(first, depth + 1), (first + 1, depth + 1)]
+        # A stack pops the last item first, so push the second half first.
+        pending.extend(children if breadth_first else reversed(children))
+
+    return np.array(rows, dtype=PARTITION_DT).view(np.recarray)
+
+
+def leaves(partitions: np.recarray) -> np.recarray:
+    """The rectangles that were not split any further, in creation order."""
+    return partitions[partitions.leaf]
+
+
+def split_gaps(partitions: np.recarray) -> List[Tuple[int, int, int, int]]:
+    """Return the (x, y, w, h) of the gap left by each split, in split order."""
+    gaps = []
+    for first in range(1, len(partitions), 2):
+        a, b = partitions[first], partitions[first + 1]
+        if a.y == b.y and a.h == b.h and b.x > a.x:
+            gap = (a.x + a.w, a.y, b.x - a.x - a.w, a.h)
+        else:
+            gap = (a.x, a.y + a.h, a.w, b.y - a.y - a.h)
+        if gap[2] > 0 and gap[3] > 0:
+            gaps.append(tuple(int(v) for v in gap))
+    return gaps
+
+
+def split_doors(partitions: np.recarray) -> List[Tuple[int, int]]:
+    """Return the door placed by each split, in split order."""
+    doors = partitions.door[1::2]
+    return [(int(x), int(y)) for x, y in doors if x >= 0]
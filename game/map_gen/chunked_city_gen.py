@@ -0,0 +1,201 @@
+"""Generate cities lazily, one chunk at a time, for maps too big to build up front.
+
+The layout (roads, blocks and structure types) is planned for the whole city
+straight away since it is cheap.  Tiles are only painted when a chunk is first
+touched, and the buildings near a chunk are only built once the camera or the
+player's field of view gets close to it.
+"""
+
+import random
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+import numpy as np  # type: ignore
+
+from game.entities import tile_types
+from game.entities import entity_factory
+from game.data.dialog_data.default_text import WELCOME_TEXT
+from game.map_gen.rectangular_road import RectangularRoad
+from game.map_gen.city_gen import (
+    blocks_to_structures,
+    changed_area,
+    divide_cityspace,
+    generate_city_out_road,
+    generate_player,
+    generate_structure_details,
+    generate_structure_types,
+)
+from game.map_gen.city_gen_utility import place_entity
+from game.map_gen.city_profile import CityProfile, HUGE_CITY
+from game.map_gen.spawner import random_item_names, spawn_by_name
+from game.utils.utility import derive_seed, seeded_random
+from game.world.chunked_map import ChunkedGameMap
+
+
+def generate_chunked_city(engine, profile: CityProfile = HUGE_CITY):
+    player = engine.player
+    generator = ChunkedCityGenerator(profile, seed=random.getrandbits(64))
+    city = ChunkedGameMap(
+        engine,
+        profile.map_width,
+        profile.map_height,
+        profile.max_levels,
+        chunk_size=profile.chunk_size,
+        entities=[player],
+        lazy_interiors=profile.lazy_interiors,
+    )
+    # NPCs and items are spawned on the ground floor as structures are built,
+    # so its rooms are always furnished straight away.
+    city.furnish_level(1)
+    generator.plan(city)
+    city.generator = generator
+
+    generate_player(city, player)
+
+    npc = place_entity(city, 1, (5, 3), entity_factory.npc)
+    if npc:
+        npc.dialog.set_context({"name": "Joe"})
+    sign = place_entity(city, 1, (4, 2), entity_factory.sign, True)
+    sign.information.clear()
+    sign.information.add_page(WELCOME_TEXT)
+    return city
+
+
+class ChunkedCityGenerator:
+    """Holds the plan of a chunked city and builds it piece by piece."""
+
+    def __init__(self, profile: CityProfile, seed: int):
+        self.profile = profile
+        self.seed = seed
+        self.roads: List[RectangularRoad] = []
+        self.structures = []
+        self.structure_types: List[str] = []
+        self.built_structures: Set[int] = set()
+        # Entities to spawn in each structure once it has been built.
+        self.spawns: Dict[int, List[str]] = defaultdict(list)
+        self.roads_by_chunk: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        self.structures_by_chunk: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+
+    def plan(self, city: ChunkedGameMap) -> None:
+        """Lay out roads and blocks for the whole city without painting anything."""
+        border_width = self.profile.tree_border_width
+        with seeded_random(self.seed):
+            blocks, road_spots = divide_cityspace(
+                city,
+                border_width,
+                self.profile.min_block_size,
+                self.profile.road_width,
+            )
+            road_spots = generate_city_out_road(city, road_spots, border_width)
+            structures = blocks_to_structures(blocks)
+            structures_and_types = generate_structure_types(structures, self.profile)
+
+            # Decide up front which structure each NPC and item will be in.
+            names = ["npc"] * self.profile.npc_count
+            names += random_item_names(self.profile.item_count)
+            spawn_weights = dict(self.profile.spawn_weights)
+            weights = [
+                spawn_weights.get(structure_type, 1.0)
+                for structure_type in structures_and_types.values()
+            ]
+            homes = random.choices(range(len(weights)), weights, k=len(names))
+            for index, name in zip(homes, names):
+                self.spawns[index].append(name)
+
+        self.roads = [RectangularRoad(x, y, w, h, w < h) for x, y, w, h in road_spots]
+        for index, road in enumerate(self.roads):
+            for key in self._chunks_touching(city, road.x1, road.y1, road.x2, road.y2):
+                self.roads_by_chunk[key].append(index)
+
+        self.structures = list(structures_and_types)
+        self.structure_types = list(structures_and_types.values())
+        for index, structure in enumerate(self.structures):
+            # Doors reserve the floor just outside a structure, so pad by one.
+            for key in self._chunks_touching(
+                city,
+                structure.x1 - 1,
+                structure.y1 - 1,
+                structure.x2 + 1,
+                structure.y2 + 1,
+            ):
+                self.structures_by_chunk[key].append(index)
+
+    @staticmethod
+    def _chunks_touching(city, x1, y1, x2, y2):
+        size = city.chunk_size
+        max_cx, max_cy = city.chunk_count
+        for cx in range(max(0, x1 // size), min(max_cx, x2 // size + 1)):
+            for cy in range(max(0, y1 // size), min(max_cy, y2 // size + 1)):
+                yield cx, cy
+
+    def paint_chunk(self, city: ChunkedGameMap, cx: int, cy: int) -> None:
+        """Paint the ground, sky, tree border and roads of a freshly made chunk."""
+        chunk = city.tiles.chunks[cx, cy]
+        size = city.chunk_size
+        ox, oy = cx * size, cy * size
+
+        chunk[0] = tile_types.underground
+        for level in range(2, city.max_levels):
+            chunk[level] = tile_types.sky
+
+        # Tree border
+        border_width = self.profile.tree_border_width
+        xs = np.arange(ox, ox + size)[:, np.newaxis]
+        ys = np.arange(oy, oy + size)[np.newaxis, :]
+        border = (
+            (xs < border_width)
+            | (xs >= city.width - border_width)
+            | (ys < border_width)
+            | (ys >= city.height - border_width)
+        )
+        rng = np.random.default_rng(derive_seed(self.seed, "trees", cx, cy))
+        trees = np.array(tile_types.TREE_TILES)
+        chunk[1][border] = trees[rng.integers(len(trees), size=int(border.sum()))]
+
+        # Roads, painted in plan order so later roads cover earlier ones.
+        for index in self.roads_by_chunk.get((cx, cy), ()):
+            road = self.roads[index]
+            divider = (
+                tile_types.road_divider_vert
+                if road.is_vert
+                else tile_types.road_divider_horiz
+            )
+            self._paint(chunk[1], ox, oy, size, road.center_line, divider)
+            self._paint(chunk[1], ox, oy, size, road.lanes, tile_types.road)
+
+    @staticmethod
+    def _paint(chunk_level, ox, oy, size, area, tile):
+        sx, sy = area
+        xs = [
+            x - ox
+            for x in range(sx.start, sx.stop, sx.step or 1)
+            if ox <= x < ox + size
+        ]
+        ys = [
+            y - oy
+            for y in range(sy.start, sy.stop, sy.step or 1)
+            if oy <= y < oy + size
+        ]
+        if xs and ys:
+            chunk_level[np.ix_(xs, ys)] = tile
+
+    def populate_chunk(self, city: ChunkedGameMap, cx: int, cy: int) -> None:
+        """Build every structure touching a chunk, along with its residents."""
+        for index in self.structures_by_chunk.get((cx, cy), ()):
+            if index in self.built_structures:
+                continue
+            self.built_structures.add(index)
+            structure = self.structures[index]
+
+            # Each structure gets its own seed so build order doesn't matter.
+            with seeded_random(derive_seed(self.seed, "structure", index)):
+                generate_structure_details(
+                    city, structure, self.structure_types[index], self.profile
+                )
+                spawn_by_name(
+                    city,
+                    1,
+                    {structure: self.structure_types[index]},
+                    self.spawns.get(index, ()),
+                )
+            city.tiles_changed(area=changed_area(structure))
@@ -0,0 +1,82 @@
+"""Cache generated cities on disk, keyed by their settings and seed.
+
+Generation is deterministic for a given seed, so a city that has been built
+once can be loaded instead of built again.  Only plain in-memory cities are
+cached; chunked cities are built lazily anyway and memory-mapped ones already
+live on disk.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import lzma
+import os
+import pickle
+from typing import Optional, TYPE_CHECKING
+
+from game.world.storage import CITY_CACHE_FOLDER
+
+if TYPE_CHECKING:
+    from game.map_gen.city_profile import CityProfile
+    from game.world.engine import Engine
+    from game.world.game_map import GameMap
+
+# Bump this whenever generation changes, so older cached cities are ignored.
+CACHE_VERSION = 7
+
+
+def is_cacheable(profile: CityProfile) -> bool:
+    return not (profile.chunked or profile.memmap)
+
+
+def cache_key(profile: CityProfile, seed: int) -> str:
+    settings = json.dumps(dataclasses.asdict(profile), sort_keys=True)
+    data = f"{CACHE_VERSION}:{seed}:{settings}".encode()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def load_city(engine: Engine, profile: CityProfile, seed: int) -> Optional[GameMap]:
+    """Return the cached city for these settings and seed, if there is one.
+
+    The city comes back without the player, who still needs to be placed.
+    """
+    path = CITY_CACHE_FOLDER / f"{cache_key(profile, seed)}.city"
+    try:
+        with open(path, "rb") as f:
+            city = pickle.loads(lzma.decompress(f.read()))
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, lzma.LZMAError, pickle.UnpicklingError):
+        # A damaged cache entry is just regenerated.
+        return None
+
+    city.engine = engine
+    city.camera = engine.camera
+    return city
+
+
+def store_city(city: GameMap, profile: CityProfile, seed: int) -> None:
+    """Save a freshly generated city, leaving out the engine and player."""
+    engine, camera = city.engine, city.camera
+    player = engine.player
+    city.engine = city.camera = None
+    city.entities.discard(player)
+    try:
+        # The lightest preset is ~30x faster than the default on big maps and
+        # still shrinks the mostly uniform tile layers well.
+        data = lzma.compress(
+            pickle.dumps(city, protocol=pickle.HIGHEST_PROTOCOL), preset=0
+        )
+    finally:
+        city.engine, city.camera = engine, camera
+        city.entities.add(player)
+
+    CITY_CACHE_FOLDER.mkdir(parents=True, exist_ok=True)
+    path = CITY_CACHE_FOLDER / f"{cache_key(profile, seed)}.city"
+    # Write to a temporary file first so a crash never leaves half an entry.
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
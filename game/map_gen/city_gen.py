@@ -1,73 +1,70 @@
-from typing import List, Tuple
+import functools
+from typing import List, Optional, Tuple
 import random
 
+import numpy as np  # type: ignore
+
 from game.world.game_map import GameMap
+from game.world import storage
+from game.map_gen import bsp
+from game.map_gen.bsp import Split
 from game.map_gen.rectangular_structure import RectangularStructure
 from game.map_gen.rectangular_road import RectangularRoad
 from game.map_gen.rectangular_room import RectangularRoom
 from game.entities import tile_types
 from game.entities import entity_factory
 from game.data.dialog_data.default_text import WELCOME_TEXT
-from game.utils.utility import slices_to_xys
-from game.map_gen.city_room_gen import ROOM_FUNCTIONS
+from game.utils.utility import derive_seed, seeded_random
+from game.map_gen.city_room_gen import ROOM_GENERATORS
+from game.map_gen.city_profile import CityProfile, SMALL_CITY
 from game.map_gen.city_gen_utility import place_entity, place_tile, place_tiles
+from game.map_gen.spawner import random_item_names, spawn_by_name
 
-CITY_DEFAULTS = {
-    "MAP_WIDTH": 50,
-    "MAP_HEIGHT": 50,
-    "MAX_LEVELS": 2,
-    "MIN_BLOCK_SIZE": 10,
-    "TREE_BORDER_WIDTH": 3,
-    "ROAD_WIDTH": 3,
-    "REQUIRED_STRUCTURES": [
-        "MDU",
-        "Library",
-    ],
-    "FILLER_STRUCTURES": [
-        # "Park",
-        "Half Bathroom",
-        # "Lobby",
-        # "Office",
-        # "Conference Room",
-    ],
-}
-
-
-def generate_city(
-    engine,
-    city_details=CITY_DEFAULTS,
-):
+
+def generate_city(engine, profile: CityProfile = SMALL_CITY):
     # Init
     player = engine.player
-    map_width = city_details["MAP_WIDTH"]
-    map_height = city_details["MAP_HEIGHT"]
-    levels = city_details["MAX_LEVELS"]
-    city = GameMap(engine, map_width, map_height, levels, entities=[player])
+    seed = random.getrandbits(64)
+    map_width = profile.map_width
+    map_height = profile.map_height
+    levels = profile.max_levels
+    storage_folder = storage.new_map_folder() if profile.memmap else None
+    city = GameMap(
+        engine,
+        map_width,
+        map_height,
+        levels,
+        entities=[player],
+        storage_folder=storage_folder,
+        lazy_interiors=profile.lazy_interiors,
+    )
 
     generate_ground_and_sky(city, levels)
 
     # Tree Border
-    border_width = city_details["TREE_BORDER_WIDTH"]
+    border_width = profile.tree_border_width
     generate_tree_border(city=city, border_width=border_width)
 
     # Section off city into roads and blocks
     blocks, road_spots = divide_cityspace(
-        city, border_width, city_details["MIN_BLOCK_SIZE"]
+        city, border_width, profile.min_block_size, profile.road_width
     )
 
     # Draw roads, including exit
     road_spots = generate_city_out_road(city, road_spots, border_width)
-    roads = generate_roads(city, road_spots)
+    generate_roads(city, road_spots)
 
     # Draw buildings
     structures = blocks_to_structures(blocks)
-    structures_and_types = generate_structure_types(structures, city_details)
+    structures_and_types = generate_structure_types(structures, profile)
 
-    for structure, structure_type in structures_and_types.items():
-        generate_structure_details(city, structure, structure_type, city_details)
+    # NPCs and items are spawned on the ground floor, so its rooms are
+    # furnished as they are built.
+    city.furnish_level(1)
+    generate_structures(city, structures_and_types, profile, seed)
 
     # Generate Actors and Items
-    generate_actors(city, player, structures, roads)
+    generate_actors(city, structures_and_types, profile)
 
     # Generate Player
     generate_player(city, player)
@@ -94,97 +91,59 @@ def split_rectangle(rect: RectangularStructure, min_size=3, split_chance=0.6):
     Split a rectangle into rooms of various sizes.
     Returns a list of RectangularStructure rooms.
     """
-    rooms = []
 
-    def _split(r: RectangularStructure):
+    def policy(x, y, w, h, depth):
         # Stop if too small
-        if r.width <= min_size and r.height <= min_size:
-            rooms.append(r)
-            return
+        if w <= min_size and h <= min_size:
+            return None
 
         # Randomly decide to split vertically or horizontally
         if random.random() < split_chance:
             # Vertical split (two side-by-side rooms)
-            if r.width > min_size * 2 and (
-                random.choice([True, False]) or r.height <= min_size * 2
-            ):
-                split_at = random.randint(min_size, r.width - min_size)
-                left = RectangularStructure(r.x, r.y, split_at, r.height)
-                right = RectangularStructure(
-                    r.x + split_at, r.y, r.width - split_at, r.height
-                )
-                _split(left)
-                _split(right)
-                return
+            if w > min_size * 2 and (random.choice([True, False]) or h <= min_size * 2):
+                return Split(True, random.randint(min_size, w - min_size))
 
             # Horizontal split (two stacked rooms)
-            if r.height > min_size * 2:
-                split_at = random.randint(min_size, r.height - min_size)
-                top = RectangularStructure(r.x, r.y, r.width, split_at)
-                bottom = RectangularStructure(
-                    r.x, r.y + split_at, r.width, r.height - split_at
-                )
-                _split(top)
-                _split(bottom)
-                return
+            if h > min_size * 2:
+                return Split(False, random.randint(min_size, h - min_size))
 
         # No split — keep as is
-        rooms.append(r)
+        return None
 
-    _split(rect)
-    return rooms
+    parts = bsp.partition(rect.x, rect.y, rect.w, rect.h, policy)
+    return [RectangularStructure(*part[:4]) for part in bsp.leaves(parts).tolist()]
 
 
 def split_and_place_doors(rect: RectangularRoom, min_size=9):
     """Split the rectangle into rooms and place doors during each split."""
-    rooms = []
-    doors = []
 
-    def _split(r: RectangularRoom):
+    def policy(x, y, w, h, depth):
         # Stop if too small
-        if r.width <= min_size and r.height <= min_size:
-            rooms.append(r)
-            return
+        if w <= min_size and h <= min_size:
+            return None
 
-        # Decide split direction
-        if r.width > r.height and r.width >= min_size * 2:
-            # Vertical split
-            split_at = random.randint(min_size, r.width - min_size)
-            left = RectangularRoom(r.x, r.y, split_at, r.height)
-            right = RectangularRoom(r.x + split_at, r.y, r.width - split_at, r.height)
-
-            # Place door in the shared wall
-            door_y = random.randint(r.y + 1, r.y + r.height - 2)
-            door_x = r.x + split_at
-            doors.append((door_x, door_y))
-            left.add_door(door_x, door_y)
-            right.add_door(door_x, door_y)
-
-            _split(left)
-            _split(right)
-
-        elif r.height >= min_size * 2:
-            # Horizontal split
-            split_at = random.randint(min_size, r.height - min_size)
-            top = RectangularRoom(r.x, r.y, r.width, split_at)
-            bottom = RectangularRoom(r.x, r.y + split_at, r.width, r.height - split_at)
-
-            # Place door in the shared wall
-            door_x = random.randint(r.x + 1, r.x + r.width - 2)
-            door_y = r.y + split_at
-            doors.append((door_x, door_y))
-            top.add_door(door_x, door_y)
-            bottom.add_door(door_x, door_y)
-
-            _split(top)
-            _split(bottom)
+        # Decide split direction, with a door in the shared wall
+        if w > h and w >= min_size * 2:
+            split_at = random.randint(min_size, w - min_size)
+            door = (x + split_at, random.randint(y + 1, y + h - 2))
+            return Split(True, split_at, door=door)
 
-        else:
-            # No further split
-            rooms.append(r)
+        if h >= min_size * 2:
+            split_at = random.randint(min_size, h - min_size)
+            door = (random.randint(x + 1, x + w - 2), y + split_at)
+            return Split(False, split_at, door=door)
 
-    _split(rect)
-    return rooms, doors
+        # No further split
+        return None
+
+    parts = bsp.partition(rect.x, rect.y, rect.w, rect.h, policy)
+    rooms = []
+    for x, y, w, h, _, door, _ in bsp.leaves(parts).tolist():
+        room = RectangularRoom(x, y, w, h)
+        if door[0] >= 0:
+            room.add_door(int(door[0]), int(door[1]))
+        rooms.append(room)
+    return rooms, bsp.split_doors(parts)
 
 
 # GENERATE BORDER
@@ -192,99 +151,48 @@ def generate_tree_border(city, border_width):
     rows = city.height
     cols = city.width
     tree_level = 1
-    for t in range(border_width):
-        # Top and bottom row border
-        for x in range(cols):
-            place_tile(city, tree_level, (x, t), tile_types.TREE_TILES)
-            place_tile(city, tree_level, (x, rows - 1 - t), tile_types.TREE_TILES)
-
-        # Left and right column border
-        for y in range(rows - t):
-            place_tile(city, tree_level, (t, y), tile_types.TREE_TILES)
-            place_tile(city, tree_level, (cols - 1 - t, y), tile_types.TREE_TILES)
-
+    # Top and bottom row border
+    for y_slice in (slice(0, border_width), slice(rows - border_width, rows)):
+        place_tiles(city, tree_level, (slice(0, cols), y_slice), tile_types.TREE_TILES)
 
-def divide_cityspace(city, border_width, min_block_size):
-    x = border_width
-    y = border_width
-    width = city.width - (2 * border_width)
-    height = city.height - (2 * border_width)
+    # Left and right column border
+    for x_slice in (slice(0, border_width), slice(cols - border_width, cols)):
+        place_tiles(city, tree_level, (x_slice, slice(0, rows)), tile_types.TREE_TILES)
 
-    roads = []
-    blocks = []
-
-    queue = [RectangularStructure(x, y, width, height)]
 
-    while queue:
-        block = queue.pop(0)
-        w, h = block.w, block.h
+def divide_cityspace(city, border_width, min_block_size, road_width):
+    min_split = min_block_size * 2 + road_width
 
+    def policy(x, y, w, h, depth):
         # Check if we can split further
-        if (
-            w < min_block_size * 2 + CITY_DEFAULTS["ROAD_WIDTH"]
-            and h < min_block_size * 2 + CITY_DEFAULTS["ROAD_WIDTH"]
-        ):
-            blocks.append(RectangularStructure(block.x + 1, block.y + 1, w - 3, h - 3))
-            continue
+        if w < min_split and h < min_split:
+            return None
 
         # Decide split direction
         split_horizontally = random.choice([True, False])
-        if w < min_block_size * 2 + CITY_DEFAULTS["ROAD_WIDTH"]:
+        if w < min_split:
             split_horizontally = True
-        elif h < min_block_size * 2 + CITY_DEFAULTS["ROAD_WIDTH"]:
+        elif h < min_split:
             split_horizontally = False
 
-        if split_horizontally:
-            # Horizontal split
-            split_line = random.randint(
-                min_block_size, h - min_block_size - CITY_DEFAULTS["ROAD_WIDTH"]
-            )
-            roads.append(
-                RectangularStructure(
-                    block.x, block.y + split_line, w, CITY_DEFAULTS["ROAD_WIDTH"]
-                )
-            )
-
-            # Top block
-            queue.append(RectangularStructure(block.x, block.y, w, split_line))
-            # Bottom block
-            queue.append(
-                RectangularStructure(
-                    block.x,
-                    block.y + split_line + CITY_DEFAULTS["ROAD_WIDTH"],
-                    w,
-                    h - split_line - CITY_DEFAULTS["ROAD_WIDTH"],
-                )
-            )
-        else:
-            # Vertical split
-            split_line = random.randint(
-                min_block_size, w - min_block_size - CITY_DEFAULTS["ROAD_WIDTH"]
-            )
-            roads.append(
-                RectangularStructure(
-                    block.x + split_line, block.y, CITY_DEFAULTS["ROAD_WIDTH"], h
-                )
-            )
-
-            # Left block
-            queue.append(RectangularStructure(block.x, block.y, split_line, h))
-            # Right block
-            queue.append(
-                RectangularStructure(
-                    block.x + split_line + CITY_DEFAULTS["ROAD_WIDTH"],
-                    block.y,
-                    w - split_line - CITY_DEFAULTS["ROAD_WIDTH"],
-                    h,
-                )
-            )
-
-    # Remaining blocks go to final list
-    blocks.extend(
-        RectangularStructure(block.x + 1, block.y + 1, block.w - 3, block.h - 3)
-        for block in queue
+        size = h if split_horizontally else w
+        split_line = random.randint(min_block_size, size - min_block_size - road_width)
+        return Split(not split_horizontally, split_line, gap=road_width)
+
+    parts = bsp.partition(
+        border_width,
+        border_width,
+        city.width - (2 * border_width),
+        city.height - (2 * border_width),
+        policy,
+        breadth_first=True,
     )
-    return [b.as_tuple for b in blocks], [r.as_tuple for r in roads]
+    # Leave room around each block for the sidewalk.
+    blocks = [
+        [x + 1, y + 1, w - 3, h - 3] for x, y, w, h, *_ in bsp.leaves(parts).tolist()
+    ]
+    roads = [list(gap) for gap in bsp.split_gaps(parts)]
+    return blocks, roads
 
 
 # ROADS
@@ -364,29 +272,63 @@ def rect_touch_or_overlap(rects: List[Tuple[int, int, int, int]]):
     return results
 
 
-def generate_structure_details(city, structure, structure_type, city_details):
+def generate_structures(city, structures_and_types, profile, seed):
+    """Build every structure, each from its own seed so the order doesn't matter."""
+    seeds = [
+        derive_seed(seed, "structure", index)
+        for index in range(len(structures_and_types))
+    ]
+    workers = profile.parallel_workers
+    if workers > 1 and len(seeds) > 1:
+        from game.map_gen.parallel_gen import generate_structures_in_parallel
+
+        generate_structures_in_parallel(
+            city, structures_and_types, profile, seeds, workers
+        )
+        return
+
+    for (structure, structure_type), structure_seed in zip(
+        structures_and_types.items(), seeds
+    ):
+        build_structure(city, structure, structure_type, profile, structure_seed)
+
+
+def build_structure(city, structure, structure_type, profile, seed):
+    with seeded_random(seed):
+        generate_structure_details(city, structure, structure_type, profile)
+
+
+def generate_structure_details(city, structure, structure_type, profile):
     # TODO add more structures
     # TODO add new super structure type
 
-    if structure_type in ["Park"]:
-        ROOM_FUNCTIONS[structure_type](city, level=1, structure=structure)
+    room_generator = ROOM_GENERATORS[structure_type]
+    if not room_generator.building:
+        room_generator(city, level=1, structure=structure)
     else:
         generate_building(
             city,
             structure,
             structure_type,
             0,
-            city_details["MAX_LEVELS"],
+            profile.max_levels,
         )
 
 
+def changed_area(structure):
+    """The (x1, y1, x2, y2) area building `structure` can change the tiles of."""
+    # Walls are at x2 and y2, and doors reserve the floor just outside.
+    return structure.x1 - 1, structure.y1 - 1, structure.x2 + 2, structure.y2 + 2
+
+
 def generate_building(
     city,
     structure,
     structure_type,
-    bottom_floor=0,
-    top_floor=CITY_DEFAULTS["MAX_LEVELS"],
+    bottom_floor,
+    top_floor,
 ):
+    area = changed_area(structure)
     # TODO rethink stairwells, and this floor by floor generation method
     for floor in range(bottom_floor, top_floor):
         generate_flooring(city, floor, structure, tile_types.floor)
@@ -395,54 +337,44 @@ def generate_building(
         rooms, doors = split_and_place_doors(structure, min_size=4)
 
         for room in rooms:
-            # TODO make structure_type lookup
             generate_walls(city, floor, room)
-            if ROOM_FUNCTIONS.get(structure_type, None):
-                ROOM_FUNCTIONS[structure_type](city, floor, room)
-            else:
-                print(f"no function for {structure_type}")
-            # if structure_type == "Office":
-            #     ROOM_FUNCTIONS["Office"](city, floor, room)
-
-            # elif structure_type == "Conference Room":
-            #     ROOM_FUNCTIONS["Half Bathroom"](city, floor, room)
-
-            #     generate_conference_room(city, floor, room)
-
-            # elif structure_type == "Bathroom":
-            #     ROOM_FUNCTIONS["Half Bathroom"](city, floor, room)
-
-            # elif structure_type == "Library":
-            #     ROOM_FUNCTIONS["Library"](city, floor, room)
-
-            # elif structure_type == "Lobby":
-            #     generate_stairwell(city, room, horiz_spot=False)
-
-            # elif structure_type == "Single Floor Stairwell":
-            #     generate_stairwell(city, room, 1, 2)
-            # elif structure_type == "Double Floor Stairwell":
-            #     generate_stairwell(city, room, 1, 2)
-            # elif structure_type == "Full Stairwell":
-            #     generate_stairwell(city, room)
-            # elif structure_type == "Cellar Door Stairwell":
-            #     generate_stairwell(city, room, 0, 1)
 
         place_tiles(city, floor, doors, [tile_types.door], True)
+        # Buildings never touch, so retiling just this one is the same as
+        # retiling the whole level, and also works for chunked maps.
+        autotile_walls(city, floor, structure.area)
 
         if floor > 0:
             generate_windows(city, floor, structure)
         if floor == 1:
             generate_doors(city, floor, structure)
 
+        # The rooms are furnished from their own seed, so furnishing them
+        # later (see GameMap.add_interior) gives the same result as now.
+        city.add_interior(
+            floor,
+            functools.partial(
+                furnish_rooms, structure_type, floor, rooms, random.getrandbits(64)
+            ),
+            area,
+        )
+
     # stairwell = random.choice(structure.quadrant_centers)
     # generate_stairwell(city, structure, bottom_floor, top_floor, center_spot=stairwell)
 
 
+def furnish_rooms(structure_type, level, rooms, seed, city):
+    room_generator = ROOM_GENERATORS[structure_type]
+    with seeded_random(seed):
+        for room in rooms:
+            room_generator(city, level, room)
+
+
 def generate_stairwell(
     city,
     structure,
-    bottom_floor=0,
-    top_floor=CITY_DEFAULTS["MAX_LEVELS"],
+    bottom_floor,
+    top_floor,
     center_spot=None,
     horiz_spot=True,
 ):
@@ -477,9 +409,9 @@ def blocks_to_structures(block_dimensions):
     return structures
 
 
-def generate_structure_types(structures, details):
-    required_types = details["REQUIRED_STRUCTURES"]
-    filler_types = details["FILLER_STRUCTURES"]
+def generate_structure_types(structures, profile: CityProfile):
+    required_types = profile.required_structures
+    filler_types = profile.filler_structures
 
     random.shuffle(structures)  # shuffle to randomize assignment
 
@@ -493,97 +425,50 @@ def generate_structure_types(structures, details):
 
 
 def generate_walls(city, level, structure: RectangularStructure, wall_type=None):
-    for spot in structure.edges_and_corners:
-        if spot in structure.vertical_edges:
-            city.tiles[level][spot] = tile_types.vertical_wall
-            continue
-        if spot in structure.horizontal_edges:
-            city.tiles[level][spot] = tile_types.horizontal_wall
-            continue
-
-        if spot == structure.top_left_corner:
-            if city.tiles[level][spot] in [
-                tile_types.bottom_left_corner_wall,
-                tile_types.right_t_wall,
-            ]:
-                city.tiles[level][spot] = tile_types.right_t_wall
-            elif city.tiles[level][spot] in [
-                tile_types.top_right_corner_wall,
-                tile_types.down_t_wall,
-            ]:
-                city.tiles[level][spot] = tile_types.down_t_wall
-            elif city.tiles[level][spot] in [
-                tile_types.bottom_right_corner_wall,
-                tile_types.cross_wall,
-                tile_types.left_t_wall,
-                tile_types.up_t_wall,
-            ]:
-                city.tiles[level][spot] = tile_types.cross_wall
-            else:
-                city.tiles[level][spot] = tile_types.top_left_corner_wall
-            continue
-        elif spot == structure.top_right_corner:
-            if city.tiles[level][spot] in [
-                tile_types.bottom_right_corner_wall,
-                tile_types.left_t_wall,
-            ]:
-                city.tiles[level][spot] = tile_types.left_t_wall
-            elif city.tiles[level][spot] in [
-                tile_types.top_left_corner_wall,
-                tile_types.down_t_wall,
-            ]:
-                city.tiles[level][spot] = tile_types.down_t_wall
-            elif city.tiles[level][spot] in [
-                tile_types.bottom_left_corner_wall,
-                tile_types.cross_wall,
-                tile_types.right_t_wall,
-                tile_types.up_t_wall,
-            ]:
-                city.tiles[level][spot] = tile_types.cross_wall
-            else:
-                city.tiles[level][spot] = tile_types.top_right_corner_wall
-        elif spot == structure.bottom_left_corner:
-            if city.tiles[level][spot] in [
-                tile_types.top_left_corner_wall,
-                tile_types.right_t_wall,
-            ]:
-                city.tiles[level][spot] = tile_types.right_t_wall
-            elif city.tiles[level][spot] in [
-                tile_types.bottom_right_corner_wall,
-                tile_types.up_t_wall,
-            ]:
-                city.tiles[level][spot] = tile_types.up_t_wall
-            elif city.tiles[level][spot] in [
-                tile_types.top_right_corner_wall,
-                tile_types.cross_wall,
-                tile_types.left_t_wall,
-                tile_types.down_t_wall,
-            ]:
-                city.tiles[level][spot] = tile_types.cross_wall
-            else:
-                city.tiles[level][spot] = tile_types.bottom_left_corner_wall
-        elif spot == structure.bottom_right_corner:
-            if city.tiles[level][spot] in [
-                tile_types.top_right_corner_wall,
-                tile_types.left_t_wall,
-            ]:
-                city.tiles[level][spot] = tile_types.left_t_wall
-            elif city.tiles[level][spot] in [
-                tile_types.bottom_left_corner_wall,
-                tile_types.up_t_wall,
-            ]:
-                city.tiles[level][spot] = tile_types.up_t_wall
-            elif city.tiles[level][spot] in [
-                tile_types.top_left_corner_wall,
-                tile_types.cross_wall,
-                tile_types.right_t_wall,
-                tile_types.down_t_wall,
-            ]:
-                city.tiles[level][spot] = tile_types.cross_wall
-            else:
-                city.tiles[level][spot] = tile_types.bottom_right_corner_wall
-        else:
-            city.tiles[level][spot] = tile_types.wall
+    """Outline a structure with walls.
+
+    The walls are all placed as `wall_type` (a plain wall by default) and get
+    their final glyphs from `autotile_walls` once every room is in place.
+    """
+    wall_type = tile_types.wall if wall_type is None else wall_type
+    x1, y1, x2, y2 = structure.x1, structure.y1, structure.x2, structure.y2
+    city.tiles[level][x1 : x2 + 1, y1] = wall_type
+    city.tiles[level][x1 : x2 + 1, y2] = wall_type
+    city.tiles[level][x1, y1 : y2 + 1] = wall_type
+    city.tiles[level][x2, y1 : y2 + 1] = wall_type
+
+
+def autotile_walls(city, level, area: Optional[Tuple[slice, slice]] = None):
+    """Pick the glyph of every wall in `area` from its four neighbours.
+
+    Doors and windows count as walls, so walls join up through them.  The
+    whole level is retiled when no area is given.
+    """
+    x_slice, y_slice = area or (slice(0, city.width), slice(0, city.height))
+    x1, x2, _ = x_slice.indices(city.width)
+    y1, y2, _ = y_slice.indices(city.height)
+    if x1 >= x2 or y1 >= y2:
+        return
+
+    # Read one extra tile around the area so its edges see their neighbours.
+    px1, px2 = max(0, x1 - 1), min(city.width, x2 + 1)
+    py1, py2 = max(0, y1 - 1), min(city.height, y2 + 1)
+    tiles = city.tiles[level][px1:px2, py1:py2]
+
+    connects = tile_types.in_category(tiles, tile_types.JOINS_WALLS)
+    padded = np.pad(connects, 1)
+    mask = (
+        padded[1:-1, :-2] * 1  # north
+        | padded[2:, 1:-1] * 2  # east
+        | padded[1:-1, 2:] * 4  # south
+        | padded[:-2, 1:-1] * 8  # west
+    )
+
+    retile = np.zeros_like(connects)
+    retile[x1 - px1 : x2 - px1, y1 - py1 : y2 - py1] = True
+    retile &= tile_types.in_category(tiles, tile_types.WALL)
+    tiles[retile] = tile_types.WALL_AUTOTILE[mask[retile]]
+    city.tiles[level][px1:px2, py1:py2] = tiles
 
 
 def generate_flooring(city, level, structure, floor_tile=tile_types.floor):
@@ -596,13 +481,13 @@ def generate_windows(city, level, structure, number_of_windows=4):
     if len(structure.horizontal_edges) > windows_each:
         h_window_spots = random.sample(structure.horizontal_edges, k=windows_each)
         for spot in h_window_spots:
-            if city.tiles[level][spot] in tile_types.FLAT_WALL_TILES:
+            if tile_types.in_category(city.tiles[level][spot], tile_types.FLAT_WALL):
                 city.tiles[level][spot] = tile_types.horizontal_window
 
     if len(structure.vertical_edges) > windows_each:
         v_windows = random.sample(structure.vertical_edges, k=windows_each)
         for spot in v_windows:
-            if city.tiles[level][spot] in tile_types.FLAT_WALL_TILES:
+            if tile_types.in_category(city.tiles[level][spot], tile_types.FLAT_WALL):
                 city.tiles[level][spot] = tile_types.vertical_window
 
 
@@ -640,9 +525,24 @@ def place_doors_and_reserve_floor(city, level, structure, x, y):
     return False
 
 
-def generate_actors(city, player, structures, roads):
-    generate_npcs(city, structures, roads)
-    generate_items(city, structures)
+def generate_actors(city, structures_and_types, profile):
+    spawn_by_name(
+        city,
+        1,
+        structures_and_types,
+        ["npc"] * profile.npc_count,
+        dict(profile.spawn_weights),
+    )
+    spawn_by_name(
+        city,
+        1,
+        structures_and_types,
+        random_item_names(profile.item_count),
+        dict(profile.spawn_weights),
+    )
+    npc = place_entity(city, 1, (5, 3), entity_factory.npc)
+    if npc:
+        npc.dialog.set_context({"name": "Joe"})
 
 
 def generate_player(city, player):
@@ -652,41 +552,3 @@ def generate_player(city, player):
     #     player.place(*spot, city)
 
     player.place(x=3, y=3, level=1, gamemap=city)
-
-
-def generate_npcs(city, structures, roads):
-    # level = 1
-    npcs_to_generate = 25
-    while npcs_to_generate:
-        random_room = random.choice(structures)
-        random_level = 1
-        x, y = random.choice(slices_to_xys(*(random_room.inner)))
-        place_entity(city, random_level, (x, y), entity_factory.npc)
-
-        npcs_to_generate -= 1
-    npc = place_entity(city, 1, (5, 3), entity_factory.npc)
-    npc.dialog.set_context({"name": "Joe"})
-
-
-def generate_items(city, structures):
-    # TODO improve around item generation
-    # TODO fix level / item generation
-    # level = 1
-    items_to_place = len(structures)
-    items_to_place = 50
-    while items_to_place:
-        random_room = random.choice(structures)
-        level = 1
-        x, y = random.choice(slices_to_xys(*(random_room.inner)))
-
-        val = random.random()
-        if val <= 0.2:
-            place_entity(city, level, (x, y), entity_factory.lightning_scroll, False)
-        elif val <= 0.5:
-            place_entity(city, level, (x, y), entity_factory.confusion_scroll, False)
-        elif val <= 0.7:
-            place_entity(city, level, (x, y), entity_factory.health_potion, False)
-        else:
-            place_entity(city, level, (x, y), entity_factory.fireball_scroll, False)
-
-        items_to_place -= 1
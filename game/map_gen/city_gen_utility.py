@@ -1,30 +1,44 @@
 import random
 from typing import List, Tuple
 
+import numpy as np  # type: ignore
+
 import game.entities.tile_types as tile_types
-from game.utils.utility import slices_to_xys
 
 
 def place_entity(city, level, spot, entity, override=False):
-    if city.tiles[level][spot] in tile_types.EMPTY_TILES or override:
+    if override or tile_types.in_category(city.tiles[level][spot], tile_types.EMPTY):
         return entity.spawn(city, level, *spot)
 
 
 def place_tile(city, level, spot, tile_list, override=True):
     # TODO improve to handle reseved tiles?
     tile = random.choice(tile_list)
-    if city.tiles[level][spot] in tile_types.EMPTY_TILES or override:
-        if city.tiles[level][spot] not in tile_types.RESERVED_TILES:
+    flags = city.tiles[level][spot]["flags"]
+    if override or flags & tile_types.EMPTY:
+        if not flags & tile_types.RESERVED:
             city.tiles[level][spot] = tile
 
 
-def place_tiles(city, level, spots, tile_list, override=True):
+def place_tiles(city, level, spots, tile_list, override=True, mask=None):
+    """Place tiles from `tile_list` on each of `spots`.
+
+    `spots` is a list or tuple of (x, y) spots, a single spot, or a pair of
+    slices.  Slices are filled in one go, optionally limited to the cells
+    where `mask` (shaped like the sliced window) is True.
+    """
+    if isinstance(spots, Tuple) and len(spots) == 2:
+        if isinstance(spots[0], slice) and isinstance(spots[1], slice):
+            place_tiles_in_area(city, level, spots, tile_list, override, mask)
+            return
+
     locations = []
     if isinstance(spots, (List, list)):
         locations = spots
     elif isinstance(spots, Tuple):
-        if isinstance(spots[0], slice) and isinstance(spots[1], slice):
-            locations = slices_to_xys(*spots)
+        if not spots or isinstance(spots[0], tuple):
+            # A tuple of spots, such as a structure's cached geometry.
+            locations = spots
         else:
             locations = [spots]
     else:
@@ -33,3 +47,27 @@ def place_tiles(city, level, spots, tile_list, override=True):
 
     for spot in locations:
         place_tile(city, level, spot, tile_list, override)
+
+
+def place_tiles_in_area(city, level, area, tile_list, override=True, mask=None):
+    """Vectorized `place_tile` over every cell of a pair of slices."""
+    sx, sy = area
+    window = city.tiles[level][sx, sy]
+    if window.size == 0:
+        return
+
+    allowed = np.ones(window.shape, dtype=bool) if mask is None else mask.copy()
+    if not override:
+        allowed &= tile_types.in_category(window, tile_types.EMPTY)
+    allowed &= ~tile_types.in_category(window, tile_types.RESERVED)
+    count = int(allowed.sum())
+    if not count:
+        return
+
+    if len(tile_list) == 1:
+        window[allowed] = tile_list[0]
+    else:
+        window[allowed] = np.array(
+            random.choices(tile_list, k=count), dtype=tile_types.tile_dt
+        )
+    city.tiles[level][sx, sy] = window
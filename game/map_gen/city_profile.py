@@ -0,0 +1,107 @@
+"""Settings for generating a city.
+
+A CityProfile is immutable, hashable and checked when it is made, so it can
+be shared between generators, worker processes and the city cache safely.  Make a
+variation of one with `dataclasses.replace`, e.g.
+`replace(MEDIUM_CITY, map_width=300)`.
+"""
+
+from dataclasses import dataclass
+from typing import Tuple
+
+from game.map_gen.city_room_gen import check_room_types
+
+
+@dataclass(frozen=True)
+class CityProfile:
+    map_width: int = 50
+    map_height: int = 50
+    max_levels: int = 2
+    min_block_size: int = 10
+    tree_border_width: int = 3
+    road_width: int = 3
+    # Chunked cities are generated a chunk at a time as the player gets close.
+    chunked: bool = False
+    chunk_size: int = 32
+    # Memory-mapped cities keep their tiles in files under the save folder.
+    memmap: bool = False
+    npc_count: int = 25
+    item_count: int = 50
+    # How likely each structure type is to get an NPC or item, relative to 1.0,
+    # as (structure type, weight) pairs.  A dict is accepted too.
+    spawn_weights: Tuple[Tuple[str, float], ...] = (("Park", 0.5),)
+    # Furnish the rooms of each level the first time it is seen.  Only the
+    # furnishing is deferred, a whole level at a time: building shells are
+    # always built up front, and the ground floor is furnished straight away.
+    lazy_interiors: bool = True
+    # Build structures in this many worker processes when above 1.
+    parallel_workers: int = 0
+    required_structures: Tuple[str, ...] = ("MDU", "Library")
+    filler_structures: Tuple[str, ...] = ("Half Bathroom",)
+
+    def __post_init__(self):
+        # Lists are accepted for convenience but stored as tuples.
+        object.__setattr__(self, "required_structures", tuple(self.required_structures))
+        object.__setattr__(self, "filler_structures", tuple(self.filler_structures))
+        object.__setattr__(
+            self, "spawn_weights", tuple(sorted(dict(self.spawn_weights).items()))
+        )
+        self.validate()
+
+    def validate(self) -> None:
+        """Raise ValueError if a city can't be generated with these settings."""
+        for name in ("map_width", "map_height", "min_block_size", "road_width"):
+            if getattr(self, name) < 1:
+                raise ValueError(f"{name} must be at least 1.")
+        if self.max_levels < 2:
+            raise ValueError("max_levels must be at least 2, for the ground floor.")
+        for name in ("tree_border_width", "npc_count", "item_count"):
+            if getattr(self, name) < 0:
+                raise ValueError(f"{name} can not be negative.")
+        if min(self.map_width, self.map_height) <= self.tree_border_width * 2:
+            raise ValueError("The tree border leaves no room for the city.")
+        if self.chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1.")
+        if self.chunked and self.memmap:
+            raise ValueError("Chunked cities can not also be memory-mapped.")
+        if self.parallel_workers < 0:
+            raise ValueError("parallel_workers can not be negative.")
+        if any(weight < 0 for _, weight in self.spawn_weights):
+            raise ValueError("Spawn weights can not be negative.")
+        if not self.filler_structures:
+            raise ValueError("At least one filler structure type is needed.")
+        check_room_types(
+            self.required_structures
+            + self.filler_structures
+            + tuple(structure_type for structure_type, _ in self.spawn_weights)
+        )
+
+
+SMALL_CITY = CityProfile()
+
+MEDIUM_CITY = CityProfile(
+    map_width=150,
+    map_height=150,
+    max_levels=4,
+    npc_count=100,
+    item_count=200,
+    filler_structures=("Half Bathroom", "Office", "Conference Room", "Library"),
+)
+
+HUGE_CITY = CityProfile(
+    map_width=2000,
+    map_height=2000,
+    max_levels=4,
+    chunked=True,
+    npc_count=5000,
+    item_count=10000,
+    filler_structures=(
+        "Half Bathroom",
+        "Office",
+        "Conference Room",
+        "Library",
+        "Park",
+    ),
+)
+
+CITY_PROFILES = {"small": SMALL_CITY, "medium": MEDIUM_CITY, "huge": HUGE_CITY}
@@ -1,12 +1,82 @@
 import random
+from typing import Callable, Dict, Iterable
 
 from game.entities import tile_types
 from game.entities import entity_factory
 from game.map_gen.rectangular_room import RectangularRoom
 from game.map_gen.city_gen_utility import place_tile, place_tiles, place_entity
-from game.utils.utility import slices_to_xys
+from game.utils.profiling import PROFILER
+from game.utils.utility import random_xy, slices_size, slices_to_grid
+
+
+class RoomGenerator:
+    """A registered room or structure type and the function that furnishes it.
+
+    The footprint says what a room needs for the function to work: its
+    minimum width and height (walls included) and whether it needs a door.
+    Generators with `building=False` fill a whole city block at street level
+    instead of the rooms of a building.
+
+    Calls are timed by the profiler under ("room", name), and rooms left bare
+    are counted under ("room_skipped", name).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        function: Callable,
+        min_width: int = 0,
+        min_height: int = 0,
+        needs_door: bool = False,
+        building: bool = True,
+    ):
+        self.name = name
+        self.function = function
+        self.min_width = min_width
+        self.min_height = min_height
+        self.needs_door = needs_door
+        self.building = building
+
+    def fits(self, structure) -> bool:
+        if structure.width < self.min_width or structure.height < self.min_height:
+            return False
+        return not self.needs_door or getattr(structure, "door", None) is not None
+
+    def __call__(self, city, level, structure) -> None:
+        """Furnish `structure`, or leave it bare if it doesn't fit the footprint."""
+        if not self.fits(structure):
+            PROFILER.count("room_skipped", self.name)
+            return
+        with PROFILER.measure("room", self.name):
+            self.function(city, level, structure)
+
+
+ROOM_GENERATORS: Dict[str, RoomGenerator] = {}
+
+
+def register_room(name: str, **footprint) -> Callable[[Callable], Callable]:
+    """Register the decorated function as the generator for `name` rooms."""
+
+    def decorator(function: Callable) -> Callable:
+        if name in ROOM_GENERATORS:
+            raise ValueError(f"A room generator for {name!r} is already registered")
+        ROOM_GENERATORS[name] = RoomGenerator(name, function, **footprint)
+        return function
+
+    return decorator
 
 
+def check_room_types(room_types: Iterable[str]) -> None:
+    """Raise ValueError if any of `room_types` has no registered generator."""
+    unknown = sorted(set(room_types) - ROOM_GENERATORS.keys())
+    if unknown:
+        raise ValueError(
+            f"No room generator for {', '.join(map(repr, unknown))}; "
+            f"known types are {', '.join(map(repr, sorted(ROOM_GENERATORS)))}"
+        )
+
+
+@register_room("Half Bathroom", min_width=4, min_height=4, needs_door=True)
 def generate_half_bathroom(city, level, structure):
 
     spot = random.choice(structure.along_inside_walls)
@@ -18,8 +88,9 @@ def generate_half_bathroom(city, level, structure):
     place_tile(city, level, spot_2, [tile_types.toilet], True)
 
 
+@register_room("Office", min_width=4, min_height=4)
 def generate_office(city, level, structure):
-    size = len(slices_to_xys(*structure.inner))
+    size = slices_size(*structure.inner)
     bookshelf_spots = random.choices(structure.along_inside_walls, k=max(1, size // 3))
     x, y = structure.center
     place_tiles(city, level, bookshelf_spots, tile_types.BOOKCASE_TILES, False)
@@ -31,8 +102,9 @@ def generate_office(city, level, structure):
         computer_desk.information.add_page("Hello! I should be on page 3!")
 
 
+@register_room("Conference Room", min_width=4, min_height=4)
 def generate_conference_room(city, level, structure):
-    size = len(slices_to_xys(*structure.inner))
+    size = slices_size(*structure.inner)
     room = structure
     if structure.width >= 9 and structure.height >= 9:
         room = RectangularRoom(
@@ -52,39 +124,39 @@ def generate_conference_room(city, level, structure):
             structure.width - 2,
             structure.height - 2,
         )
-    xs = [x for x, y in room.along_inside_walls]
-    ys = [y for x, y in room.along_inside_walls]
-    min_x, max_x = min(xs), max(xs)
-    min_y, max_y = min(ys), max(ys)
-
-    corners = {(min_x, min_y), (min_x, max_y), (max_x, min_y), (max_x, max_y)}
-
-    along_wo_corners = [spot for spot in room.along_inside_walls if spot not in corners]
-    place_tiles(city, level, along_wo_corners, [tile_types.chair_horiz])
+    along_wo_corners = room.along_inside_walls_mask.copy()
+    along_wo_corners[[0, 0, -1, -1], [0, -1, 0, -1]] = False
+    place_tiles(
+        city, level, room.inner, [tile_types.chair_horiz], mask=along_wo_corners
+    )
     place_tiles(city, level, room.inner_away_from_walls, [tile_types.table])
 
 
+@register_room("Library", min_width=3, min_height=3)
 def generate_library(city, level, structure):
-    inner = slices_to_xys(*structure.inner)
-    ys = [y for x, y in inner]
-    min_y, max_y = min(ys), max(ys)
-    bookshelf_spots = [
-        s for s in inner if s[0] % 2 == 0 and s[1] != min_y and s[1] != max_y
-    ]
-    place_tiles(city, level, bookshelf_spots, tile_types.BOOKCASE_TILES, False)
-
-
+    xs, ys = slices_to_grid(*structure.inner)
+    # Shelves every other column, counted from the wall so they line up the
+    # same way wherever the building is.
+    columns = (xs - structure.x1) % 2 == 0
+    bookshelf_spots = columns & (ys != ys.min()) & (ys != ys.max())
+    place_tiles(
+        city,
+        level,
+        structure.inner,
+        tile_types.BOOKCASE_TILES,
+        False,
+        mask=bookshelf_spots,
+    )
+
+
+@register_room("Park", building=False)
 def generate_park(city, level, structure):
     num_trees = 5
     place_tiles(city, level, structure.area, tile_types.GRASS_TILES)
-    spots = random.choices(slices_to_xys(*structure.area), k=num_trees)
+    spots = [random_xy(*structure.area) for _ in range(num_trees)]
     place_tiles(city, level, spots, tile_types.TREE_TILES)
 
 
-ROOM_FUNCTIONS = {
-    "Conference Room": generate_conference_room,
-    "Library": generate_library,
-    "Office": generate_office,
-    "Half Bathroom": generate_half_bathroom,
-    "Park": generate_park,
-}
+@register_room("MDU")
+def generate_mdu(city, level, structure):
+    """Multi-dwelling units are left as bare rooms for now."""
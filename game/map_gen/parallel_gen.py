@@ -0,0 +1,169 @@
+"""Build the structures of a city in worker processes.
+
+Buildings only touch their own rectangle, plus the tiles just outside their
+doors.  Each one is built on a small canvas holding a copy of those tiles, then
+the canvases are composited back onto the city.  Interiors a lazy city
+defers are handed back, and furnished later on a canvas over the same part
+of the city.  Tiles travel between the
+processes as tile ids, which are a fraction of the size of tile records.
+Profiler totals made in the workers, such as room generator timings, are
+handed back too.
+"""
+
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Collection, Dict, List, Optional, Tuple
+
+import numpy as np  # type: ignore
+
+from game.entities.tile_types import TILES
+from game.map_gen.city_gen import build_structure
+from game.map_gen.city_profile import CityProfile
+from game.map_gen.rectangular_room import RectangularRoom
+from game.utils.profiling import PROFILER
+
+
+class StructureCanvas:
+    """Just enough of a GameMap to build one structure on."""
+
+    def __init__(
+        self,
+        tiles: np.ndarray,
+        lazy_interiors: bool = False,
+        furnished_levels: Collection[int] = (),
+    ):
+        self.tiles = tiles
+        self.max_levels, self.width, self.height = tiles.shape
+        self.entities = set()
+        # Interiors deferred like GameMap.add_interior would, as (level, furnish).
+        self.lazy_interiors = lazy_interiors
+        self.furnished_levels = furnished_levels
+        self.pending_interiors: List[Tuple[int, Callable]] = []
+
+    def add_interior(self, level: int, furnish, area=None) -> None:
+        if self.lazy_interiors and level not in self.furnished_levels:
+            self.pending_interiors.append((level, furnish))
+        else:
+            furnish(self)
+
+
+# (index, seed, x, y, width, height, structure_type, profile, tile ids,
+#  lazy_interiors, furnished_levels)
+StructureJob = Tuple[
+    int, int, int, int, int, int, str, CityProfile, np.ndarray, bool, Tuple[int, ...]
+]
+
+
+def build_on_canvas(job: StructureJob):
+    """Build a structure on its own canvas and return what it made.
+
+    That is its tile ids, its entities, its door, its deferred interiors and
+    the profiler totals made building it, if the profiler is enabled.
+    """
+    (
+        index,
+        seed,
+        x,
+        y,
+        width,
+        height,
+        structure_type,
+        profile,
+        ids,
+        lazy_interiors,
+        furnished_levels,
+    ) = job
+    if PROFILER.enabled:
+        # Forked workers start with a copy of the parent's totals.
+        PROFILER.take_totals()
+    canvas = StructureCanvas(TILES[ids], lazy_interiors, furnished_levels)
+    structure = RectangularRoom(x, y, width, height)
+    build_structure(canvas, structure, structure_type, profile, seed)
+
+    for entity in canvas.entities:
+        entity.parent = None
+    return (
+        index,
+        canvas.tiles["id"],
+        list(canvas.entities),
+        structure.door,
+        canvas.pending_interiors,
+        PROFILER.take_totals() if PROFILER.enabled else None,
+    )
+
+
+def generate_structures_in_parallel(
+    city,
+    structures_and_types,
+    profile: CityProfile,
+    seeds: List[int],
+    workers: int,
+) -> None:
+    """Build every structure in a pool of `workers` processes."""
+    structures = list(structures_and_types)
+    windows: Dict[int, Tuple[slice, slice]] = {}
+    jobs = []
+    for index, (structure, structure_type) in enumerate(structures_and_types.items()):
+        # One tile of margin for the reserved floor outside exterior doors.
+        x1, x2 = max(0, structure.x1 - 1), min(city.width, structure.x2 + 2)
+        y1, y2 = max(0, structure.y1 - 1), min(city.height, structure.y2 + 2)
+        windows[index] = slice(x1, x2), slice(y1, y2)
+        jobs.append(
+            (
+                index,
+                seeds[index],
+                structure.x1 - x1,
+                structure.y1 - y1,
+                structure.width,
+                structure.height,
+                structure_type,
+                profile,
+                city.tiles[:, x1:x2, y1:y2]["id"],
+                city.lazy_interiors,
+                tuple(city.furnished_levels),
+            )
+        )
+
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for index, ids, entities, door, interiors, totals in executor.map(
+            build_on_canvas, jobs, chunksize=chunksize
+        ):
+            if totals is not None:
+                PROFILER.merge_totals(totals)
+            window = windows[index]
+            composite(city, window, ids, entities)
+            sx, sy = window
+            if door is not None:
+                structures[index].add_door(door[0] + sx.start, door[1] + sy.start)
+            for level, furnish in interiors:
+                city.add_interior(
+                    level,
+                    functools.partial(furnish_window, furnish, window),
+                    (sx.start, sy.start, sx.stop, sy.stop),
+                )
+
+
+def furnish_window(furnish, window: Tuple[slice, slice], city) -> None:
+    """Run an interior deferred by a canvas, on the part of `city` it covered."""
+    sx, sy = window
+    canvas = StructureCanvas(np.array(city.tiles[:, sx, sy]))
+    furnish(canvas)
+    composite(city, window, canvas.tiles["id"], list(canvas.entities))
+
+
+def composite(
+    city, window: Tuple[slice, slice], ids: np.ndarray, entities: Optional[list]
+) -> None:
+    """Copy the tile ids of a built canvas onto the city, and its entities."""
+    sx, sy = window
+    target = city.tiles[:, sx, sy]
+    # Only copy what changed, so overlapping margins can't undo each other.
+    changed = target["id"] != ids
+    target[changed] = TILES[ids[changed]]
+
+    for entity in entities or ():
+        entity.x += sx.start
+        entity.y += sy.start
+        entity.parent = city
+        city.entities.add(entity)
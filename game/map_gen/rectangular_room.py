@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+from functools import cached_property
+from typing import Tuple
+
 from game.map_gen.rectangular_structure import RectangularStructure
 
 
@@ -23,7 +26,7 @@ class RectangularRoom(RectangularStructure):
                 return self.down_inside_wall
             elif self.door[1] == self.y + self.h:
                 return self.up_inside_wall
-        return []
+        return ()
 
     @property
     def inside_wall_same_as_door(self):
@@ -36,7 +39,7 @@ class RectangularRoom(RectangularStructure):
                 return self.up_inside_wall
             elif self.door[1] == self.y + self.h:
                 return self.down_inside_wall
-        return []
+        return ()
 
     @property
     def inside_wall_left_of_door(self):
@@ -49,41 +52,33 @@ class RectangularRoom(RectangularStructure):
                 return self.right_inside_wall
             elif self.door[1] == self.y + self.h:
                 return self.left_inside_wall
-        return []
+        return ()
 
     @property
     def inside_wall_right_of_door(self):
         if self.door:
             if self.door[0] == self.x:
-                return self.down_inside_wall_inside_wall
+                return self.down_inside_wall
             elif self.door[0] == self.x + self.w:
                 return self.up_inside_wall
             elif self.door[1] == self.y:
                 return self.left_inside_wall
             elif self.door[1] == self.y + self.h:
                 return self.right_inside_wall
-        return []
+        return ()
 
-    @property
-    def left_inside_wall(self):
-        spots = []
-        spots.extend((self.x1 + 1, y) for y in range(self.y1 + 1, self.y2))
-        return spots
+    @cached_property
+    def left_inside_wall(self) -> Tuple[Tuple[int, int], ...]:
+        return tuple((self.x1 + 1, y) for y in range(self.y1 + 1, self.y2))
 
-    @property
-    def right_inside_wall(self):
-        spots = []
-        spots.extend((self.x2 - 1, y) for y in range(self.y1 + 1, self.y2))
-        return spots
+    @cached_property
+    def right_inside_wall(self) -> Tuple[Tuple[int, int], ...]:
+        return tuple((self.x2 - 1, y) for y in range(self.y1 + 1, self.y2))
 
-    @property
-    def down_inside_wall(self):
-        spots = []
-        spots.extend((x, self.y2 - 1) for x in range(self.x1 + 1, self.x2))
-        return spots
+    @cached_property
+    def down_inside_wall(self) -> Tuple[Tuple[int, int], ...]:
+        return tuple((x, self.y2 - 1) for x in range(self.x1 + 1, self.x2))
 
-    @property
-    def up_inside_wall(self):
-        spots = []
-        spots.extend((x, self.y1 + 1) for x in range(self.x1 + 1, self.x2))
-        return spots
+    @cached_property
+    def up_inside_wall(self) -> Tuple[Tuple[int, int], ...]:
+        return tuple((x, self.y1 + 1) for x in range(self.x1 + 1, self.x2))
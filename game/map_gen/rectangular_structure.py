@@ -1,10 +1,20 @@
 from __future__ import annotations
 
+from functools import cached_property
 from typing import List, Tuple
+
+import numpy as np  # type: ignore
+
 from game.utils.utility import slices_to_xys
 
 
 class RectangularStructure:
+    """An axis-aligned rectangle on the map, walls included.
+
+    Structures are not moved or resized once made, so their geometry is worked
+    out on first use and cached.
+    """
+
     def __init__(self, x: int, y: int, width: int, height: int):
         self.x1 = x
         self.y1 = y
@@ -129,8 +139,8 @@ class RectangularStructure:
 
         return coords
 
-    @property
-    def edges_and_corners(self) -> List[Tuple[int, int]]:
+    @cached_property
+    def edges_and_corners(self) -> Tuple[Tuple[int, int], ...]:
         return self.edges + self.corners
 
     @property
@@ -149,44 +159,58 @@ class RectangularStructure:
     def bottom_right_corner(self) -> Tuple[int, int]:
         return self.x2, self.y2
 
-    @property
-    def corners(self) -> List[Tuple[int, int]]:
-        return [
+    @cached_property
+    def corners(self) -> Tuple[Tuple[int, int], ...]:
+        return (
             self.top_left_corner,
             self.top_right_corner,
             self.bottom_left_corner,
             self.bottom_right_corner,
-        ]
+        )
 
-    @property
-    def vertical_edges(self) -> List[Tuple[int, int]]:
-        vertical_tiles = []
+    @cached_property
+    def vertical_edges(self) -> Tuple[Tuple[int, int], ...]:
         #  Left and right edges, excluding corners to avoid duplicates
-        for y in range(self.y1 + 1, self.y2):
-            vertical_tiles.extend(((self.x1, y), (self.x2, y)))
-        return vertical_tiles
+        return tuple(
+            spot
+            for y in range(self.y1 + 1, self.y2)
+            for spot in ((self.x1, y), (self.x2, y))
+        )
 
-    @property
-    def horizontal_edges(self) -> List[Tuple[int, int]]:
-        horizontal_tiles = []
+    @cached_property
+    def horizontal_edges(self) -> Tuple[Tuple[int, int], ...]:
         # Top and bottom edges
-        for x in range(self.x1 + 1, self.x2):
-            horizontal_tiles.extend(((x, self.y1), (x, self.y2)))
-        return horizontal_tiles
+        return tuple(
+            spot
+            for x in range(self.x1 + 1, self.x2)
+            for spot in ((x, self.y1), (x, self.y2))
+        )
 
-    @property
-    def edges(self) -> List[Tuple[int, int]]:
+    @cached_property
+    def edges(self) -> Tuple[Tuple[int, int], ...]:
         return self.horizontal_edges + self.vertical_edges
 
-    @property
-    def along_inside_walls(self) -> List[Tuple[int, int]]:
+    @cached_property
+    def along_inside_walls(self) -> Tuple[Tuple[int, int], ...]:
         spots = []
         for x in range(self.x1 + 1, self.x2):
             spots.extend(((x, self.y1 + 1), (x, self.y2 - 1)))
         for y in range(self.y1 + 1, self.y2):
             spots.extend(((self.x1 + 1, y), (self.x2 - 1, y)))
-        return spots
+        return tuple(spots)
+
+    @cached_property
+    def inner_away_from_walls(self) -> Tuple[Tuple[int, int], ...]:
+        return tuple(
+            slices_to_xys(
+                slice(self.x1 + 2, self.x2 - 1), slice(self.y1 + 2, self.y2 - 1)
+            )
+        )
 
-    @property
-    def inner_away_from_walls(self) -> List[Tuple[int, int]]:
-        return list(set(slices_to_xys(*self.inner)) - set(self.along_inside_walls))
+    @cached_property
+    def along_inside_walls_mask(self) -> np.ndarray:
+        """A read-only mask over `inner` that is True next to the walls."""
+        mask = np.ones((max(0, self.width - 1), max(0, self.height - 1)), dtype=bool)
+        mask[1:-1, 1:-1] = False
+        mask.flags.writeable = False
+        return mask
@@ -0,0 +1,95 @@
+"""Spawn many entities at once on distinct free cells inside structures."""
+
+import random
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import numpy as np  # type: ignore
+
+from game.entities import entity_factory
+from game.entities import tile_types
+
+# (cumulative chance, entity_factory name) for each randomly generated item.
+ITEM_CHANCES = [
+    (0.2, "lightning_scroll"),
+    (0.5, "confusion_scroll"),
+    (0.7, "health_potion"),
+    (1.0, "fireball_scroll"),
+]
+
+
+def random_item_names(count: int) -> List[str]:
+    """Roll `count` item names from ITEM_CHANCES."""
+    names = []
+    for _ in range(count):
+        val = random.random()
+        names.append(next(name for chance, name in ITEM_CHANCES if val <= chance))
+    return names
+
+
+def occupied_cells(city, level: int) -> np.ndarray:
+    """Return a (2, N) array of the cells entities are standing on."""
+    cells = [(e.x, e.y) for e in city.entities if e.level == level]
+    return np.array(cells, dtype=int).reshape(-1, 2).T
+
+
+def free_cells(
+    city, level: int, area, occupied: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Return a mask over `area` of empty tiles that no entity is standing on."""
+    sx, sy = area
+    free = tile_types.in_category(city.tiles[level][sx, sy], tile_types.EMPTY)
+    if occupied is None:
+        occupied = occupied_cells(city, level)
+    x, y = occupied[0] - sx.start, occupied[1] - sy.start
+    inside = (0 <= x) & (x < free.shape[0]) & (0 <= y) & (y < free.shape[1])
+    free[x[inside], y[inside]] = False
+    return free
+
+
+def spawn_entities(
+    city,
+    level: int,
+    structures_and_types: Mapping,
+    prototypes: Sequence,
+    weights: Optional[Dict[str, float]] = None,
+) -> list:
+    """Spawn each of `prototypes` on its own free cell inside the structures.
+
+    Structures are picked in proportion to the weight of their type (1.0 if
+    it is not in `weights`), then a free cell within them.  Every prototype
+    gets a cell unless the structures run out of free ones.
+    """
+    weights = weights or {}
+    occupied = occupied_cells(city, level)
+    xs, ys, cell_weights = [], [], []
+    for structure, structure_type in structures_and_types.items():
+        weight = weights.get(structure_type, 1.0)
+        if weight <= 0:
+            continue
+        sx, sy = structure.inner
+        free_x, free_y = np.nonzero(free_cells(city, level, structure.inner, occupied))
+        if not len(free_x):
+            continue
+        xs.append(free_x + sx.start)
+        ys.append(free_y + sy.start)
+        cell_weights.append(np.full(len(free_x), weight / len(free_x)))
+    if not xs or not prototypes:
+        return []
+
+    xs, ys = np.concatenate(xs), np.concatenate(ys)
+    p = np.concatenate(cell_weights)
+    count = min(len(prototypes), len(p))
+    # Seeded from `random` so generation stays reproducible from one seed.
+    rng = np.random.default_rng(random.getrandbits(64))
+    chosen = rng.choice(len(p), size=count, replace=False, p=p / p.sum())
+
+    return [
+        prototype.spawn(city, level, int(xs[i]), int(ys[i]))
+        for prototype, i in zip(prototypes, chosen)
+    ]
+
+
+def spawn_by_name(city, level: int, structures_and_types: Mapping, names, weights=None):
+    """`spawn_entities` for a list of entity_factory names."""
+    prototypes = [getattr(entity_factory, name) for name in names]
+    return spawn_entities(city, level, structures_and_types, prototypes, weights)
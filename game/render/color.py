@@ -1,9 +1,9 @@
-import game.render.ultracolors as c
-
-white = c.WHITE
-black = c.BLACK
-red = c.RED
-blue = c.BLUE
+# The values of ultracolors.WHITE and so on.  ultracolors has hundreds of
+# them, and this module is imported by the main menu, so they are copied.
+white = (255, 255, 255)
+black = (0, 0, 0)
+red = (255, 0, 0)
+blue = (0, 0, 255)
 
 
 player_atk = (224, 224, 224)
@@ -22,14 +22,14 @@ welcome_text = (32, 160, 255)
 health_recovered = (0, 255, 0)
 
 
-bar_text = c.WHITE
-bar_filled = c.GREEN_4
+bar_text = white
+bar_filled = (0, 139, 0)
 bar_empty = (64, 16, 16)
 
 menu_title = (255, 255, 63)
-menu_text = c.WHITE
+menu_text = white
 
-soil = c.VERY_DARK_BROWN
+soil = (92, 64, 51)
 dark_soil = (72, 44, 31)
 
 wall = (109, 85, 55)
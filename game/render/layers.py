@@ -0,0 +1,89 @@
+"""Off-screen consoles that keep what was drawn on them between frames.
+
+Modal screens are drawn over a game state that doesn't change while they are
+up, so that state needn't be drawn again every frame.  Each named layer is a
+persistent console that is only repainted when it is drawn for another owner,
+or when the key it was painted for changes, and is otherwise just blitted, so a popup over the game costs one
+blit per frame however much is underneath it.  Owners are only weakly
+referenced, so a layer doesn't keep a dismissed screen, or the game behind
+it, alive.  A layer must not be painted from within its own painter.
+"""
+
+import weakref
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import tcod.console
+
+Painter = Callable[[tcod.console.Console], None]
+
+# The key of a layer that hasn't been painted yet.
+_UNPAINTED = object()
+
+
+class Layer:
+    def __init__(self) -> None:
+        self.console: Optional[tcod.console.Console] = None
+        self.owner: Optional[weakref.ref] = None
+        self.key: Hashable = _UNPAINTED
+
+
+class LayerManager:
+    def __init__(self) -> None:
+        self.layers: Dict[str, Layer] = {}
+        # Counters, for profiling.
+        self.repaints = 0
+        self.blits = 0
+
+    def layer(
+        self,
+        name: str,
+        width: int,
+        height: int,
+        owner: Any,
+        key: Hashable,
+        paint: Painter,
+    ) -> tcod.console.Console:
+        """Return the console of layer `name`, painted by `paint` for `owner`.
+
+        The layer is only repainted if it was last painted for another owner,
+        another key or at another size.  Keys should not refer to the owner.
+        """
+        layer = self.layers.get(name)
+        if layer is None:
+            layer = self.layers[name] = Layer()
+        console = layer.console
+        if console is None or (console.width, console.height) != (width, height):
+            console = layer.console = tcod.console.Console(width, height, order="F")
+            layer.key = _UNPAINTED
+        painted_for = layer.owner() if layer.owner is not None else None
+        if painted_for is not owner or layer.key is _UNPAINTED or layer.key != key:
+            console.clear()
+            paint(console)
+            layer.owner = weakref.ref(owner)
+            layer.key = key
+            self.repaints += 1
+        return console
+
+    def draw(
+        self,
+        name: str,
+        console: tcod.console.Console,
+        owner: Any,
+        key: Hashable,
+        paint: Painter,
+        x: int = 0,
+        y: int = 0,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+    ) -> None:
+        """Blit layer `name` onto `console` at (x, y), repainting it if needed.
+
+        The layer covers the rest of `console` unless given a size.
+        """
+        width = console.width - x if width is None else width
+        height = console.height - y if height is None else height
+        self.layer(name, width, height, owner, key, paint).blit(console, x, y)
+        self.blits += 1
+
+
+LAYERS = LayerManager()
@@ -1,9 +1,10 @@
-from typing import Iterable, List, Reversible, Tuple
+from typing import Iterable, List, Optional, Sequence, Tuple
 import textwrap
 
 import tcod
 
 import game.render.color as color
+from game.utils.profiling import profiled
 
 
 class Message:
@@ -41,6 +42,7 @@ class MessageLog:
         else:
             self.messages.append(Message(text, fg))
 
+    @profiled("render", "log")
     def render(
         self,
         console: tcod.console.Console,
@@ -73,15 +75,18 @@ class MessageLog:
         y: int,
         width: int,
         height: int,
-        messages: Reversible[Message],
+        messages: Sequence[Message],
+        end: Optional[int] = None,
     ) -> None:
         """Render the messages provided.
         The `messages` are rendered starting at the last message and working
-        backwards.
+        backwards.  Pass `end` to render only the messages before that index.
         """
+        end = len(messages) if end is None else end
         # Messages Flow Downwards
         y_offset = 1
-        for message in messages[-height // 2 :]:
+        for index in range(max(0, end - (height + 1) // 2), end):
+            message = messages[index]
             for idx, line in enumerate(list(cls.wrap(message.full_text, width))):
                 indent = 0
                 if idx > 0:
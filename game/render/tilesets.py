@@ -0,0 +1,120 @@
+"""Load font tilesheets once, and switch between them at runtime.
+
+Decoding a sheet means decoding its PNG and cutting it into glyphs.  For big
+sheets the glyphs are saved next to the sheet as an `.atlas.npz` file, keyed
+by a hash of the sheet and its layout, so later launches skip the PNG
+decoding.  Tilesets that have been loaded are kept in memory, so switching
+back to one is instant.
+"""
+
+import hashlib
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Sequence
+
+import numpy as np  # type: ignore
+import tcod
+
+FONTS_FOLDER = Path("game/data/fonts")
+
+# Smaller sheets decode about as fast as their atlas loads, so aren't cached.
+ATLAS_MIN_PIXELS = 512 * 512
+
+
+class FontSheet(NamedTuple):
+    filename: str
+    columns: int
+    rows: int
+    charmap: Sequence[int]
+
+
+# The first font is the default.
+FONTS = [
+    FontSheet("JK_Fnord_16x16.png", 16, 16, tcod.tileset.CHARMAP_CP437),
+    FontSheet("Fnord_16x16.png", 16, 16, tcod.tileset.CHARMAP_CP437),
+    FontSheet("MRC_square_16x16.png", 16, 16, tcod.tileset.CHARMAP_CP437),
+    FontSheet("JK_Raving_1280x400.png", 16, 16, tcod.tileset.CHARMAP_CP437),
+    FontSheet("Raving_1280x400.png", 16, 16, tcod.tileset.CHARMAP_CP437),
+    FontSheet("Cheepicus_12x12.png", 16, 16, tcod.tileset.CHARMAP_CP437),
+    FontSheet("dejavu10x10_gs_tc.png", 32, 8, tcod.tileset.CHARMAP_TCOD),
+    FontSheet("Hack_square_64x64.png", 16, 16, tcod.tileset.CHARMAP_CP437),
+]
+
+
+class TilesetManager:
+    """Hands out tilesets for FONTS, decoding each sheet at most once."""
+
+    def __init__(self, fonts: Sequence[FontSheet] = FONTS, folder: Path = FONTS_FOLDER):
+        self.fonts: List[FontSheet] = list(fonts)
+        self.folder = folder
+        self.index = 0
+        self.loaded: Dict[str, tcod.tileset.Tileset] = {}
+
+    @property
+    def font(self) -> FontSheet:
+        return self.fonts[self.index]
+
+    def current(self) -> tcod.tileset.Tileset:
+        return self.get(self.font)
+
+    def next_font(self) -> tcod.tileset.Tileset:
+        """Move on to the next font and return its tileset."""
+        self.index = (self.index + 1) % len(self.fonts)
+        return self.current()
+
+    def get(self, font: FontSheet) -> tcod.tileset.Tileset:
+        tileset = self.loaded.get(font.filename)
+        if tileset is None:
+            tileset = self.load(font)
+            self.loaded[font.filename] = tileset
+        return tileset
+
+    def load(self, font: FontSheet) -> tcod.tileset.Tileset:
+        """Load a sheet from its cached atlas, decoding and caching it if needed."""
+        path = self.folder / font.filename
+        atlas_path = self.atlas_path(font, sheet_digest(path, font))
+        try:
+            with np.load(atlas_path) as atlas:
+                return tileset_from_glyphs(atlas["codepoints"], atlas["glyphs"])
+        except (OSError, KeyError, ValueError):
+            pass  # Not cached yet, or the cache is damaged.
+
+        tileset = tcod.tileset.load_tilesheet(
+            path, font.columns, font.rows, font.charmap
+        )
+        pixels = tileset.tile_width * tileset.tile_height * font.columns * font.rows
+        if pixels >= ATLAS_MIN_PIXELS:
+            try:
+                self.store_atlas(atlas_path, tileset, font)
+            except OSError:
+                pass  # Read-only installs just decode the sheet every time.
+        return tileset
+
+    def atlas_path(self, font: FontSheet, digest: str) -> Path:
+        return self.folder / f"{Path(font.filename).stem}-{digest}.atlas.npz"
+
+    def store_atlas(
+        self, atlas_path: Path, tileset: tcod.tileset.Tileset, font: FontSheet
+    ) -> None:
+        codepoints = np.array(list(dict.fromkeys(font.charmap)), dtype=np.int32)
+        glyphs = np.stack([tileset.get_tile(int(cp)) for cp in codepoints])
+        # Atlases of an older version of this sheet are never used again.
+        for old_atlas in self.folder.glob(f"{Path(font.filename).stem}-*.atlas.npz"):
+            old_atlas.unlink()
+        np.savez(atlas_path, codepoints=codepoints, glyphs=glyphs)
+
+
+def sheet_digest(path: Path, font: FontSheet) -> str:
+    """Hash a sheet's image and layout."""
+    digest = hashlib.blake2b(path.read_bytes(), digest_size=8)
+    digest.update(repr((font.columns, font.rows, tuple(font.charmap))).encode())
+    return digest.hexdigest()
+
+
+def tileset_from_glyphs(
+    codepoints: np.ndarray, glyphs: np.ndarray
+) -> tcod.tileset.Tileset:
+    """Build a tileset from (count, height, width, 4) RGBA glyphs."""
+    tileset = tcod.tileset.Tileset(glyphs.shape[2], glyphs.shape[1])
+    for codepoint, glyph in zip(codepoints.tolist(), glyphs):
+        tileset.set_tile(codepoint, glyph)
+    return tileset
@@ -0,0 +1,319 @@
+"""Timings of the expensive parts of a turn or frame, and of every action.
+
+Functions decorated with `profiled` are timed under a (category, name) key,
+and `PROFILER.measure` does the same for a block.  Every `Action.perform` is
+timed under the action's class name too, and every `BaseAI.perform` under the
+AI's, see `profiled_perform`.  Timings nest, so an action performed by another
+one (a BumpAction becoming a MovementAction) is counted as its own entry and
+as time spent inside its caller.  While the profiler is disabled, each hook
+only checks a flag, so they can stay on hot paths.
+
+The profiler is enabled while its overlay is shown, toggled in game with
+keys.PROFILER_KEY, which draws the recent timings with `render_profiler`.  It
+is also enabled for the whole session when the DATAROGUE_INSTRUMENT
+environment variable names a file.  When the game exits the totals are written
+there, as JSON if the name ends in `.json` and as a cProfile-compatible dump
+otherwise, which can be read with `python -m pstats <file>` or snakeviz.
+"""
+
+import atexit
+import functools
+import json
+import marshal
+import os
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+ENVIRONMENT_VARIABLE = "DATAROGUE_INSTRUMENT"
+
+# (category, name), e.g. ("action", "BumpAction") or ("render", "map").
+Key = Tuple[str, str]
+
+# Timings shown by the overlay, in order, with their labels.
+OVERLAY_TIMINGS = [
+    (("render", "frame"), "Frame"),
+    (("render", "map"), "Map"),
+    (("render", "log"), "Log"),
+    (("turn", "enemy_turns"), "Enemies"),
+    (("turn", "update_fov"), "FOV"),
+]
+
+
+class CallStats:
+    __slots__ = ("calls", "primitive_calls", "own_time", "total_time", "worst")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.primitive_calls = 0  # Calls that weren't inside a call of the same key.
+        self.own_time = 0.0  # Excluding the time spent in nested timings.
+        self.total_time = 0.0
+        self.worst = 0.0
+
+    def add(self, other: "CallStats") -> None:
+        self.calls += other.calls
+        self.primitive_calls += other.primitive_calls
+        self.own_time += other.own_time
+        self.total_time += other.total_time
+        self.worst = max(self.worst, other.worst)
+
+
+# The stats, callers and counters of a profiler, see `Profiler.take_totals`.
+Totals = Tuple[Dict[Key, CallStats], Dict[Key, Dict[Key, CallStats]], Dict[Key, int]]
+
+
+class _Frame:
+    __slots__ = ("key", "start", "child_time", "recursive")
+
+    def __init__(self, key: Key, start: float, recursive: bool):
+        self.key = key
+        self.start = start
+        self.child_time = 0.0
+        self.recursive = recursive
+
+
+class Profiler:
+    def __init__(self, window: int = 60, export_path: Optional[Path] = None):
+        self.overlay = False
+        # When set, the totals are kept for the whole session and written here.
+        self.export_path = export_path
+        self.enabled = export_path is not None
+        self.window = window
+        # The last `window` timings of each key, for the overlay.
+        self.timings: Dict[Key, Deque[float]] = {}
+        self.stats: Dict[Key, CallStats] = {}
+        # callee -> caller -> stats of the callee's calls from that caller.
+        self.callers: Dict[Key, Dict[Key, CallStats]] = {}
+        self.counters: Dict[Key, int] = {}
+        self._stack: List[_Frame] = []
+
+    def toggle(self) -> None:
+        """Show or hide the overlay."""
+        self.overlay = not self.overlay
+        self.enabled = self.overlay or self.export_path is not None
+        if not self.overlay:
+            self.timings.clear()
+
+    def reset(self) -> None:
+        self.timings.clear()
+        self.stats.clear()
+        self.callers.clear()
+        self.counters.clear()
+        self._stack.clear()
+
+    def take_totals(self) -> Totals:
+        """Return the totals so far and start them over.
+
+        Worker processes hand these back, for `merge_totals` in the parent.
+        """
+        totals = self.stats, self.callers, self.counters
+        self.stats, self.callers, self.counters = {}, {}, {}
+        return totals
+
+    def merge_totals(self, totals: Totals) -> None:
+        """Add the totals taken from the profiler of another process."""
+        stats, callers, counters = totals
+        for key, other in stats.items():
+            self.stats.setdefault(key, CallStats()).add(other)
+        for key, by_caller in callers.items():
+            merged = self.callers.setdefault(key, {})
+            for caller, other in by_caller.items():
+                merged.setdefault(caller, CallStats()).add(other)
+        for key, count in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + count
+
+    def count(self, category: str, name: str, amount: int = 1) -> None:
+        if self.enabled:
+            key = (category, name)
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def measure(self, category: str, name: str):
+        """Time a `with` block under (category, name), when enabled."""
+        if not self.enabled:
+            return nullcontext()
+        return self._measure((category, name))
+
+    @contextmanager
+    def _measure(self, key: Key) -> Iterator[None]:
+        recursive = any(frame.key == key for frame in self._stack)
+        frame = _Frame(key, time.perf_counter(), recursive)
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - frame.start
+            self._stack.pop()
+            caller = self._stack[-1] if self._stack else None
+            if caller is not None:
+                caller.child_time += elapsed
+            self._record(self.stats.setdefault(key, CallStats()), frame, elapsed)
+            if caller is not None:
+                by_caller = self.callers.setdefault(key, {})
+                self._record(
+                    by_caller.setdefault(caller.key, CallStats()), frame, elapsed
+                )
+            samples = self.timings.get(key)
+            if samples is None:
+                samples = self.timings[key] = deque(maxlen=self.window)
+            samples.append(elapsed)
+
+    @staticmethod
+    def _record(stats: CallStats, frame: _Frame, elapsed: float) -> None:
+        stats.calls += 1
+        stats.own_time += elapsed - frame.child_time
+        stats.worst = max(stats.worst, elapsed)
+        if not frame.recursive:
+            # Like cProfile, only the outermost call counts towards the total.
+            stats.primitive_calls += 1
+            stats.total_time += elapsed
+
+    def summary(self, key: Key) -> Optional[Tuple[float, float]]:
+        """Return the mean and worst of the recent timings of `key`, in ms."""
+        samples = self.timings.get(key)
+        if not samples:
+            return None
+        return sum(samples) / len(samples) * 1000, max(samples) * 1000
+
+    def to_dict(self) -> dict:
+        """Return the totals, slowest first, and the counters."""
+        timings = [
+            {
+                "category": category,
+                "name": name,
+                "calls": stats.calls,
+                "total_ms": stats.total_time * 1000,
+                "own_ms": stats.own_time * 1000,
+                "mean_ms": stats.total_time * 1000 / max(stats.primitive_calls, 1),
+                "worst_ms": stats.worst * 1000,
+            }
+            for (category, name), stats in self.stats.items()
+        ]
+        timings.sort(key=lambda timing: timing["total_ms"], reverse=True)
+        counters = [
+            {"category": category, "name": name, "count": count}
+            for (category, name), count in sorted(self.counters.items())
+        ]
+        return {"timings": timings, "counters": counters}
+
+    def export_json(self, path: Path) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def export_pstats(self, path: Path) -> None:
+        """Write the totals in the marshalled format pstats.Stats loads.
+
+        Each key becomes a function named after its name, in a file named
+        after its category, e.g. `action:0(BumpAction)`.
+        """
+
+        def function(key: Key) -> Tuple[str, int, str]:
+            return key[0], 0, key[1]
+
+        def row(stats: CallStats) -> tuple:
+            return (
+                stats.primitive_calls,
+                stats.calls,
+                stats.own_time,
+                stats.total_time,
+            )
+
+        dump = {
+            function(key): row(stats)
+            + (
+                {
+                    function(caller): row(caller_stats)
+                    for caller, caller_stats in self.callers.get(key, {}).items()
+                },
+            )
+            for key, stats in self.stats.items()
+        }
+        with open(path, "wb") as f:
+            marshal.dump(dump, f)
+
+    def export(self, path: Path) -> None:
+        """Write the totals to `path`, in the format its suffix asks for."""
+        path = Path(path)
+        if path.suffix.lower() == ".json":
+            self.export_json(path)
+        else:
+            self.export_pstats(path)
+
+
+def from_environment() -> Profiler:
+    """Return a profiler that is always enabled and exports its totals on exit,
+    if the environment asks for one."""
+    path = os.environ.get(ENVIRONMENT_VARIABLE)
+    profiler = Profiler(export_path=Path(path) if path else None)
+    if profiler.export_path is not None:
+        atexit.register(profiler.export, profiler.export_path)
+    return profiler
+
+
+PROFILER = from_environment()
+
+
+def profiled(category: str, name: Optional[str] = None) -> Callable:
+    """Decorate a function so PROFILER times its calls under (category, name).
+
+    `name` defaults to the function's qualified name.
+    """
+
+    def decorator(function: Callable) -> Callable:
+        key = (category, name or function.__qualname__)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return function(*args, **kwargs)
+            with PROFILER._measure(key):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def profiled_perform(perform: Callable) -> Callable:
+    """Wrap an Action's perform so calls are timed under the instance's class.
+
+    The category comes from the class's `profile_category`.
+    """
+
+    @functools.wraps(perform)
+    def wrapper(self, *args, **kwargs):
+        if not PROFILER.enabled:
+            return perform(self, *args, **kwargs)
+        with PROFILER._measure((self.profile_category, type(self).__name__)):
+            return perform(self, *args, **kwargs)
+
+    return wrapper
+
+
+def memory_usage_mb() -> Optional[float]:
+    """Resident memory of this process in MB, where the platform tells us."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def render_profiler(console, engine, x: int, y: int) -> None:
+    """Draw the recent timings, entity counts and memory use at (x, y)."""
+    for row, (key, label) in enumerate(OVERLAY_TIMINGS):
+        summary = PROFILER.summary(key)
+        text = "     -" if summary is None else f"{summary[0]:6.2f} /{summary[1]:6.2f}"
+        console.print(x=x, y=y + row, string=f"{label:<8}{text}")
+    row = len(OVERLAY_TIMINGS)
+
+    game_map = engine.game_map
+    actors = sum(1 for _ in game_map.actors)
+    console.print(
+        x=x, y=y + row, string=f"Entities {len(game_map.entities)} actors {actors}"
+    )
+    memory = memory_usage_mb()
+    if memory is not None:
+        console.print(x=x, y=y + row + 1, string=f"Memory  {memory:.0f} MB")
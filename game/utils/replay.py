@@ -0,0 +1,243 @@
+"""Record the input of a play session, and replay it headless.
+
+A recording is a JSON lines file.  The first line holds the seed the global
+`random` module was seeded with when the session started.  Every later line
+is an event that was passed to `handle_events`, with a fingerprint of the game
+state after it was handled.  Replaying seeds `random` the same way, starts at
+the main menu and feeds the events back as fast as they can be handled, so a
+recording is a reproducible workload for benchmarks, and a change in
+behaviour shows up as the first fingerprint that no longer matches.
+
+    DATAROGUE_RECORD=session.jsonl python main.py
+    python -m game.utils.replay session.jsonl [--render] [--repeat N]
+
+Sessions that continue a saved game depend on that save, so they only replay
+faithfully while it's unchanged.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import time
+import traceback
+import warnings
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Tuple
+
+import tcod.event
+
+RECORDING_VERSION = 1
+ENVIRONMENT_VARIABLE = "DATAROGUE_RECORD"
+
+
+def encode_event(event: tcod.event.Event) -> Optional[dict]:
+    """Return `event` as JSON data, or None if no handler responds to its type."""
+    if isinstance(event, tcod.event.KeyDown):
+        return {
+            "type": "KeyDown",
+            "scancode": int(event.scancode),
+            "sym": int(event.sym),
+            "mod": int(event.mod),
+            "repeat": bool(event.repeat),
+        }
+    if isinstance(event, tcod.event.Quit):
+        return {"type": "Quit"}
+    if not isinstance(event, (tcod.event.MouseMotion, tcod.event.MouseButtonDown)):
+        return None
+
+    # The handlers still read the deprecated tile attribute.
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        tile = event.tile
+        data = {"position": list(event.position), "tile": [int(tile.x), int(tile.y)]}
+        if isinstance(event, tcod.event.MouseMotion):
+            data["type"] = "MouseMotion"
+            data["motion"] = list(event.motion)
+            data["tile_motion"] = list(event.tile_motion)
+            data["state"] = int(event.state)
+        else:
+            data["type"] = "MouseButtonDown"
+            data["button"] = int(event.button)
+    return data
+
+
+def decode_event(data: dict) -> tcod.event.Event:
+    kind = data["type"]
+    if kind == "KeyDown":
+        return tcod.event.KeyDown(
+            data["scancode"],
+            tcod.event.KeySym(data["sym"]),
+            tcod.event.Modifier(data["mod"]),
+            data["repeat"],
+        )
+    if kind == "Quit":
+        return tcod.event.Quit()
+    if kind == "MouseMotion":
+        return tcod.event.MouseMotion(
+            position=tuple(data["position"]),
+            motion=tuple(data["motion"]),
+            tile=tuple(data["tile"]),
+            tile_motion=tuple(data["tile_motion"]),
+            state=data["state"],
+        )
+    if kind == "MouseButtonDown":
+        return tcod.event.MouseButtonDown(
+            pixel=tuple(data["position"]),
+            tile=tuple(data["tile"]),
+            button=data["button"],
+        )
+    raise ValueError(f"Unknown event type in recording: {kind!r}")
+
+
+def state_fingerprint(handler) -> str:
+    """Hash the parts of the game state that input can change."""
+    state: list = [type(handler).__name__]
+    engine = getattr(handler, "engine", None)
+    if engine is not None:
+        player = engine.player
+        state.append((player.x, player.y, player.level, player.fighter.hp))
+        state.append(len(player.inventory.items))
+        state.append(str(engine.clock.time))
+        state.append(
+            sorted(
+                (
+                    entity.name,
+                    entity.x,
+                    entity.y,
+                    entity.level,
+                    entity.fighter.hp if getattr(entity, "fighter", None) else -1,
+                )
+                for entity in engine.game_map.entities
+            )
+        )
+    return hashlib.blake2b(repr(state).encode(), digest_size=8).hexdigest()
+
+
+class Recorder:
+    """Write the events handled in a session to a recording."""
+
+    def __init__(self, path: Path, seed: int):
+        self.seed = seed
+        # Line buffered, so a crash still leaves a usable recording.
+        self.file = open(path, "w", encoding="utf-8", buffering=1)
+        self._write({"version": RECORDING_VERSION, "seed": seed})
+
+    @classmethod
+    def from_environment(cls) -> Optional["Recorder"]:
+        """Start recording to the file named by the environment, if any."""
+        path = os.environ.get(ENVIRONMENT_VARIABLE)
+        if not path:
+            return None
+        return cls(Path(path), random.getrandbits(64))
+
+    def record(self, event: tcod.event.Event, handler) -> None:
+        """Record `event`, once `handler` is the handler it resulted in."""
+        data = encode_event(event)
+        if data is not None:
+            self._write({"event": data, "state": state_fingerprint(handler)})
+
+    def close(self) -> None:
+        self.file.close()
+
+    def _write(self, line: dict) -> None:
+        self.file.write(json.dumps(line, separators=(",", ":")) + "\n")
+
+
+def load_recording(
+    path: Path,
+) -> Tuple[int, List[Tuple[tcod.event.Event, Optional[str]]]]:
+    """Return the seed and the (event, state fingerprint) pairs of a recording."""
+    with open(path, encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("version") != RECORDING_VERSION:
+            raise ValueError(
+                f"{path} is a version {header.get('version')} recording, "
+                f"expected version {RECORDING_VERSION}."
+            )
+        events = []
+        for line in f:
+            if line.strip():
+                data = json.loads(line)
+                events.append((decode_event(data["event"]), data.get("state")))
+    return header["seed"], events
+
+
+class ReplayResult(NamedTuple):
+    events: int
+    handle_seconds: float
+    render_seconds: float
+    # Index of the first event after which the state differed, if any.
+    divergence: Optional[int]
+
+
+def replay(
+    path: Path, render: bool = False, columns: int = 100, rows: int = 50
+) -> ReplayResult:
+    """Feed a recording to a fresh session, rendering off-screen if asked."""
+    import game.render.color as color
+    import game.utils.exceptions as exceptions
+    import game.world.setup_game as setup_game
+    from game.input.input_handlers import BaseEventHandler, EventHandler
+
+    seed, events = load_recording(path)
+    # Seeded after importing the game modules, like main does when recording.
+    setup_game.preload_game_modules()
+    setup_game.wait_for_game_modules()
+    random.seed(seed)
+    handler: BaseEventHandler = setup_game.MainMenu()
+    console = tcod.console.Console(columns, rows, order="F")
+    handle_seconds = render_seconds = 0.0
+    divergence = None
+    handled = 0
+
+    for index, (event, expected) in enumerate(events):
+        start = time.perf_counter()
+        try:
+            handler = handler.handle_events(event)
+        except (SystemExit, exceptions.QuitWithoutSaving):
+            break
+        except Exception:  # Handled like the main loop handles it.
+            if isinstance(handler, EventHandler):
+                handler.engine.message_log.add_message(
+                    traceback.format_exc(), color.error
+                )
+        handle_seconds += time.perf_counter() - start
+        handled += 1
+
+        if render:
+            start = time.perf_counter()
+            console.clear()
+            handler.on_render(console=console)
+            render_seconds += time.perf_counter() - start
+
+        if divergence is None and expected is not None:
+            if state_fingerprint(handler) != expected:
+                divergence = index
+
+    return ReplayResult(handled, handle_seconds, render_seconds, divergence)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording", type=Path)
+    parser.add_argument("--render", action="store_true", help="render each event")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    for run in range(args.repeat):
+        result = replay(args.recording, render=args.render)
+        total = result.handle_seconds + result.render_seconds
+        print(
+            f"run {run + 1}: {result.events} events, "
+            f"handling {result.handle_seconds * 1000:.1f} ms, "
+            f"rendering {result.render_seconds * 1000:.1f} ms, "
+            f"{result.events / total if total else 0:.0f} events/s"
+        )
+        if result.divergence is not None:
+            print(f"  state diverged from the recording at event {result.divergence}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,58 @@
+import hashlib
+import random
+from contextlib import contextmanager
+from typing import Tuple
+
+import numpy as np  # type: ignore
 from tcod import libtcodpy
 
 
 def slices_to_xys(sx: slice, sy: slice):
-    rx = range(sx.start or 0, sx.stop, sx.step or 1)
-    ry = range(sy.start or 0, sy.stop, sy.step or 1)
+    rx, ry = slice_range(sx), slice_range(sy)
     return [(x, y) for x in rx for y in ry]
 
 
+def slice_range(s: slice) -> range:
+    """Return the coordinates covered by a slice with a known stop."""
+    return range(s.start or 0, s.stop, s.step or 1)
+
+
+def slices_size(sx: slice, sy: slice) -> int:
+    """Return how many cells a pair of slices covers."""
+    return len(slice_range(sx)) * len(slice_range(sy))
+
+
+def slices_to_grid(sx: slice, sy: slice) -> Tuple[np.ndarray, np.ndarray]:
+    """Return 2D arrays of the x and y coordinate of every cell in a slice pair.
+
+    The arrays have the same shape as `array[sx, sy]`, so they can be used to
+    build masks over that window.
+    """
+    xs, ys = np.mgrid[sx, sy]
+    return xs, ys
+
+
+def random_xy(sx: slice, sy: slice) -> Tuple[int, int]:
+    """Pick a random cell from a slice pair without listing every cell."""
+    return random.choice(slice_range(sx)), random.choice(slice_range(sy))
+
+
 def change_text_color(text, fg):
     return f"{libtcodpy.COLCTRL_FORE_RGB:c}{fg[0]:c}{fg[1]:c}{fg[2]:c}{text}{libtcodpy.COLCTRL_STOP:c}"
+
+
+def derive_seed(seed: int, *keys) -> int:
+    """Return a stable sub-seed of `seed` for the given keys."""
+    digest = hashlib.blake2b(repr((seed, *keys)).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+@contextmanager
+def seeded_random(seed: int):
+    """Seed the global `random` module for a block, then restore its old state."""
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        yield
+    finally:
+        random.setstate(state)
@@ -0,0 +1,283 @@
+"""A GameMap that stores its tiles in square chunks created on demand."""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+from tcod.map import compute_fov
+from tcod import libtcodpy
+
+from game.entities import tile_types
+from game.world.game_map import GameMap
+
+if TYPE_CHECKING:
+    from game.entities.entity import Entity
+    from game.world.engine import Engine
+
+
+class ChunkedArray:
+    """A (levels, width, height) array stored as (levels, size, size) chunks.
+
+    Chunks are allocated the first time they are written to.  If an `owner` is
+    given, chunks are also allocated on read and `owner.on_new_chunk` is called
+    so it can fill in their initial contents.  Otherwise missing chunks read as
+    `fill_value`.
+    """
+
+    def __init__(
+        self,
+        levels: int,
+        width: int,
+        height: int,
+        chunk_size: int,
+        fill_value,
+        dtype=None,
+        owner: Optional[ChunkedGameMap] = None,
+    ):
+        self.levels, self.width, self.height = levels, width, height
+        self.chunk_size = chunk_size
+        self.fill_value = np.asarray(fill_value, dtype=dtype)
+        self.dtype = self.fill_value.dtype
+        self.owner = owner
+        self.chunks: Dict[Tuple[int, int], np.ndarray] = {}
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return self.levels, self.width, self.height
+
+    def __getitem__(self, level: int) -> ChunkedLevel:
+        return ChunkedLevel(self, level)
+
+    def __setitem__(self, level: int, value) -> None:
+        ChunkedLevel(self, level)[:, :] = value
+
+    def get_chunk(self, cx: int, cy: int, create: bool = True) -> Optional[np.ndarray]:
+        """Return the chunk at chunk coordinates (cx, cy)."""
+        chunk = self.chunks.get((cx, cy))
+        if chunk is None and create:
+            chunk = np.full(
+                (self.levels, self.chunk_size, self.chunk_size),
+                fill_value=self.fill_value,
+                order="F",
+            )
+            self.chunks[cx, cy] = chunk
+            if self.owner is not None:
+                self.owner.on_new_chunk(cx, cy)
+        return chunk
+
+    def chunks_in(
+        self, x1: int, x2: int, y1: int, y2: int
+    ) -> Iterator[Tuple[int, int, slice, slice, slice, slice]]:
+        """Yield the chunks overlapping [x1, x2) x [y1, y2).
+
+        Each item is (cx, cy, window_x, window_y, chunk_x, chunk_y) where the
+        slices map the overlapping part of the window onto the chunk.
+        """
+        size = self.chunk_size
+        for cx in range(x1 // size, (x2 - 1) // size + 1):
+            ox = cx * size
+            cx1, cx2 = max(x1, ox), min(x2, ox + size)
+            for cy in range(y1 // size, (y2 - 1) // size + 1):
+                oy = cy * size
+                cy1, cy2 = max(y1, oy), min(y2, oy + size)
+                yield (
+                    cx,
+                    cy,
+                    slice(cx1 - x1, cx2 - x1),
+                    slice(cy1 - y1, cy2 - y1),
+                    slice(cx1 - ox, cx2 - ox),
+                    slice(cy1 - oy, cy2 - oy),
+                )
+
+    def read(self, level: int, x1: int, x2: int, y1: int, y2: int) -> np.ndarray:
+        """Return a stitched copy of the window [x1, x2) x [y1, y2) on `level`."""
+        out = np.empty((max(0, x2 - x1), max(0, y2 - y1)), dtype=self.dtype, order="F")
+        if out.size == 0:
+            return out
+        create = self.owner is not None
+        for cx, cy, wx, wy, kx, ky in self.chunks_in(x1, x2, y1, y2):
+            chunk = self.get_chunk(cx, cy, create)
+            out[wx, wy] = self.fill_value if chunk is None else chunk[level, kx, ky]
+        return out
+
+    def write(self, level: int, x1: int, x2: int, y1: int, y2: int, value) -> None:
+        """Assign `value` (a scalar or an array of the window's shape) to a window."""
+        value = np.asarray(value, dtype=self.dtype)
+        for cx, cy, wx, wy, kx, ky in self.chunks_in(x1, x2, y1, y2):
+            chunk = self.get_chunk(cx, cy)
+            chunk[level, kx, ky] = value if value.ndim == 0 else value[wx, wy]
+
+    def _index(self, x: int, y: int) -> Tuple[int, int, int, int]:
+        if x < 0:
+            x += self.width
+        if y < 0:
+            y += self.height
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError(f"({x}, {y}) is outside of the map")
+        return (*divmod(x, self.chunk_size), *divmod(y, self.chunk_size))
+
+
+class ChunkedLevel:
+    """A single level of a ChunkedArray, indexed like a 2D numpy array."""
+
+    def __init__(self, array: ChunkedArray, level: int):
+        self.array = array
+        self.level = level
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.array.width, self.array.height
+
+    def __getitem__(self, key):
+        xy = self._scalar_key(key)
+        if xy is not None:
+            cx, kx, cy, ky = self.array._index(*xy)
+            chunk = self.array.get_chunk(cx, cy, create=self.array.owner is not None)
+            if chunk is None:
+                return self.array.fill_value[()]
+            return chunk[self.level, kx, ky]
+
+        (x1, x2, sx), (y1, y2, sy) = self._window_key(key)
+        window = self.array.read(self.level, x1, x2, y1, y2)
+        return window[sx, sy]
+
+    def __setitem__(self, key, value) -> None:
+        xy = self._scalar_key(key)
+        if xy is not None:
+            cx, kx, cy, ky = self.array._index(*xy)
+            self.array.get_chunk(cx, cy)[self.level, kx, ky] = value
+            return
+
+        (x1, x2, sx), (y1, y2, sy) = self._window_key(key)
+        if sx == slice(None) and sy == slice(None):
+            self.array.write(self.level, x1, x2, y1, y2, value)
+            return
+        # Strided or single row/column writes go through a copy of the window.
+        window = self.array.read(self.level, x1, x2, y1, y2)
+        window[sx, sy] = value
+        self.array.write(self.level, x1, x2, y1, y2, window)
+
+    @staticmethod
+    def _scalar_key(key) -> Optional[Tuple[int, int]]:
+        if isinstance(key, tuple) and len(key) == 2:
+            x, y = key
+            if isinstance(x, (int, np.integer)) and isinstance(y, (int, np.integer)):
+                return int(x), int(y)
+        return None
+
+    def _window_key(
+        self, key
+    ) -> Tuple[Tuple[int, int, object], Tuple[int, int, object]]:
+        """Split a 2D key into the window to read and the index into that window."""
+        if not isinstance(key, tuple):
+            key = (key, slice(None))
+        if len(key) != 2:
+            raise IndexError("Chunked levels are indexed with [x, y]")
+        return (
+            self._axis(key[0], self.array.width),
+            self._axis(key[1], self.array.height),
+        )
+
+    @staticmethod
+    def _axis(index, size: int) -> Tuple[int, int, object]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(size)
+            if step < 0:
+                raise IndexError("Chunked levels do not support negative steps")
+            stop = max(start, stop)
+            return start, stop, slice(None, None, step) if step != 1 else slice(None)
+        index = int(index)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError(f"index {index} is out of bounds for size {size}")
+        return index, index + 1, 0
+
+
+class ChunkedGameMap(GameMap):
+    """A GameMap whose tiles, visibility and exploration are kept per chunk.
+
+    Only the chunks that have been looked at are allocated.  A `generator`
+    fills in new chunks and populates areas as the camera approaches them; it
+    needs `paint_chunk(game_map, cx, cy)` and `populate_chunk(game_map, cx, cy)`.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        width: int,
+        height: int,
+        levels: int,
+        chunk_size: int = 32,
+        entities: Iterable[Entity] = (),
+        generator=None,
+        lazy_interiors: bool = False,
+    ):
+        self.chunk_size = chunk_size
+        self.generator = generator
+        self.populated_chunks: Set[Tuple[int, int]] = set()
+        # Window of the last field of view, so it can be cleared next turn.
+        self._fov_window: Optional[Tuple[int, int, int, int, int]] = None
+        super().__init__(
+            engine, width, height, levels, entities, lazy_interiors=lazy_interiors
+        )
+
+    def _allocate_layers(self) -> None:
+        shape = (self.max_levels, self.width, self.height, self.chunk_size)
+        self.tiles = ChunkedArray(*shape, fill_value=tile_types.cement, owner=self)
+        self.visible = ChunkedArray(*shape, fill_value=False)
+        self.explored = ChunkedArray(*shape, fill_value=False)
+
+    @property
+    def chunk_count(self) -> Tuple[int, int]:
+        """Number of chunks across and down this map."""
+        return (
+            -(-self.width // self.chunk_size),
+            -(-self.height // self.chunk_size),
+        )
+
+    def on_new_chunk(self, cx: int, cy: int) -> None:
+        if self.generator is not None:
+            self.generator.paint_chunk(self, cx, cy)
+        size = self.chunk_size
+        self.tiles_changed(
+            area=(cx * size, cy * size, (cx + 1) * size, (cy + 1) * size)
+        )
+
+    def prepare_area(self, x_slice: slice, y_slice: slice) -> None:
+        """Populate every chunk within one chunk of the given area."""
+        size = self.chunk_size
+        max_cx, max_cy = self.chunk_count
+        x1, x2 = max(0, x_slice.start - size), min(self.width, x_slice.stop + size)
+        y1, y2 = max(0, y_slice.start - size), min(self.height, y_slice.stop + size)
+        for cx in range(x1 // size, min(max_cx, (x2 - 1) // size + 1)):
+            for cy in range(y1 // size, min(max_cy, (y2 - 1) // size + 1)):
+                if (cx, cy) in self.populated_chunks:
+                    continue
+                self.populated_chunks.add((cx, cy))
+                if self.generator is not None:
+                    self.generator.populate_chunk(self, cx, cy)
+
+    def update_fov(self, level: int, x: int, y: int, radius: int) -> None:
+        """Recompute the visible area, only looking at the window around (x, y)."""
+        if level not in self.furnished_levels:
+            self.furnish_level(level)
+        x1, x2 = max(0, x - radius), min(self.width, x + radius + 1)
+        y1, y2 = max(0, y - radius), min(self.height, y + radius + 1)
+        self.prepare_area(slice(x1, x2), slice(y1, y2))
+
+        if self._fov_window is not None:
+            self.visible.write(*self._fov_window, False)
+
+        transparency = self.tiles.read(level, x1, x2, y1, y2)["transparent"]
+        visible = compute_fov(
+            transparency=transparency,
+            pov=(x - x1, y - y1),
+            radius=radius,
+            algorithm=libtcodpy.FOV_BASIC,
+        )
+        self.visible.write(level, x1, x2, y1, y2, visible)
+        explored = self.explored.read(level, x1, x2, y1, y2)
+        self.explored.write(level, x1, x2, y1, y2, explored | visible)
+        self._fov_window = (level, x1, x2, y1, y2)
@@ -2,11 +2,11 @@ from __future__ import annotations
 
 
 import lzma
+import os
 import pickle
+from pathlib import Path
 from typing import TYPE_CHECKING
 from tcod.console import Console
-from tcod.map import compute_fov
-from libtcodpy import FOV_BASIC
 
 # from actions import EscapeAction, MovementAction
 # import color
@@ -16,6 +16,13 @@ from game.world.game_clock import GameClock
 from game.render.message_log import MessageLog
 from game.render.render_functions import render_names_at_mouse_location, render_hline
 import game.utils.exceptions as exceptions
+from game.world import storage
+from game.utils.profiling import (
+    OVERLAY_TIMINGS,
+    PROFILER,
+    profiled,
+    render_profiler,
+)
 
 if TYPE_CHECKING:
     from entity import Actor
@@ -46,29 +53,30 @@ class Engine:
         self.active_hud_index = 0
         self.X_POS, self.Y_POS = X_POS, Y_POS
 
+    @profiled("turn", "enemy_turns")
     def handle_enemy_turns(self) -> None:
-        for entity in set(self.game_map.actors) - {self.player}:
+        # A fixed order, rather than the set's, so replays are deterministic.
+        enemies = sorted(
+            (actor for actor in self.game_map.actors if actor is not self.player),
+            key=lambda actor: (actor.level, actor.x, actor.y),
+        )
+        for entity in enemies:
             if entity.ai:
                 try:
                     entity.ai.perform()
                 except exceptions.Impossible:
                     pass  # Ignore impossible action exceptions from AI.
 
+    @profiled("turn", "update_fov")
     def update_fov(self) -> None:
         """Recompute the visible area based on the players point of view."""
-        level = self.game_map.current_level
-
-        self.game_map.visible[level][:] = compute_fov(
-            transparency=self.game_map.tiles[level]["transparent"],
-            pov=(self.player.x, self.player.y),
-            radius=10,
-            algorithm=FOV_BASIC,
+        self.game_map.update_fov(
+            self.game_map.current_level, self.player.x, self.player.y, radius=10
         )
-        # If a tile is "visible" it should be added to "explored".
-        self.game_map.explored |= self.game_map.visible
 
     def update_camera(self) -> None:
         self.camera.update(target_x=self.player.x, target_y=self.player.y)
+        self.game_map.prepare_area(*self.camera.viewport())
 
     def update_gameclock(self) -> None:
         self.clock.increment()
@@ -108,9 +116,26 @@ class Engine:
         else:
             print("render error")
 
+        if PROFILER.overlay:
+            self.render_profile(console)
+
     def render_time(self, console, x, y):
         console.print(x=x, y=y, string=self.clock.display)
 
+    def render_profile(self, console):
+        """Draw the profiler overlay over the bottom of the HUD panel.
+
+        The panel is still drawn underneath, so its timings keep coming in.
+        """
+        height = len(OVERLAY_TIMINGS) + 2
+        y = console.height - height
+        console.draw_rect(
+            self.X_POS, y - 1, console.width - self.X_POS, height + 1, ch=ord(" ")
+        )
+        render_hline(console, self.X_POS, y - 1, 30)
+        console.print(x=self.X_POS + 1, y=y - 1, string="Profile ms avg/max")
+        render_profiler(console, self, self.X_POS + 1, y)
+
     def render_information(self, console):
         pass
 
@@ -175,7 +200,36 @@ class Engine:
         pass
 
     def save_as(self, filename: str) -> None:
-        """Save this Engine instance as a compressed file."""
+        """Save this Engine instance as a compressed file.
+
+        The layers of memory-mapped maps are saved next to it, and only
+        referenced by it.  The new save replaces the old one in one step, and
+        the old one's layers are only deleted after that, so a save that fails
+        leaves the last one whole.
+        """
+        filename = Path(filename)
+        filename.parent.mkdir(parents=True, exist_ok=True)
+        maps_folder = storage.saved_maps_folder(filename)
+        memory_mapped = [
+            game_map
+            for game_map in self.game_world.maps.values()
+            if game_map.layer_files
+        ]
+        if memory_mapped:
+            maps_folder.mkdir(exist_ok=True)
+        for game_map in memory_mapped:
+            game_map.save_layers(maps_folder)
         save_data = lzma.compress(pickle.dumps(self))
-        with open(filename, "wb") as f:
+        tmp_path = filename.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
             f.write(save_data)
+        os.replace(tmp_path, filename)
+        if maps_folder.exists():
+            storage.remove_unreferenced_layers(
+                maps_folder,
+                {
+                    path
+                    for game_map in memory_mapped
+                    for path in game_map.layer_files.values()
+                },
+            )
@@ -1,13 +1,29 @@
 from __future__ import annotations
 
-from typing import Iterable, Iterator, Optional
+import weakref
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 import numpy as np  # type: ignore
 from tcod.console import Console
+from tcod.map import compute_fov
+from tcod import libtcodpy
 
 
 from game.entities import tile_types
 from game.entities.entity import Entity, Actor, Item
 from game.world.engine import Engine
+from game.world import storage
+from game.utils.profiling import profiled
+from game.world.navigation import NavigationGraph
+from game.world.pathing import PathingService
+
+# (x1, y1, x2, y2), with x2 and y2 excluded.
+Area = Tuple[int, int, int, int]
+Interior = Callable[["GameMap"], None]
+
+# Tiles are versioned in square blocks of this size, so changing a few tiles
+# only makes what was derived from the blocks around them go stale.
+VERSION_BLOCK = 16
 
 
 class GameMap:
@@ -18,33 +34,165 @@ class GameMap:
         height: int,
         levels: int,
         entities: Iterable[Entity] = (),
+        storage_folder: Optional[Path] = None,
+        lazy_interiors: bool = False,
     ):
 
         self.engine = engine
+        # When set, tiles, visible and explored are memory-mapped files in this
+        # scratch folder until they are first saved, see `save_layers`.
+        self.storage_folder = storage_folder
+        # The file each memory-mapped layer is mapped from.
+        self.layer_files: Dict[str, Path] = {}
+        # Memory-mapped layers that changed since they were last saved.
+        self.unsaved_layers: Set[str] = set()
         self.width, self.height = width, height
         self.max_levels = levels
         self.entities = set(entities)
-        self.tiles = np.full(
-            (self.max_levels, width, height), fill_value=tile_types.cement, order="F"
-        )
         self.camera = self.engine.camera
         self.exit_locations = []
         self.stair_locations = {"UP": [], "DOWN": []}
         self.current_level = 1
+        # When set, rooms are only furnished once their level is first seen.
+        self.lazy_interiors = lazy_interiors
+        self.pending_interiors: Dict[int, List[Tuple[Interior, Optional[Area]]]] = {}
+        self.furnished_levels: Set[int] = set()
+        # Bumped by `tiles_changed`, so anything derived from tiles can go stale.
+        self.tile_versions: Dict[int, int] = {}
+        # Changes to a whole level, and to each VERSION_BLOCK sized block of it.
+        self.level_resets: Dict[int, int] = {}
+        self.block_versions: Dict[Tuple[int, int, int], int] = {}
+        self._pathing: Optional[PathingService] = None
+        self._navigation: Optional[NavigationGraph] = None
+        # (level, x1, x2, y1, y2) of the last field of view, cleared next turn.
+        self._fov_window: Optional[Tuple[int, int, int, int, int]] = None
+        self._allocate_layers()
+
+    def _allocate_layers(self) -> None:
+        shape = (self.max_levels, self.width, self.height)
+        if self.storage_folder is not None:
+            weakref.finalize(self, storage.release_map_folder, self.storage_folder)
+            for name, fill_value in zip(
+                storage.MAP_LAYERS, (tile_types.cement, False, False)
+            ):
+                path, layer = storage.create_layer(
+                    self.storage_folder, name, shape, fill_value
+                )
+                self.layer_files[name] = path
+                setattr(self, name, layer)
+            self.unsaved_layers.update(storage.MAP_LAYERS)
+            return
+
+        self.tiles = np.full(shape, fill_value=tile_types.cement, order="F")
 
         # Tiles the player can currently see
-        self.visible = np.full(
-            (self.max_levels, width, height), fill_value=False, order="F"
-        )
+        self.visible = np.full(shape, fill_value=False, order="F")
         # Tiles the player has seen before
-        self.explored = np.full(
-            (self.max_levels, width, height), fill_value=False, order="F"
-        )
+        self.explored = np.full(shape, fill_value=False, order="F")
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        # Pathfinders and routes are rebuilt on demand after loading.
+        state["_pathing"] = None
+        state["_navigation"] = None
+        if self.layer_files:
+            # Memory-mapped layers are saved by `save_layers`, not by pickling,
+            # and are mapped from their files again when loaded.
+            for name in storage.MAP_LAYERS:
+                del state[name]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        for name, path in self.layer_files.items():
+            setattr(self, name, storage.open_layer(path))
+
+    def save_layers(self, folder: Path) -> None:
+        """Save the memory-mapped layers into a save's `folder`, to be pickled.
+
+        Scratch layers are moved there and layers that changed since they were
+        loaded are written there, to new files, so the last save keeps its own
+        until it is replaced.  Layers are mapped copy-on-write from their saved
+        files afterwards, so the save only changes by saving again.
+        """
+        self.flush()
+        for name, path in self.layer_files.items():
+            if name in self.unsaved_layers:
+                if path.parent == self.storage_folder:
+                    path = storage.move_layer(path, folder, name)
+                else:
+                    path = storage.write_layer(getattr(self, name), folder, name)
+            elif path.parent != folder:
+                path = storage.link_layer(path, folder, name)
+            else:
+                continue
+            self.layer_files[name] = path
+            setattr(self, name, storage.open_layer(path))
+        self.unsaved_layers.clear()
+        if self.storage_folder is not None:
+            storage.release_map_folder(self.storage_folder)
+            self.storage_folder = None
+
+    def flush(self) -> None:
+        """Write any memory-mapped scratch layers back to disk."""
+        for name in self.layer_files:
+            getattr(self, name).flush()
 
     @property
     def gamemap(self) -> GameMap:
         return self
 
+    @property
+    def pathing(self) -> PathingService:
+        if self._pathing is None:
+            self._pathing = PathingService(self)
+        return self._pathing
+
+    @property
+    def navigation(self) -> NavigationGraph:
+        if self._navigation is None:
+            self._navigation = NavigationGraph(self)
+        return self._navigation
+
+    def tiles_changed(
+        self, level: Optional[int] = None, area: Optional[Area] = None
+    ) -> None:
+        """Note that the tiles of `level`, or of every level, have changed.
+
+        Pass the (x1, y1, x2, y2) `area` that changed, if known, so only what
+        was derived from that part of the map goes stale.
+        """
+        levels = range(self.max_levels) if level is None else (level,)
+        for changed in levels:
+            self.tile_versions[changed] = self.tile_versions.get(changed, 0) + 1
+            if self.layer_files:
+                self.unsaved_layers.add("tiles")
+            if area is None:
+                self.level_resets[changed] = self.level_resets.get(changed, 0) + 1
+                continue
+            for block in self._version_blocks(changed, *area):
+                self.block_versions[block] = self.block_versions.get(block, 0) + 1
+
+    def area_version(self, level: int, x1: int, y1: int, x2: int, y2: int) -> int:
+        """The version of the tiles from (x1, y1) up to (x2, y2) on `level`.
+
+        It goes up whenever any tile in the area changes, and may go up when
+        tiles near it do.
+        """
+        return self.level_resets.get(level, 0) + sum(
+            self.block_versions.get(block, 0)
+            for block in self._version_blocks(level, x1, y1, x2, y2)
+        )
+
+    def _version_blocks(
+        self, level: int, x1: int, y1: int, x2: int, y2: int
+    ) -> Iterator[Tuple[int, int, int]]:
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = min(self.width, x2), min(self.height, y2)
+        for bx in range(x1 // VERSION_BLOCK, (x2 - 1) // VERSION_BLOCK + 1):
+            for by in range(y1 // VERSION_BLOCK, (y2 - 1) // VERSION_BLOCK + 1):
+                yield level, bx, by
+
     @property
     def actors(self) -> Iterator[Actor]:
         """Iterate over this maps living actors."""
@@ -87,6 +235,65 @@ class GameMap:
         """Return True if x and y are inside of the bounds of this map."""
         return 0 <= x < self.width and 0 <= y < self.height
 
+    def add_interior(
+        self, level: int, furnish: Interior, area: Optional[Area] = None
+    ) -> None:
+        """Run `furnish(self)` now, or once `level` is seen if interiors are lazy.
+
+        `area` is the part of the map `furnish` can change, if known.
+        """
+        if self.lazy_interiors and level not in self.furnished_levels:
+            self.pending_interiors.setdefault(level, []).append((furnish, area))
+        else:
+            furnish(self)
+            self.tiles_changed(level, area)
+
+    def furnish_level(self, level: int) -> None:
+        """Run every interior waiting on `level`; later ones run straight away."""
+        self.furnished_levels.add(level)
+        for furnish, area in self.pending_interiors.pop(level, ()):
+            furnish(self)
+            self.tiles_changed(level, area)
+
+    def prepare_area(self, x_slice: slice, y_slice: slice) -> None:
+        """Make sure the given area is fully generated before it is shown.
+
+        Dense maps are generated up front, so there is nothing to do here.
+        """
+
+    def update_fov(self, level: int, x: int, y: int, radius: int) -> None:
+        """Recompute the visible area of `level` as seen from (x, y).
+
+        Only the window around (x, y) is read and written, so memory-mapped
+        layers only page in, and copy, what is near the player.
+        """
+        if level not in self.furnished_levels:
+            self.furnish_level(level)
+        x1, x2 = max(0, x - radius), min(self.width, x + radius + 1)
+        y1, y2 = max(0, y - radius), min(self.height, y + radius + 1)
+        if self._fov_window is not None:
+            last_level, lx1, lx2, ly1, ly2 = self._fov_window
+            self.visible[last_level, lx1:lx2, ly1:ly2] = False
+
+        visible = compute_fov(
+            transparency=self.tiles[level, x1:x2, y1:y2]["transparent"],
+            pov=(x - x1, y - y1),
+            radius=radius,
+            algorithm=libtcodpy.FOV_BASIC,
+        )
+        self.visible[level, x1:x2, y1:y2] = visible
+        # If a tile is "visible" it should be added to "explored".
+        explored = self.explored[level, x1:x2, y1:y2]
+        newly_explored = visible & ~explored
+        if newly_explored.any():
+            explored |= newly_explored
+            if self.layer_files:
+                self.unsaved_layers.add("explored")
+        if self.layer_files:
+            self.unsaved_layers.add("visible")
+        self._fov_window = (level, x1, x2, y1, y2)
+
+    @profiled("render", "map")
     def render(self, console: Console) -> None:
         """
         Renders the map.
@@ -98,15 +305,15 @@ class GameMap:
         vx, vy = self.camera.viewport()
         floor = self.current_level
 
-        # Current floor data
-        visible_map = self.visible[floor]
-        explored_map = self.explored[floor]
-        tiles_map = self.tiles[floor]
-
         # Clamp viewport to map bounds
         map_x1, map_x2 = vx.start, min(vx.stop, self.width)
         map_y1, map_y2 = vy.start, min(vy.stop, self.height)
 
+        # Current floor data, cut down to the viewport
+        visible_map = self.visible[floor][map_x1:map_x2, map_y1:map_y2]
+        explored_map = self.explored[floor][map_x1:map_x2, map_y1:map_y2]
+        tiles_map = self.tiles[floor][map_x1:map_x2, map_y1:map_y2]
+
         # Actual visible size from map
         slice_w = map_x2 - map_x1
         slice_h = map_y2 - map_y1
@@ -115,18 +322,15 @@ class GameMap:
         render_output = np.full(
             (self.camera.screen_width, self.camera.screen_height),
             tile_types.SHROUD,
-            dtype=tiles_map["light"].dtype,
+            dtype=tile_types.graphic_dt,
         )
 
         # Visible area
         visible_render = np.select(
-            condlist=[
-                visible_map[map_x1:map_x2, map_y1:map_y2],
-                explored_map[map_x1:map_x2, map_y1:map_y2],
-            ],
+            condlist=[visible_map, explored_map],
             choicelist=[
-                tiles_map[map_x1:map_x2, map_y1:map_y2]["light"],  # light
-                tiles_map[map_x1:map_x2, map_y1:map_y2]["dark"],  # dark (placeholder)
+                tiles_map["light"],  # light
+                tiles_map["dark"],  # dark (placeholder)
             ],
             default=tile_types.SHROUD,
         )
@@ -145,8 +349,9 @@ class GameMap:
         for sx, sy, ent in self.camera.entities_to_screen(
             entities_sorted_for_rendering
         ):
-            if visible_map[ent.x, ent.y] and ent.level == self.current_level:
-                background_color = tuple(tiles_map[(ent.x, ent.y)]["light"][2])
+            mx, my = ent.x - map_x1, ent.y - map_y1
+            if visible_map[mx, my] and ent.level == self.current_level:
+                background_color = tuple(tiles_map[mx, my]["light"][2])
                 console.print(
                     x=sx,
                     y=sy,
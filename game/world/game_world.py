@@ -1,6 +1,12 @@
+import random
+from typing import Optional
+
 from game.world.engine import Engine
 
-from game.map_gen.city_gen import generate_city, CITY_DEFAULTS
+from game.map_gen import city_cache
+from game.map_gen.city_gen import generate_city, generate_player
+from game.map_gen.city_profile import CityProfile, SMALL_CITY
+from game.utils.utility import seeded_random
 
 
 class GameWorld:
@@ -17,15 +23,42 @@ class GameWorld:
         self.map_index = -1
         self.maps = {}
 
-    def generate_new_map(self, city_details=None) -> None:
-        if city_details is None:
-            city_details = CITY_DEFAULTS
+    def generate_new_map(
+        self, profile: CityProfile = SMALL_CITY, seed: Optional[int] = None
+    ) -> None:
+        """Generate the next map.
+
+        Maps generated from an explicit seed are cached on disk, so asking for
+        the same settings and seed again loads the map instead.
+        """
         self.map_index += 1
 
-        self.engine.game_map = generate_city(
-            engine=self.engine, city_details=city_details
-        )
+        use_cache = seed is not None and city_cache.is_cacheable(profile)
+        game_map = None
+        if use_cache:
+            game_map = city_cache.load_city(self.engine, profile, seed)
+            if game_map is not None:
+                generate_player(game_map, self.engine.player)
+
+        if game_map is None:
+            if seed is None:
+                seed = random.getrandbits(64)
+            with seeded_random(seed):
+                game_map = self._generate(profile)
+            if use_cache:
+                city_cache.store_city(game_map, profile, seed)
+
+        self.engine.game_map = game_map
+        self.engine.camera.map_width = self.engine.game_map.width
+        self.engine.camera.map_height = self.engine.game_map.height
         self.maps[self.map_index] = self.engine.game_map
 
+    def _generate(self, profile: CityProfile):
+        if profile.chunked:
+            from game.map_gen.chunked_city_gen import generate_chunked_city
+
+            return generate_chunked_city(engine=self.engine, profile=profile)
+        return generate_city(engine=self.engine, profile=profile)
+
     def open_game_map(self, index):
         self.engine.game_map = self.map[index]
@@ -0,0 +1,286 @@
+"""Routes between any two tiles of a map, across levels, by HPA*.
+
+Each level is cut into square clusters of `cluster_size` tiles.  Wherever a
+run of walkable tiles crosses the border between two clusters there is an
+entrance: a node on either side of the border, in the middle of the run,
+linked to each other by one step.  Doors and both ends of every stair are
+nodes too, and stairs link the levels.  Inside a cluster, each node is linked
+to the nodes it reaches without leaving the cluster, weighted by the steps
+between them, found with one Dijkstra per node.
+
+A route is planned by linking the start and goal to the nodes of their own
+clusters, then searching the graph of nodes with A*.  It is the list of nodes
+to pass through, so actors only ever refine the next leg into a local path,
+and no leg leaves the cluster it starts in.
+
+Clusters are built when a search first reaches them, and kept until the tiles
+in or right next to them change, so a tile change only means rebuilding the
+clusters around it.  On chunked maps, reaching a cluster generates its chunks.
+"""
+
+from __future__ import annotations
+
+import heapq
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np  # type: ignore
+import tcod.path
+
+from game.entities import tile_ids
+from game.world.pathing import CARDINAL_COST, DIAGONAL_COST, Window
+
+if TYPE_CHECKING:
+    from game.world.game_map import GameMap
+
+# (level, x, y)
+Node = Tuple[int, int, int]
+# (level, x, y) of a cluster, counted in clusters.
+ClusterKey = Tuple[int, int, int]
+Link = Tuple[Node, int]
+
+# Steps it takes to climb or descend a stair.
+STAIR_COST = 1
+
+# Step count of tiles a cluster's Dijkstra can't reach.
+UNREACHABLE = -1
+
+
+class _Cluster:
+    def __init__(self, window: Window, version: int, walkable: np.ndarray):
+        self.window = window
+        self.version = version
+        self.cost = np.array(walkable, dtype=np.int8, order="F")
+        # Each node to the nodes it leads to directly, with their step costs.
+        self.links: Dict[Node, List[Link]] = {}
+
+    def steps_from(self, origin: Node) -> np.ndarray:
+        """Return the steps from `origin` to each tile, without leaving the cluster."""
+        graph = tcod.path.SimpleGraph(
+            cost=self.cost, cardinal=CARDINAL_COST, diagonal=DIAGONAL_COST
+        )
+        pathfinder = tcod.path.Pathfinder(graph)
+        pathfinder.add_root((origin[1] - self.window.x1, origin[2] - self.window.y1))
+        pathfinder.resolve()
+        distance = pathfinder.distance
+        return np.where(
+            distance == np.iinfo(distance.dtype).max,
+            UNREACHABLE,
+            distance // CARDINAL_COST,
+        )
+
+    def reachable(self, origin: Node, nodes: Iterable[Node]) -> List[Link]:
+        """Return the nodes `origin` reaches without leaving the cluster."""
+        steps = self.steps_from(origin)
+        links = []
+        for node in nodes:
+            if node != origin:
+                count = int(steps[node[1] - self.window.x1, node[2] - self.window.y1])
+                if count != UNREACHABLE:
+                    links.append((node, count))
+        return links
+
+
+class NavigationGraph:
+    def __init__(
+        self, game_map: GameMap, cluster_size: int = 16, max_expansions: int = 4096
+    ):
+        if not 2 <= cluster_size <= game_map.pathing.max_radius:
+            raise ValueError(
+                f"cluster_size must be from 2 to the pathing radius "
+                f"{game_map.pathing.max_radius}, not {cluster_size}."
+            )
+        self.game_map = game_map
+        # Legs never leave a cluster, so actors can always search them locally.
+        self.cluster_size = cluster_size
+        # Searches give up after this many nodes, so unreachable goals are cheap.
+        self.max_expansions = max_expansions
+        self.clusters: Dict[ClusterKey, _Cluster] = {}
+        self._stairs: Dict[Node, Node] = {}
+        self._stair_count = -1
+        # Counters, for profiling.
+        self.expansions = 0
+        self.clusters_built = 0
+
+    def stairs(self) -> Dict[Node, Node]:
+        """Map each end of every stair to the end it leads to."""
+        locations = self.game_map.stair_locations
+        count = len(locations["UP"]) + len(locations["DOWN"])
+        if count != self._stair_count:
+            self._stairs = {}
+            for level, (x, y) in locations["UP"]:
+                self._stairs[(level, x, y)] = (level + 1, x, y)
+            for level, (x, y) in locations["DOWN"]:
+                self._stairs[(level, x, y)] = (level - 1, x, y)
+            self._stair_count = count
+            # Every cluster with a stair in it has new nodes.
+            self.clusters.clear()
+        return self._stairs
+
+    def cluster_key(self, node: Node) -> ClusterKey:
+        level, x, y = node
+        return level, x // self.cluster_size, y // self.cluster_size
+
+    def cluster(self, key: ClusterKey) -> _Cluster:
+        """Return the cluster at `key`, building it again if its tiles changed."""
+        self.stairs()
+        cluster = self.clusters.get(key)
+        if cluster is not None and cluster.version == self._version(cluster.window):
+            return cluster
+        cluster = self.clusters[key] = self._build(key)
+        return cluster
+
+    def links(self, node: Node) -> List[Link]:
+        """Return the nodes `node` leads to directly, with their step costs."""
+        return self.cluster(self.cluster_key(node)).links.get(node, [])
+
+    def route(self, start: Node, goal: Node) -> List[Node]:
+        """Return the waypoints from `start` to `goal`, ending with `goal`.
+
+        Returns an empty list if no route is found.
+        """
+        if start == goal:
+            return []
+        # Clusters are only checked against the tiles once per search.
+        clusters: Dict[ClusterKey, _Cluster] = {}
+
+        def cluster_of(node: Node) -> _Cluster:
+            key = self.cluster_key(node)
+            if key not in clusters:
+                clusters[key] = self.cluster(key)
+            return clusters[key]
+
+        start_cluster, goal_cluster = cluster_of(start), cluster_of(goal)
+        candidates = list(start_cluster.links)
+        if goal_cluster is start_cluster:
+            candidates.append(goal)
+        start_links = start_cluster.reachable(start, candidates)
+        start_links += start_cluster.links.get(start, [])
+        # Steps are the same both ways, so the nodes that reach the goal are
+        # the ones the goal reaches.
+        goal_links = dict(goal_cluster.reachable(goal, goal_cluster.links))
+
+        def estimate(node: Node) -> int:
+            steps = abs(goal[1] - node[1]) + abs(goal[2] - node[2])
+            return steps + abs(goal[0] - node[0]) * STAIR_COST
+
+        frontier = [(estimate(start), 0, start)]
+        best = {start: 0}
+        came_from: Dict[Node, Node] = {}
+        expansions = 0
+        while frontier:
+            _, cost, node = heapq.heappop(frontier)
+            if node == goal:
+                return self._waypoints(came_from, start, goal)
+            if cost > best[node]:
+                continue
+            expansions += 1
+            self.expansions += 1
+            if expansions > self.max_expansions:
+                break
+
+            if node == start:
+                links = start_links
+            else:
+                links = cluster_of(node).links.get(node, [])
+            if node in goal_links:
+                links = links + [(goal, goal_links[node])]
+            for next_node, steps in links:
+                next_cost = cost + steps
+                if next_cost < best.get(next_node, next_cost + 1):
+                    best[next_node] = next_cost
+                    came_from[next_node] = node
+                    heapq.heappush(
+                        frontier,
+                        (next_cost + estimate(next_node), next_cost, next_node),
+                    )
+        return []
+
+    def _version(self, window: Window) -> int:
+        # Entrances depend on the tiles just across the border too.
+        level, x1, y1, x2, y2 = window
+        return self.game_map.area_version(level, x1 - 1, y1 - 1, x2 + 1, y2 + 1)
+
+    def _build(self, key: ClusterKey) -> _Cluster:
+        level, cx, cy = key
+        game_map = self.game_map
+        size = self.cluster_size
+        x1, y1 = cx * size, cy * size
+        x2, y2 = min(game_map.width, x1 + size), min(game_map.height, y1 + size)
+        # Read with a border of one, to find the entrances.
+        ox, oy = max(0, x1 - 1), max(0, y1 - 1)
+        tiles = game_map.tiles[level][ox : x2 + 1, oy : y2 + 1]
+        walkable = tiles["walkable"]
+        window = Window(level, x1, y1, x2, y2)
+        # Reading the tiles can generate new chunks, so take the version after.
+        cluster = _Cluster(
+            window,
+            self._version(window),
+            walkable[x1 - ox : x2 - ox, y1 - oy : y2 - oy],
+        )
+
+        # Links from each node to other clusters and levels.
+        outside: Dict[Node, List[Link]] = {}
+        for node, twin in self._entrances(window, walkable, ox, oy):
+            outside.setdefault(node, []).append((twin, 1))
+        ids = tiles["id"][x1 - ox : x2 - ox, y1 - oy : y2 - oy]
+        for x, y in np.argwhere(ids == tile_ids.DOOR).tolist():
+            outside.setdefault((level, x + x1, y + y1), [])
+        for node, other_end in self._stairs.items():
+            if node[0] == level and x1 <= node[1] < x2 and y1 <= node[2] < y2:
+                outside.setdefault(node, []).append((other_end, STAIR_COST))
+
+        nodes = sorted(outside)
+        links: Dict[Node, List[Link]] = {node: [] for node in nodes}
+        for index, node in enumerate(nodes):
+            # Steps are the same both ways, so each pair is only searched once.
+            for other, steps in cluster.reachable(node, nodes[index + 1 :]):
+                links[node].append((other, steps))
+                links[other].append((node, steps))
+            links[node] += outside[node]
+        cluster.links = links
+        self.clusters_built += 1
+        return cluster
+
+    def _entrances(
+        self, window: Window, walkable: np.ndarray, ox: int, oy: int
+    ) -> Iterator[Tuple[Node, Node]]:
+        """Yield the entrance nodes on the border of `window`, with their twins.
+
+        `walkable` covers the window with a border of one, from (ox, oy).
+        """
+        level, x1, y1, x2, y2 = window
+        # (is there a cluster across, first tile inside, step across, step along)
+        sides = [
+            (x1 > 0, (x1, y1), (-1, 0), (0, 1)),
+            (x2 < self.game_map.width, (x2 - 1, y1), (1, 0), (0, 1)),
+            (y1 > 0, (x1, y1), (0, -1), (1, 0)),
+            (y2 < self.game_map.height, (x1, y2 - 1), (0, 1), (1, 0)),
+        ]
+        for exists, (sx, sy), (dx, dy), (ax, ay) in sides:
+            if not exists:
+                continue
+            along = np.arange(y2 - y1 if ay else x2 - x1)
+            xs, ys = sx - ox + ax * along, sy - oy + ay * along
+            open_ = walkable[xs, ys] & walkable[xs + dx, ys + dy]
+            for middle in _run_middles(open_):
+                x, y = sx + ax * middle, sy + ay * middle
+                yield (level, x, y), (level, x + dx, y + dy)
+
+    @staticmethod
+    def _waypoints(came_from: Dict[Node, Node], start: Node, goal: Node) -> List[Node]:
+        waypoints = [goal]
+        while waypoints[-1] in came_from and came_from[waypoints[-1]] != start:
+            waypoints.append(came_from[waypoints[-1]])
+        waypoints.reverse()
+        return waypoints
+
+
+def _run_middles(open_: np.ndarray) -> Iterator[int]:
+    """Yield the middle index of each run of True values in `open_`."""
+    start = None
+    for index, value in enumerate(open_.tolist() + [False]):
+        if value and start is None:
+            start = index
+        elif not value and start is not None:
+            yield (start + index - 1) // 2
+            start = None
@@ -0,0 +1,175 @@
+"""Shortest paths for actors, reusing tcod pathfinders between queries.
+
+Searches are A* from the start to the goal, run inside a window that reaches
+`max_radius` tiles past the start in every direction.  A goal further away
+than that gets no path, so a search never floods a whole level.  Windows are
+aligned to a grid of `max_radius` sized blocks, so actors close to each other
+share one, and the cost array and graph of the most recently used windows are
+kept rather than rebuilt.  Each search still gets a new Pathfinder, sized to
+its window: `Pathfinder.clear` in tcod 18.1 leaves the pathfinder reading its
+old traversal array, so cleared pathfinders can't be reused.
+
+Window costs are cached until tiles in their window change, and found paths
+until tiles on their level change, which maps announce with
+`GameMap.tiles_changed`.  Blocking entities
+only add to the cost of their tile during a search, so callers who find their
+cached path blocked ask for a new search.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Tuple
+
+import numpy as np  # type: ignore
+import tcod.path
+
+if TYPE_CHECKING:
+    from game.world.game_map import GameMap
+
+# Movement costs.  Diagonal moves are disabled.
+CARDINAL_COST = 2
+DIAGONAL_COST = 0
+
+# Added to the cost of tiles with a blocking entity on them.  A lower number
+# means more enemies will crowd behind each other in hallways.  A higher
+# number means enemies will take longer paths in order to surround the player.
+BLOCKED_COST = 10
+
+Point = Tuple[int, int]
+
+
+class Window(NamedTuple):
+    level: int
+    x1: int
+    y1: int
+    x2: int
+    y2: int
+
+
+class _WindowGraph:
+    def __init__(self, cost: np.ndarray, version: int):
+        self.cost = cost
+        self.version = version
+        # The graph keeps a reference to `cost`, so edits to it are seen.
+        self.graph = tcod.path.SimpleGraph(
+            cost=cost, cardinal=CARDINAL_COST, diagonal=DIAGONAL_COST
+        )
+
+
+class PathingService:
+    def __init__(
+        self,
+        game_map: GameMap,
+        max_radius: int = 24,
+        max_windows: int = 16,
+        max_paths: int = 256,
+    ):
+        self.game_map = game_map
+        self.max_radius = max_radius
+        self.max_windows = max_windows
+        self.max_paths = max_paths
+        self.windows: OrderedDict[Window, _WindowGraph] = OrderedDict()
+        self.paths: OrderedDict[Tuple[int, Point, Point], List[Point]] = OrderedDict()
+        self.path_versions: Dict[int, int] = {}
+        # Counters, for profiling.
+        self.searches = 0
+        self.cached_paths = 0
+
+    def version(self, level: int) -> int:
+        """The version of the tiles of `level`; paths found before a change go stale."""
+        return self.game_map.tile_versions.get(level, 0)
+
+    def window_version(self, window: Window) -> int:
+        """The version of the tiles in `window`, which changes less often."""
+        return self.game_map.area_version(*window)
+
+    def path_to(
+        self, level: int, start: Point, goal: Point, use_cache: bool = True
+    ) -> List[Point]:
+        """Return the steps from `start` to `goal`, excluding `start`.
+
+        Returns an empty list if there is no path within `max_radius`.  Pass
+        `use_cache=False` to search again with the current entity positions.
+        """
+        if max(abs(goal[0] - start[0]), abs(goal[1] - start[1])) > self.max_radius:
+            return []
+        if self.path_versions.get(level) != self.version(level):
+            self._forget_paths(level)
+
+        key = (level, start, goal)
+        path = self.paths.get(key) if use_cache else None
+        if path is not None:
+            self.paths.move_to_end(key)
+            self.cached_paths += 1
+            return list(path)
+
+        path = self._search(level, start, goal)
+        self.paths[key] = path
+        self.path_versions[level] = self.version(level)
+        if len(self.paths) > self.max_paths:
+            self.paths.popitem(last=False)
+        return list(path)
+
+    def window_for(self, level: int, x: int, y: int) -> Window:
+        size = self.max_radius
+        bx, by = x // size * size, y // size * size
+        return Window(
+            level,
+            max(0, bx - size),
+            max(0, by - size),
+            min(self.game_map.width, bx + 2 * size),
+            min(self.game_map.height, by + 2 * size),
+        )
+
+    def _search(self, level: int, start: Point, goal: Point) -> List[Point]:
+        window = self.window_for(level, *start)
+        graph = self._graph(window)
+        x1, y1 = window.x1, window.y1
+        sx, sy = start[0] - x1, start[1] - y1
+        gx, gy = goal[0] - x1, goal[1] - y1
+        cost = graph.cost
+
+        # Blocking entities only raise the cost of their tile for this search.
+        penalties = [
+            (entity.x - x1, entity.y - y1)
+            for entity in self.game_map.entities
+            if entity.blocks_movement
+            and entity.level == level
+            and window.x1 <= entity.x < window.x2
+            and window.y1 <= entity.y < window.y2
+        ]
+        penalties = [(x, y) for x, y in penalties if cost[x, y]]
+        for x, y in penalties:
+            cost[x, y] += BLOCKED_COST
+        try:
+            pathfinder = tcod.path.Pathfinder(graph.graph)
+            pathfinder.add_root((sx, sy))
+            steps = pathfinder.path_to((gx, gy))[1:].tolist()
+        finally:
+            for x, y in penalties:
+                cost[x, y] -= BLOCKED_COST
+        self.searches += 1
+        return [(x + x1, y + y1) for x, y in steps]
+
+    def _graph(self, window: Window) -> _WindowGraph:
+        graph = self.windows.get(window)
+        if graph is not None and graph.version == self.window_version(window):
+            self.windows.move_to_end(window)
+            return graph
+
+        level_tiles = self.game_map.tiles[window.level]
+        walkable = level_tiles[window.x1 : window.x2, window.y1 : window.y2]["walkable"]
+        cost = np.array(walkable, dtype=np.int8, order="F")
+        # Reading the window can generate new chunks, so take the version after.
+        graph = _WindowGraph(cost, self.window_version(window))
+        self.windows[window] = graph
+        self.windows.move_to_end(window)
+        if len(self.windows) > self.max_windows:
+            self.windows.popitem(last=False)
+        return graph
+
+    def _forget_paths(self, level: int) -> None:
+        for key in [key for key in self.paths if key[0] == level]:
+            del self.paths[key]
+        self.path_versions.pop(level, None)
@@ -1,28 +1,84 @@
-"""Handle the loading and initialization of game sessions."""
+"""Handle the loading and initialization of game sessions.
+
+Only what the main menu needs is imported up front.  The engine, the entity
+factory, map generation and the game's event handlers are imported when a game
+is started or loaded, or ahead of time on a background thread by
+`preload_game_modules`.
+"""
 
 from __future__ import annotations
 
 import copy
+import importlib
 import lzma
 import pickle
+import threading
 import traceback
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 
 import tcod
 from tcod import libtcodpy
 
 
 import game.render.color as color
-from game.render.camera import Camera
-from game.world.engine import Engine
-from game.entities import entity_factory
-from game.world.game_world import GameWorld
-import game.input.input_handlers as input_handlers
+from game.world import storage
+from game.world.storage import SAVE_FOLDER
+from game.input.base_handler import BaseEventHandler
 import game.input.keys as keys
 
+if TYPE_CHECKING:
+    from game.map_gen.city_profile import CityProfile
+    from game.world.engine import Engine
+
+# Imported by `preload_game_modules`, roughly slowest first.
+GAME_MODULES = (
+    "game.entities.entity_factory",
+    "game.world.engine",
+    "game.world.game_world",
+    "game.map_gen.city_gen",
+    "game.input.input_handlers",
+    "game.utils.replay",
+)
+
+_preload_thread: Optional[threading.Thread] = None
+
+
+def preload_game_modules() -> None:
+    """Start importing the game modules on a background thread."""
+    global _preload_thread
+    if _preload_thread is None:
+        _preload_thread = threading.Thread(
+            target=_import_game_modules, name="preload", daemon=True
+        )
+        _preload_thread.start()
+
+
+def _import_game_modules() -> None:
+    for name in GAME_MODULES:
+        importlib.import_module(name)
+
+
+def wait_for_game_modules() -> None:
+    """Wait for `preload_game_modules` to finish, if it was started."""
+    if _preload_thread is not None:
+        _preload_thread.join()
 
-def new_game() -> Engine:
-    """Return a brand new game session as an Engine instance."""
+
+def new_game(
+    seed: Optional[int] = None, profile: Optional[CityProfile] = None
+) -> Engine:
+    """Return a brand new game session as an Engine instance.
+
+    Games started with the same `seed` and `profile` get the same city.  The
+    small city profile is used by default.
+    """
+    wait_for_game_modules()
+    storage.remove_unreferenced_maps()
+    from game.entities import entity_factory
+    from game.map_gen.city_profile import SMALL_CITY
+    from game.render.camera import Camera
+    from game.world.engine import Engine
+    from game.world.game_world import GameWorld
 
     map_screen_width = 25
     map_screen_height = 25
@@ -40,7 +96,7 @@ def new_game() -> Engine:
     engine = Engine(player=player, camera=camera)
 
     engine.game_world = GameWorld(engine=engine)
-    engine.game_world.generate_new_map()
+    engine.game_world.generate_new_map(profile or SMALL_CITY, seed=seed)
     engine.update_fov()
 
     engine.message_log.add_message(
@@ -63,14 +119,23 @@ def new_game() -> Engine:
 
 
 def load_game(filename: str) -> Engine:
-    """Load an Engine instance from a file."""
+    """Load an Engine instance from a file.
+
+    Memory-mapped maps map the layer files saved with them copy-on-write as
+    they are unpickled, so only the pages that get used are read from disk,
+    and the save only changes when the game is saved again.
+    """
+    wait_for_game_modules()
+    storage.remove_unreferenced_maps()
+    from game.world.engine import Engine
+
     with open(filename, "rb") as f:
         engine = pickle.loads(lzma.decompress(f.read()))
     assert isinstance(engine, Engine)
     return engine
 
 
-class MainMenu(input_handlers.BaseEventHandler):
+class MainMenu(BaseEventHandler):
     """Handle the main menu rendering and input."""
 
     def on_render(self, console: tcod.Console) -> None:
@@ -141,15 +206,15 @@ class MainMenu(input_handlers.BaseEventHandler):
                 bg_blend=libtcodpy.BKGND_ALPHA(64),
             )
 
-    def ev_keydown(
-        self, event: tcod.event.KeyDown
-    ) -> Optional[input_handlers.BaseEventHandler]:
+    def ev_keydown(self, event: tcod.event.KeyDown) -> Optional[BaseEventHandler]:
+        import game.input.input_handlers as input_handlers
+
         if event.sym in (keys.MENU_MAPPING["QUIT"], tcod.event.KeySym.ESCAPE):
             raise SystemExit()
         elif event.sym == keys.MENU_MAPPING["CONTINUE"]:
             try:
                 return input_handlers.MainGameEventHandler(
-                    load_game("save_data/savegame.sav")
+                    load_game(SAVE_FOLDER / "savegame.sav")
                 )
             except FileNotFoundError:
                 return input_handlers.PopupMessage(self, "No saved game to load.")
@@ -0,0 +1,148 @@
+"""Where save data and cached cities live on disk, and the memory-mapped layers
+of large maps."""
+
+from __future__ import annotations
+
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Set, Tuple
+
+import numpy as np  # type: ignore
+
+SAVE_FOLDER = Path("game/data/save_data")
+# Layer files of new memory-mapped maps, until they are first saved, in a
+# folder per process so games running side by side keep to their own.
+MAP_FOLDER = SAVE_FOLDER / "maps"
+# Generated cities, keyed by their settings and seed.
+CITY_CACHE_FOLDER = Path("game/data/city_cache")
+# Compiled tile tables, see game/entities/build_tile_table.py.  They can be
+# written on import, so they live with the package, not the working directory.
+TILE_TABLE_FOLDER = Path(__file__).resolve().parent.parent / "data" / "tiles"
+
+# GameMap layers that are stored as .npy files for memory-mapped maps.
+MAP_LAYERS = ("tiles", "visible", "explored")
+
+
+def new_map_folder() -> Path:
+    """Create and return an empty scratch folder for one map's layer files."""
+    folder = MAP_FOLDER / str(os.getpid()) / uuid.uuid4().hex
+    folder.mkdir(parents=True)
+    return folder
+
+
+def release_map_folder(folder: Path) -> None:
+    """Delete a scratch folder, and its process's folder once that is empty."""
+    shutil.rmtree(folder, ignore_errors=True)
+    try:
+        folder.parent.rmdir()
+    except OSError:
+        pass
+
+
+def saved_maps_folder(save_file: Path) -> Path:
+    """Return the folder the layers of `save_file`'s maps are saved in."""
+    return Path(save_file).with_suffix(".maps")
+
+
+def _process_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        import ctypes
+
+        # PROCESS_QUERY_LIMITED_INFORMATION; os.kill would end the process.
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            return False
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def remove_unreferenced_maps() -> None:
+    """Delete the scratch folders of processes that have exited, and saved
+    layers whose save file is gone."""
+    if MAP_FOLDER.is_dir():
+        for folder in MAP_FOLDER.iterdir():
+            if not folder.name.isdigit() or not _process_alive(int(folder.name)):
+                shutil.rmtree(folder, ignore_errors=True)
+    if SAVE_FOLDER.is_dir():
+        for folder in SAVE_FOLDER.glob("*.maps"):
+            if not folder.with_suffix(".sav").exists():
+                shutil.rmtree(folder, ignore_errors=True)
+
+
+def remove_unreferenced_layers(folder: Path, referenced: Set[Path]) -> None:
+    """Delete the layer files in a save's `folder` that it no longer uses."""
+    if not referenced:
+        shutil.rmtree(folder, ignore_errors=True)
+        return
+    for path in folder.glob("*.npy"):
+        if path not in referenced:
+            try:
+                path.unlink()
+            except OSError:
+                pass  # Still mapped, on platforms that can't delete those.
+
+
+def create_layer(
+    folder: Path, name: str, shape: Tuple[int, ...], fill_value
+) -> Tuple[Path, np.memmap]:
+    """Create a memory-mapped .npy layer filled with `fill_value`."""
+    path = folder / f"{name}.npy"
+    fill_value = np.asarray(fill_value)
+    layer = np.lib.format.open_memmap(
+        path,
+        mode="w+",
+        dtype=fill_value.dtype,
+        shape=shape,
+        fortran_order=True,
+    )
+    layer[...] = fill_value
+    return path, layer
+
+
+def open_layer(path: Path) -> np.memmap:
+    """Map a saved layer copy-on-write.
+
+    Pages are only read in once they are used, and changes stay in memory, so
+    the file only changes when the layer is saved to a new one.
+    """
+    return np.load(path, mmap_mode="c")
+
+
+def _saved_layer_path(folder: Path, name: str) -> Path:
+    # A new name each time, so the files of the last save are never touched.
+    return folder / f"{name}-{uuid.uuid4().hex}.npy"
+
+
+def move_layer(path: Path, folder: Path, name: str) -> Path:
+    """Move a flushed scratch layer file into a save's `folder`."""
+    destination = _saved_layer_path(folder, name)
+    shutil.move(path, destination)
+    return destination
+
+
+def link_layer(path: Path, folder: Path, name: str) -> Path:
+    """Put a layer saved elsewhere into a save's `folder` too."""
+    destination = _saved_layer_path(folder, name)
+    try:
+        os.link(path, destination)
+    except OSError:
+        shutil.copyfile(path, destination)
+    return destination
+
+
+def write_layer(layer: np.ndarray, folder: Path, name: str) -> Path:
+    """Write a layer that changed since it was loaded into a save's `folder`."""
+    destination = _saved_layer_path(folder, name)
+    np.save(destination, layer)
+    return destination
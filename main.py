@@ -1,21 +1,28 @@
 #!/usr/bin/env python3
+import atexit
+import os
+import random
 import tcod
 import traceback
-from pathlib import Path
-
 
+# Only what the main menu needs is imported here.  The rest of the game is
+# imported on a background thread while it is shown, see setup_game.
 import game.render.color as color
-import game.input.input_handlers as input_handlers
+import game.input.keys as keys
 import game.utils.exceptions as exceptions
 import game.world.setup_game as setup_game
+from game.input.base_handler import BaseEventHandler
+from game.input.frame_scheduler import FrameScheduler
+from game.render.tilesets import TilesetManager
+from game.utils.profiling import PROFILER
+from game.world import storage
+from game.world.storage import SAVE_FOLDER
 
 
-FONTS_FOLDER = Path("game/data/fonts")
-SAVE_FOLDER = Path("game/data/save_data")
-
-
-def save_game(handler: input_handlers.BaseEventHandler, filename: str) -> None:
+def save_game(handler: BaseEventHandler, filename: str) -> None:
     """If the current event handler has an active Engine then save it."""
+    import game.input.input_handlers as input_handlers
+
     if isinstance(handler, input_handlers.EventHandler):
         handler.engine.save_as(SAVE_FOLDER / filename)
         print("Game saved.")
@@ -25,14 +32,27 @@ def main() -> None:
     terminal_width = 100
     terminal_height = 50
 
-    tileset = tcod.tileset.load_tilesheet(
-        FONTS_FOLDER / "JK_Fnord_16x16.png",
-        16,
-        16,
-        tcod.tileset.CHARMAP_CP437,
-    )
+    # The menu only needs tcod, so the rest of the game is imported while the
+    # window is being set up and the menu is shown.
+    setup_game.preload_game_modules()
+    # Scratch map layers are deleted with their maps; this catches the rest.
+    atexit.register(storage.remove_unreferenced_maps)
+
+    tilesets = TilesetManager()
+    tileset = tilesets.current()
 
-    handler: input_handlers.BaseEventHandler = setup_game.MainMenu()
+    handler: BaseEventHandler = setup_game.MainMenu()
+
+    # Sessions are only recorded when DATAROGUE_RECORD names a file.
+    recorder = None
+    if os.environ.get("DATAROGUE_RECORD"):
+        from game.utils.replay import Recorder
+
+        recorder = Recorder.from_environment()
+    if recorder is not None:
+        # Importing the game modules uses `random`, so finish that first.
+        setup_game.wait_for_game_modules()
+        random.seed(recorder.seed)
 
     with tcod.context.new(
         columns=terminal_width,
@@ -50,20 +70,45 @@ def main() -> None:
             order="F",
         )
 
+        # The profiler overlay shows live timings, so it's redrawn while idle too.
+        scheduler = FrameScheduler(
+            context.convert_event, animating=lambda: PROFILER.overlay
+        )
+
         try:
             while True:
-                root_console.clear()
-                handler.on_render(console=root_console)
-                context.present(root_console)
+                if scheduler.should_render():
+                    with PROFILER.measure("render", "frame"):
+                        root_console.clear()
+                        handler.on_render(console=root_console)
+                        context.present(root_console)
+                    scheduler.frame_rendered()
 
                 try:
-                    for event in tcod.event.wait():
-                        context.convert_event(event)
-                        handler = handler.handle_events(event)
+                    for event in scheduler.next_events():
+                        if (
+                            isinstance(event, tcod.event.KeyDown)
+                            and event.sym == keys.NEXT_FONT_KEY
+                        ):
+                            context.change_tileset(tilesets.next_font())
+                            continue
+                        if (
+                            isinstance(event, tcod.event.KeyDown)
+                            and event.sym == keys.PROFILER_KEY
+                        ):
+                            PROFILER.toggle()
+                            continue
+                        try:
+                            handler = handler.handle_events(event)
+                        finally:
+                            if recorder is not None:
+                                recorder.record(event, handler)
 
                 except Exception:  # Handle exceptions in game.
                     traceback.print_exc()  # Print error to stderr.
                     # Then print the error to the message log.
+                    import game.input.input_handlers as input_handlers
+
                     if isinstance(handler, input_handlers.EventHandler):
                         handler.engine.message_log.add_message(
                             traceback.format_exc(), color.error